@@ -0,0 +1,201 @@
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, fields, replace
+from functools import lru_cache
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent
+DEFAULT_XML = REPO_ROOT / "xml" / "UNICADO-SMR-180-TF_start.xml"
+DEFAULT_ENGINE_STUB = Path("stubs") / "engines" / "PW1127G-JM"
+
+_REQ = "requirements_and_specifications"
+_TLAR = f"{_REQ}/requirements/top_level_aircraft_requirements"
+_TRANSPORT = f"{_REQ}/design_specification/transport_task"
+
+
+# (1) Immutable configuration ----------------------------------------------------------
+@dataclass(frozen=True)
+class MissionSpec:
+    """One mission block of the exchange file (design_mission / study_mission)."""
+    name: str
+    range_m: float
+    delta_isa: float = 0.0                     # [K]
+    initial_cruise_mach: float = 0.78
+    initial_cruise_altitude_m: float = 10058.4
+    climb_speed_below_FL100: float = 128.6112  # [m/s]
+    climb_speed_above_FL100: float = 154.3334  # [m/s]
+    descent_speed_below_FL100: float = 128.6112
+    descent_speed_above_FL100: float = 154.3334
+    payload_kg: float = 0.0
+
+
+@dataclass(frozen=True)
+class AircraftConfig:
+    """
+    Aircraft, engine and mission data for one run, parsed once from the aircraft
+    exchange XML (see load_aircraft_config).
+
+    The start file carries requirements only, so the aerodynamic constants and the
+    take-off mass are not in it; they default to the values the climb module has always
+    used and can be overridden (load_aircraft_config(..., CD0=0.021) or with_overrides).
+    Frozen and made of plain values, so it pickles in a few hundred bytes and can be
+    handed to worker processes instead of re-parsing the XML there.
+    """
+    name: str = "SMR-180-TF"
+    engine_stub: str = str(DEFAULT_ENGINE_STUB)  # relative paths: relative to the repo
+    n_engines: int = 2
+    S_ref: float = 122.4              # [m^2] wing reference area
+    CD0: float = 0.02                 # [-] zero-lift drag coefficient
+    AR: float = 9.5                   # [-] aspect ratio
+    e: float = 0.85                   # [-] Oswald efficiency
+    takeoff_mass_kg: float = 60000.0  # [kg]
+    initial_speed_mps: float = 75.0   # [m/s] speed at the start of climb
+    max_operating_mach: float = 0.82
+    max_operating_altitude_m: float = 12192.0
+    fuel_density: float = 785.0       # [kg/m^3]
+    mission: MissionSpec = MissionSpec("design_mission", 4537400.0)
+
+    @property
+    def stub_path(self):
+        path = Path(self.engine_stub)
+        return path if path.is_absolute() else REPO_ROOT / path
+
+    def with_overrides(self, **overrides):
+        """Copy with fields replaced; mission fields may be given as mission_<field>."""
+        mission_fields = {f.name for f in fields(MissionSpec)}
+        mission = {k[len("mission_"):]: overrides.pop(k) for k in list(overrides)
+                   if k.startswith("mission_") and k[len("mission_"):] in mission_fields}
+        if mission:
+            overrides["mission"] = replace(overrides.get("mission", self.mission), **mission)
+        return replace(self, **overrides)
+
+    @classmethod
+    def override_type(cls, key):
+        """
+        Type (int, float or str) of the field `key` names in with_overrides, mission_<field>
+        included; None for keys that are not a plain field.
+        """
+        types = {f.name: f.type for f in fields(cls)}
+        if key.startswith("mission_"):
+            types = {f"mission_{f.name}": f.type for f in fields(MissionSpec)}
+        kind = types.get(key)
+        return kind if kind in (int, float, str) else None
+
+    def context(self, engine=None, lever_solver=None, lever_cache=None):
+        """segments.SegmentContext for this aircraft (engine default: loaded from the stub)."""
+        from segments import SegmentContext
+        if engine is None:
+            engine = load_engine(self.stub_path)
+        return SegmentContext(engine, S_ref=self.S_ref, CD0=self.CD0, AR=self.AR, e=self.e,
+                              n_engines=self.n_engines, lever_solver=lever_solver,
+                              lever_cache=lever_cache)
+
+
+# (2) Exchange-file parsing ------------------------------------------------------------
+def read_exchange_values(path):
+    """
+    Flat {'a/b/c': value} of every <value> in the exchange file. Numeric values become
+    floats; indexed siblings (tank, propulsor, ...) get their ID: 'propulsor@0/...'.
+    """
+    values = {}
+
+    def walk(node, prefix):
+        for child in node:
+            tag = child.tag if child.get("ID") is None else f"{child.tag}@{child.get('ID')}"
+            key = f"{prefix}/{tag}" if prefix else tag
+            if child.tag == "value":
+                values[prefix] = _number(child.text)
+            else:
+                walk(child, key)
+
+    walk(ET.parse(path).getroot(), "")
+    return values
+
+
+def _number(text):
+    text = (text or "").strip()
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def _payload(values, prefix):
+    pax = values.get(f"{prefix}/passenger_definition/total_number_passengers", 0.0)
+    per_pax = (values.get(f"{prefix}/passenger_definition/mass_per_passenger", 0.0)
+               + values.get(f"{prefix}/passenger_definition/luggage_mass_per_passenger", 0.0))
+    return pax * per_pax + values.get(f"{prefix}/cargo_definition/additional_cargo_mass", 0.0)
+
+
+def config_from_values(values, mission="design_mission", **overrides):
+    """AircraftConfig from read_exchange_values() output (missing entries keep defaults)."""
+    base = AircraftConfig()
+    m = f"{_TLAR}/{mission}"
+    if f"{m}/range" not in values:
+        raise KeyError(f"Mission {mission!r} not found in the exchange file")
+    # study missions carry their own transport task; the design mission uses the main one
+    transport = f"{m}/transport_task"
+    if f"{transport}/passenger_definition/total_number_passengers" not in values:
+        transport = _TRANSPORT
+
+    def get(key, default):
+        value = values.get(key, default)
+        return default if isinstance(value, str) else value
+
+    spec = MissionSpec(
+        name=mission,
+        range_m=get(f"{m}/range", base.mission.range_m),
+        delta_isa=get(f"{m}/delta_ISA", 0.0),
+        initial_cruise_mach=get(f"{m}/initial_cruise_mach_number", base.mission.initial_cruise_mach),
+        initial_cruise_altitude_m=get(f"{m}/initial_cruise_altitude", base.mission.initial_cruise_altitude_m),
+        climb_speed_below_FL100=get(f"{m}/climb_speed_schedule/climb_speed_below_FL100",
+                                    base.mission.climb_speed_below_FL100),
+        climb_speed_above_FL100=get(f"{m}/climb_speed_schedule/climb_speed_above_FL100",
+                                    base.mission.climb_speed_above_FL100),
+        descent_speed_below_FL100=get(f"{m}/descent_speed_schedule/descent_speed_below_FL100",
+                                      base.mission.descent_speed_below_FL100),
+        descent_speed_above_FL100=get(f"{m}/descent_speed_schedule/descent_speed_above_FL100",
+                                      base.mission.descent_speed_above_FL100),
+        payload_kg=_payload(values, transport),
+    )
+    propulsors = {k.split("/propulsor@")[1].split("/")[0] for k in values if "/propulsor@" in k}
+    envelope = f"{_TLAR}/flight_envelope"
+    config = replace(
+        base,
+        name=str(values.get(f"{_REQ}/general/model", base.name)),
+        n_engines=len(propulsors) or base.n_engines,
+        max_operating_mach=get(f"{envelope}/maximum_operating_mach_number", base.max_operating_mach),
+        max_operating_altitude_m=get(f"{envelope}/maximum_operating_altitude", base.max_operating_altitude_m),
+        fuel_density=get(f"{_REQ}/design_specification/energy_carriers/energy_carrier@0/density",
+                         base.fuel_density),
+        mission=spec,
+    )
+    return config.with_overrides(**overrides) if overrides else config
+
+
+@lru_cache(maxsize=None)
+def _parsed(path, mtime_ns):
+    return read_exchange_values(path)
+
+
+def load_aircraft_config(path=DEFAULT_XML, mission="design_mission", **overrides):
+    """
+    Parse the aircraft exchange XML (once per file and process) into an AircraftConfig
+    for `mission`. Keyword overrides replace config fields, see with_overrides.
+    """
+    path = Path(path).resolve()
+    return config_from_values(_parsed(str(path), path.stat().st_mtime_ns), mission, **overrides)
+
+
+# (3) Engines ---------------------------------------------------------------------------
+def load_engine(stub_path):
+    """One pyengine.Engine per stub directory and process (see pyengine.get_engine)."""
+    from pyengine import get_engine
+    return get_engine(stub_path)
+
+
+# (4) Quick self-test when run directly ------------------------------------------------
+if __name__ == "__main__":
+    config = load_aircraft_config()
+    print("[INFO]", config)
+    print("[INFO] Engine stub:", config.stub_path, "exists:", config.stub_path.is_dir())
+    print("[INFO] Study mission payload (kg):", load_aircraft_config(mission="study_mission").mission.payload_kg)
@@ -1,42 +1,48 @@
 import math
+import numpy as np
 
-class Atmosphere:
-    """Layer-based ISA model using polytropic and exponential formulations.
-    Returns atmospheric properties as a function of geopotential altitude (in meters),
-    and altitude-dependent gravity.
-    """
+# Constants
+g_s = 9.80665  # m/s²
+R = 287.05     # J/(kg·K)
 
-    def calculate_atmospheric_properties(self, FL):
-        # Constants
-        g_s = 9.80665  # m/s²
-        R = 287.05     # J/(kg·K)
+# Sea-level reference values
+T_MSL = 288.15  # K
+p_MSL = 101325  # Pa
+rho_MSL = 1.225  # kg/m³
 
-        # Sea-level reference values
-        T_MSL = 288.15  # K
-        p_MSL = 101325  # Pa
-        rho_MSL = 1.225  # kg/m³
+# Lapse rates
+gamma_Tropo = -0.0065  # K/m
+gamma_UpperStr = 0.001  # K/m
 
-        # Lapse rates
-        gamma_Tropo = -0.0065  # K/m
-        gamma_UpperStr = 0.001  # K/m
+# Layer boundaries
+H_G11 = 11000  # Tropopause (11 km)
+H_G20 = 20000  # Upper stratosphere base
 
-        # Layer boundaries
-        H_G11 = 11000  # Tropopause (11 km)
-        H_G20 = 20000  # Upper stratosphere base
+# Boundary values
+T_11 = 216.65  # K
+p_11 = 22632   # Pa
+rho_11 = 0.364  # kg/m³
 
-        # Boundary values
-        T_11 = 216.65  # K
-        p_11 = 22632   # Pa
-        rho_11 = 0.364  # kg/m³
+T_20 = 216.65  # K
+p_20 = 5474.88  # Pa
+rho_20 = 0.088  # kg/m³
 
-        T_20 = 216.65  # K
-        p_20 = 5474.88  # Pa
-        rho_20 = 0.088  # kg/m³
+# Polytropic indices
+n_trop = 1.235
+n_uStr = 0.001
 
-        # Polytropic indices
-        n_trop = 1.235
-        n_uStr = 0.001
+# Gas properties / Earth model
+kappa = 1.4       # ratio of specific heats
+R_e = 6371000.0  # Earth radius in meters
 
+
+class Atmosphere:
+    """Layer-based ISA model using polytropic and exponential formulations.
+    Returns atmospheric properties as a function of geopotential altitude (in meters),
+    and altitude-dependent gravity.
+    """
+
+    def calculate_atmospheric_properties(self, FL):
         # Convert flight level to meters
         H_G = FL * 0.3048
 
@@ -56,6 +62,10 @@ class Atmosphere:
 
         return T, p, rho
 
+    def calculate_atmospheric_properties_m(self, altitude_m):
+        """calculate_atmospheric_properties at a geopotential altitude in meters."""
+        return self.calculate_atmospheric_properties(altitude_m / 0.3048)
+
     def get_temperature(self, altitude_m: float) -> float:
         """Wrapper to get temperature only."""
         T, _, _ = self.calculate_atmospheric_properties(altitude_m / 0.3048)
@@ -64,13 +74,220 @@ class Atmosphere:
     def get_speed_of_sound(self, altitude_m: float) -> float:
         """Compute speed of sound using T(h)."""
         T = self.get_temperature(altitude_m)
-        return math.sqrt(1.4 * 287.05 * T)
+        return math.sqrt(kappa * R * T)
 
     def get_gravity(self, altitude_m: float) -> float:
         """Compute gravity as a function of altitude using the inverse-square law."""
-        R_e = 6371000.0  # Earth radius in meters
-        g0 = 9.80665     # Standard gravity at sea level
-        return g0 * (R_e / (R_e + altitude_m))**2
+        return g_s * (R_e / (R_e + altitude_m))**2
+
+    # --- Vectorized counterparts (array in / array out) ---------------------------------
+    # Same inputs and units as the scalar methods above; layers are selected with np.where
+    # masks instead of if/elif, so one call evaluates any number of altitudes.
+
+    def calculate_atmospheric_properties_array(self, FL):
+        """Array version of calculate_atmospheric_properties: FL [ft] -> (T, p, rho)."""
+        H_G = np.asarray(FL, dtype=float) * 0.3048
+        tropo = H_G <= H_G11
+
+        # Troposphere only (the usual case for climb segments): skip the masking
+        if tropo.all():
+            theta_tr = 1 + (gamma_Tropo / T_MSL) * H_G
+            return (T_MSL * theta_tr,
+                    p_MSL * theta_tr ** (n_trop / (n_trop - 1)),
+                    rho_MSL * theta_tr ** (1 / (n_trop - 1)))
+
+        lower = ~tropo & (H_G <= H_G20)
+
+        # every layer formula is evaluated everywhere; out-of-layer NaNs are discarded
+        with np.errstate(invalid="ignore", over="ignore"):
+            theta_tr = 1 + (gamma_Tropo / T_MSL) * H_G
+            decay_11 = np.exp(-g_s / (R * T_11) * (H_G - H_G11))
+            theta_us = 1 + (gamma_UpperStr / T_20) * (H_G - H_G20)
+            base_us = 1 - ((n_uStr - 1) / n_uStr) * (g_s / (R * T_20)) * (H_G - H_G20)
+
+            T = np.where(tropo, T_MSL * theta_tr,
+                         np.where(lower, T_11, T_20 * theta_us))
+            p = np.where(tropo, p_MSL * theta_tr ** (n_trop / (n_trop - 1)),
+                         np.where(lower, p_11 * decay_11, p_20 * theta_us ** (n_uStr / (n_uStr - 1))))
+            rho = np.where(tropo, rho_MSL * theta_tr ** (1 / (n_trop - 1)),
+                           np.where(lower, rho_11 * decay_11, rho_20 * base_us ** (1 / (n_uStr - 1))))
+        return T, p, rho
+
+    def calculate_atmospheric_properties_array_m(self, altitude_m):
+        """Array version of calculate_atmospheric_properties_m: altitude [m] -> (T, p, rho)."""
+        return self.calculate_atmospheric_properties_array(np.asarray(altitude_m, dtype=float) / 0.3048)
+
+    def get_temperature_array(self, altitude_m):
+        """Array version of get_temperature."""
+        T, _, _ = self.calculate_atmospheric_properties_array(np.asarray(altitude_m, dtype=float) / 0.3048)
+        return T
+
+    def get_speed_of_sound_array(self, altitude_m):
+        """Array version of get_speed_of_sound."""
+        return np.sqrt(kappa * R * self.get_temperature_array(altitude_m))
+
+    def get_gravity_array(self, altitude_m):
+        """Array version of get_gravity."""
+        return g_s * (R_e / (R_e + np.asarray(altitude_m, dtype=float)))**2
+
+    def get_temperature_gradient_array(self, altitude_m):
+        """Analytic dT/dh [K/m] of each layer (no finite difference needed)."""
+        H_G = np.asarray(altitude_m, dtype=float)
+        return np.where(H_G <= H_G11, gamma_Tropo, np.where(H_G <= H_G20, 0.0, gamma_UpperStr))
+
+    def calculate_atmospheric_state_array(self, altitude_m):
+        """Full state in one call: altitude [m] -> (T, p, rho, a, g, dT/dh) arrays."""
+        altitude_m = np.asarray(altitude_m, dtype=float)
+        T, p, rho = self.calculate_atmospheric_properties_array(altitude_m / 0.3048)
+        a = np.sqrt(kappa * R * T)
+        g = self.get_gravity_array(altitude_m)
+        dTdh = self.get_temperature_gradient_array(altitude_m)
+        return T, p, rho, a, g, dTdh
+
+    # --- Wind (still air in the standard atmosphere) ------------------------------------
+    def get_wind(self, altitude_m: float) -> float:
+        """Along-track wind [m/s] (tailwind positive)."""
+        return 0.0
+
+    def get_wind_array(self, altitude_m):
+        """Array version of get_wind."""
+        return np.zeros(np.shape(altitude_m))
+
+
+# --- Off-design atmosphere (ISA deviation, tabulated profiles) ----------------------------
+LUT_STEP_M = 5.0                 # [m] spacing of the lookup tables
+LUT_RANGE_M = (0.0, 20000.0)     # [m] altitude span of the tables (clamped outside)
+
+
+class OffDesignAtmosphere(Atmosphere):
+    """Non-standard day: ISA temperature deviation and/or a tabulated T(h) and wind(h).
+
+    Altitudes are pressure altitudes (the axis of the engine decks), so pressure
+    follows ISA and only temperature, density (rho = rho_ISA * T_ISA / T) and speed
+    of sound change:
+      - delta_isa [K] is added to the ISA temperature, or to `temperature` when given
+      - temperature: (altitudes [m], T [K]) profile, e.g. from a radiosonde ascent
+      - wind: along-track component [m/s] (tailwind positive), a constant or an
+        (altitudes [m], wind) profile
+
+    Everything is tabulated once on a uniform LUT_STEP_M grid, so a lookup is an index
+    computation plus a linear interpolation (O(1), no layer logic), scalar or array.
+    Call conventions are those of Atmosphere (calculate_atmospheric_properties takes
+    feet, the *_m variants and get_wind meters), so an instance drops in wherever an
+    Atmosphere is used.
+    """
+
+    def __init__(self, delta_isa=0.0, temperature=None, wind=None, step_m=LUT_STEP_M,
+                 altitude_range_m=LUT_RANGE_M):
+        self.delta_isa = float(delta_isa)
+        self._h0 = float(altitude_range_m[0])
+        self._inv_step = 1.0 / float(step_m)
+        grid = np.arange(self._h0, float(altitude_range_m[1]) + 0.5 * step_m, step_m)
+        self._last = grid.size - 1
+
+        T_isa, p, rho_isa = Atmosphere.calculate_atmospheric_properties_array(self, grid / 0.3048)
+        if temperature is None:
+            T = T_isa + self.delta_isa
+        else:
+            T = np.interp(grid, *map(np.asarray, temperature)) + self.delta_isa
+        if wind is None or np.isscalar(wind):
+            u = np.full(grid.size, 0.0 if wind is None else float(wind))
+        else:
+            u = np.interp(grid, *map(np.asarray, wind))
+
+        self.altitudes_m = grid
+        self.T_table, self.p_table = T, p
+        self.rho_table = rho_isa * T_isa / T
+        self.wind_table = u
+        self.dTdh_table = np.gradient(T, grid)
+        self._T, self._p, self._rho, self._u = T.tolist(), p.tolist(), self.rho_table.tolist(), u.tolist()
+
+    @classmethod
+    def from_file(cls, path, delta_isa=0.0, track_deg=0.0, **kwargs):
+        """Profile from a radiosonde-style text table (whitespace or comma separated)
+        with a header line naming the columns:
+          altitude_m                   required
+          T_K or T_C                   temperature (optional; ISA where missing)
+          wind_mps                     along-track wind, tailwind positive, or
+          wind_speed_mps, wind_dir_deg meteorological wind (direction it blows FROM),
+                                       projected onto the flight track `track_deg`
+        Lines starting with '#' are comments.
+        """
+        with open(path) as f:
+            sample = f.read(4096)
+        delimiter = "," if "," in sample else None
+        data = np.genfromtxt(path, names=True, delimiter=delimiter, comments="#", dtype=float)
+        names = data.dtype.names
+        if "altitude_m" not in names:
+            raise ValueError(f"{path}: no 'altitude_m' column (columns: {names})")
+        h = np.atleast_1d(data["altitude_m"])
+        order = np.argsort(h)
+        h = h[order]
+
+        temperature = None
+        if "T_K" in names:
+            temperature = (h, np.atleast_1d(data["T_K"])[order])
+        elif "T_C" in names:
+            temperature = (h, np.atleast_1d(data["T_C"])[order] + 273.15)
+        wind = None
+        if "wind_mps" in names:
+            wind = (h, np.atleast_1d(data["wind_mps"])[order])
+        elif "wind_speed_mps" in names and "wind_dir_deg" in names:
+            speed = np.atleast_1d(data["wind_speed_mps"])[order]
+            direction = np.radians(np.atleast_1d(data["wind_dir_deg"])[order] - track_deg)
+            wind = (h, -speed * np.cos(direction))
+        return cls(delta_isa=delta_isa, temperature=temperature, wind=wind, **kwargs)
+
+    # --- lookups -------------------------------------------------------------------------
+    def _cell(self, altitude_m):
+        x = (altitude_m - self._h0) * self._inv_step
+        if x <= 0.0:
+            return 0, 0.0
+        if x >= self._last:
+            return self._last - 1, 1.0
+        i = int(x)
+        return i, x - i
+
+    def _cells(self, altitude_m):
+        x = np.clip((np.asarray(altitude_m, dtype=float) - self._h0) * self._inv_step, 0.0, self._last)
+        i = np.minimum(x.astype(np.int64), self._last - 1)
+        return i, x - i
+
+    def calculate_atmospheric_properties_m(self, altitude_m):
+        i, w = self._cell(altitude_m)
+        T, p, rho = self._T, self._p, self._rho
+        return (T[i] + w * (T[i + 1] - T[i]), p[i] + w * (p[i + 1] - p[i]),
+                rho[i] + w * (rho[i + 1] - rho[i]))
+
+    def calculate_atmospheric_properties(self, FL):
+        return self.calculate_atmospheric_properties_m(FL * 0.3048)
+
+    def calculate_atmospheric_properties_array_m(self, altitude_m):
+        i, w = self._cells(altitude_m)
+        return tuple(t[i] + w * (t[i + 1] - t[i])
+                     for t in (self.T_table, self.p_table, self.rho_table))
+
+    def calculate_atmospheric_properties_array(self, FL):
+        return self.calculate_atmospheric_properties_array_m(np.asarray(FL, dtype=float) * 0.3048)
+
+    def get_temperature(self, altitude_m: float) -> float:
+        return self.calculate_atmospheric_properties_m(altitude_m)[0]
+
+    def get_temperature_array(self, altitude_m):
+        return self.calculate_atmospheric_properties_array_m(altitude_m)[0]
+
+    def get_temperature_gradient_array(self, altitude_m):
+        i, w = self._cells(altitude_m)
+        return self.dTdh_table[i] + w * (self.dTdh_table[i + 1] - self.dTdh_table[i])
+
+    def get_wind(self, altitude_m: float) -> float:
+        i, w = self._cell(altitude_m)
+        u = self._u
+        return u[i] + w * (u[i + 1] - u[i])
+
+    def get_wind_array(self, altitude_m):
+        i, w = self._cells(altitude_m)
+        return self.wind_table[i] + w * (self.wind_table[i + 1] - self.wind_table[i])
 
 
 # --- Dummy test cases for standalone testing ---
@@ -83,3 +300,9 @@ if __name__ == "__main__":
         a = atm.get_speed_of_sound(altitude_m)
         g = atm.get_gravity(altitude_m)
         print(f"FL{FL} → T = {T:.2f} K, p = {p:.2f} Pa, ρ = {rho:.4f} kg/m³, a = {a:.2f} m/s, g = {g:.5f} m/s²")
+
+    hot = OffDesignAtmosphere(delta_isa=20.0, wind=-10.0)
+    for FL in [0, 35000]:
+        T, p, rho = hot.calculate_atmospheric_properties(FL)
+        print(f"ISA+20 FL{FL} → T = {T:.2f} K, p = {p:.2f} Pa, ρ = {rho:.4f} kg/m³, "
+              f"wind = {hot.get_wind(FL * 0.3048):.1f} m/s")
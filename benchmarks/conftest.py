@@ -0,0 +1,71 @@
+"""
+pytest-benchmark suite for the climb / engine hot paths.
+
+    pytest benchmarks --benchmark-save=baseline        # store a baseline
+    pytest benchmarks --benchmark-compare              # compare with the latest one
+
+Baselines live in benchmarks/baselines/<machine>/ (one JSON per saved run). With
+--benchmark-compare, a benchmark whose mean time grows by more than
+MAX_REGRESSION_PCT (env BENCHMARK_MAX_REGRESSION_PCT) fails the run, unless
+--benchmark-compare-fail is given explicitly. A compare run without a baseline to
+compare against is a usage error (exit code 4), never a silent pass.
+
+Timings only compare on the same machine, so baselines are not committed
+(.gitignore). CI measures both sides on one runner:
+
+    git checkout <base commit>
+    pytest benchmarks --benchmark-save=baseline
+    git checkout <change>
+    pytest benchmarks --benchmark-compare
+
+Every benchmark runs on pyengine.DeckEngine over the repository's engine stub, never
+the native binary, so results are deterministic and the suite runs on Linux.
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+MAX_REGRESSION_PCT = int(os.environ.get("BENCHMARK_MAX_REGRESSION_PCT", 10))
+
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))  # startup.py
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    option = config.option
+    if not hasattr(option, "benchmark_storage"):
+        return  # pytest-benchmark not installed; the benchmark modules skip themselves
+    if option.benchmark_storage == "file://./.benchmarks":
+        option.benchmark_storage = f"file://{BASELINE_DIR}"
+    if option.benchmark_compare and not option.benchmark_compare_fail:
+        from pytest_benchmark.utils import parse_compare_fail
+        option.benchmark_compare_fail = [parse_compare_fail(f"mean:{MAX_REGRESSION_PCT}%")]
+
+
+def pytest_sessionstart(session):
+    benchmarks = getattr(session.config, "_benchmarksession", None)
+    if benchmarks is None or not benchmarks.compare or benchmarks.disabled:
+        return
+    if not benchmarks.compared_mapping:
+        raise pytest.UsageError(
+            f"--benchmark-compare: no baseline in {benchmarks.storage}; "
+            "save one first with --benchmark-save=baseline")
+
+
+@pytest.fixture(scope="session")
+def engine():
+    """Deterministic engine stand-in: the NumPy deck evaluator on climb's stub."""
+    import climb
+    from pyengine import DeckEngine
+    return DeckEngine(climb.STUB)
+
+
+@pytest.fixture(scope="session")
+def lever_solver(engine):
+    from lever_solver import InverseLeverSolver
+    return InverseLeverSolver.from_engine(engine)
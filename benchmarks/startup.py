@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BUDGET_MS = {"climb": 400.0, "segments": 300.0, "pyengine": 250.0, "plotting": 250.0}
+HEAVY = ("matplotlib", "pandas", "tkinter", "pyarrow")
+REPEATS = 5
+
+# Runs in a fresh interpreter: import one module, report time and what got loaded
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - t0
+import pyengine
+print(json.dumps({{"ms": 1000.0 * elapsed,
+                  "heavy": sorted(m for m in {heavy!r} if m in sys.modules),
+                  "engines": len(pyengine._ENGINES)}}))
+"""
+
+
+# (1) Cold-import measurement -----------------------------------------------------------
+def cold_import(module, repeats=REPEATS):
+    """
+    Import `module` in `repeats` fresh interpreters (python -c ...) and return
+    {'median_ms', 'min_ms', 'heavy', 'engines'}: the import time, the heavy optional
+    packages it pulled in and how many engines were constructed during the import.
+    """
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    code = _PROBE.format(module=module, heavy=HEAVY)
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", code], env=env, cwd=REPO_ROOT,
+                             capture_output=True, text=True, check=True)
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    times = [r["ms"] for r in runs]
+    return {"median_ms": statistics.median(times), "min_ms": min(times),
+            "heavy": runs[-1]["heavy"], "engines": runs[-1]["engines"]}
+
+
+def check_startup(budgets=BUDGET_MS, repeats=REPEATS, scale=1.0):
+    """Measure every module in `budgets`; returns (results, list of failure messages)."""
+    results, failures = {}, []
+    for module, budget in budgets.items():
+        r = results[module] = cold_import(module, repeats)
+        if r["median_ms"] > budget * scale:
+            failures.append(f"{module}: {r['median_ms']:.0f} ms > budget {budget * scale:.0f} ms")
+        if r["heavy"]:
+            failures.append(f"{module}: imports {', '.join(r['heavy'])}")
+        if r["engines"]:
+            failures.append(f"{module}: constructs {r['engines']} engine(s) at import")
+    return results, failures
+
+
+# (2) Command line ----------------------------------------------------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-import time budget check.")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--scale", type=float, default=float(os.environ.get("STARTUP_BUDGET_SCALE", 1.0)),
+                        help="multiply every budget (slow CI machines)")
+    args = parser.parse_args()
+
+    results, failures = check_startup(repeats=args.repeats, scale=args.scale)
+    for module, r in results.items():
+        print(f"[INFO] import {module:10s} median {r['median_ms']:7.1f} ms  "
+              f"min {r['min_ms']:7.1f} ms  (budget {BUDGET_MS[module] * args.scale:.0f} ms)")
+    for failure in failures:
+        print(f"[ERROR] {failure}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import climb
+from atmosphere import Atmosphere
+
+ALTITUDES_FT = np.linspace(0.0, 45000.0, 1000)  # crosses both layer boundaries
+
+
+# (1) Atmosphere ------------------------------------------------------------------------
+@pytest.mark.benchmark(group="atmosphere")
+def test_atmosphere_scalar(benchmark):
+    atm = Atmosphere()
+    altitudes = ALTITUDES_FT.tolist()
+    result = benchmark(lambda: [atm.calculate_atmospheric_properties(h) for h in altitudes])
+    assert len(result) == len(altitudes)
+
+
+@pytest.mark.benchmark(group="atmosphere")
+def test_atmosphere_vectorized(benchmark):
+    atm = Atmosphere()
+    T, p, rho = benchmark(atm.calculate_atmospheric_properties_array, ALTITUDES_FT)
+    expected = [atm.calculate_atmospheric_properties(h) for h in ALTITUDES_FT[::97].tolist()]
+    np.testing.assert_allclose(np.column_stack([T, p, rho])[::97], expected, rtol=1e-12)
+
+
+# (2) Lever solver ----------------------------------------------------------------------
+@pytest.mark.benchmark(group="lever")
+def test_find_lever_for_thrust(benchmark, engine):
+    lever, thrust, limited = benchmark(climb.find_lever_for_thrust, 60000.0, 0.4, 8000.0,
+                                       engine=engine)
+    assert lever is not None and 0.0 <= lever <= 1.0
+
+
+@pytest.mark.benchmark(group="lever")
+def test_find_lever_for_thrust_inverse_solver(benchmark, engine, lever_solver):
+    lever, thrust, limited = benchmark(climb.find_lever_for_thrust, 60000.0, 0.4, 8000.0,
+                                       engine=engine, solver=lever_solver)
+    assert lever is not None and 0.0 <= lever <= 1.0
+
+
+# (3) Climb integration -----------------------------------------------------------------
+@pytest.mark.benchmark(group="climb")
+def test_simulate_climb_path_dt02(benchmark, engine):
+    strategy = climb.strategy_for("linear", 0.5)
+    *_, final_results, _ = benchmark.pedantic(
+        climb.simulate_climb_path, args=(strategy, 0.5), kwargs=dict(dt=0.2, engine=engine),
+        rounds=3, iterations=1, warmup_rounds=0)
+    assert final_results["Final Altitude"] == pytest.approx(climb.target_altitude)
+
+
+@pytest.mark.benchmark(group="climb")
+def test_strategy_sweep_35(benchmark, engine, lever_solver):
+    """All 7 profiles x 5 altitude fractions through the vectorized batch integrator."""
+    strategies = [(af, climb.strategy_for(p, af)) for p in climb.PROFILES
+                  for af in climb.altitude_fractions]
+    assert len(strategies) == 35
+    results = benchmark.pedantic(
+        climb.simulate_climb_batch, args=(strategies,),
+        kwargs=dict(dt=1.0, engine=engine, lever_solver=lever_solver),
+        rounds=2, iterations=1, warmup_rounds=0)
+    assert len(results) == 35
+
+
+# (4) Envelope scan ---------------------------------------------------------------------
+@pytest.fixture(scope="module")
+def eng_envelope():
+    import importlib.util
+    from pathlib import Path
+    script = Path(__file__).resolve().parent.parent / "lls" / "eng_envelope.py"
+    spec = importlib.util.spec_from_file_location("eng_envelope", script)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class _ScalarOnly:
+    """The engine with only the stateful scalar pair, like the native binary."""
+
+    def __init__(self, engine):
+        self.get_thrust_with_lever_position = engine.get_thrust_with_lever_position
+        self.get_tsfc = engine.get_tsfc
+
+
+@pytest.mark.benchmark(group="envelope")
+@pytest.mark.parametrize("path", ["evaluate", "scalar"])
+def test_envelope_scan_slice(benchmark, engine, eng_envelope, path):
+    """One lever over 4 altitudes x the default Mach grid (one scan chunk)."""
+    levers, alt_grid, mach_grid = eng_envelope.make_grids()
+    eng = engine if path == "evaluate" else _ScalarOnly(engine)
+    out = benchmark(eng_envelope.scan_points, eng, 0.6, alt_grid[:eng_envelope.ALTS_PER_CHUNK],
+                    mach_grid)
+    assert out["Valid"].sum() > 0
@@ -0,0 +1,9 @@
+import os
+
+from startup import check_startup
+
+
+def test_cold_import_budget():
+    """Cold imports stay within startup.BUDGET_MS (scaled by STARTUP_BUDGET_SCALE)."""
+    results, failures = check_startup(repeats=3, scale=float(os.environ.get("STARTUP_BUDGET_SCALE", 1.0)))
+    assert not failures, "\n".join(failures)
@@ -1,13 +1,24 @@
 import numpy as np
 from atmosphere import Atmosphere
+from dataclasses import replace
 from pathlib import Path
-import pyengine as engine
+from pyengine import get_engine
+from segments import (SegmentContext, _floor, drag_force, flight_condition, ground_distance,
+                      required_thrust, solve_lever, thrust_setting)
+from trajectory import Trajectory
 
 # (1) Engine & aircraft configuration --------------------------------------------------
-STUB = Path("D:/Icloud/iCloudDrive/Master Thesis/Mission Analysis Code/lls/stubs/engines/PW1127G-JM")
-eng = engine.Engine(str(STUB))
+STUB = Path(__file__).parent / "stubs" / "engines" / "PW1127G-JM"
 N_ENGINES = 2  # total number of engines
 
+
+def __getattr__(name):
+    # `climb.eng` is built on first use (pyengine.get_engine caches one engine per stub),
+    # so importing this module never pays for loading the engine
+    if name == "eng":
+        return get_engine(STUB)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # Aerodynamic/aircraft constants
 atm = Atmosphere()  # ISA atmosphere model
 S_ref = 122.4   # [m^2] wing reference area
@@ -21,27 +32,26 @@ initial_altitude = 0        # [m]
 initial_speed    = 75       # [m/s]
 target_altitude  = 4267.2   # [m] (14,000 ft)
 dt               = 0.2      # [s] integration step
+E_DOT_CMD        = 6.5      # [m/s] commanded specific-energy magnitude
 
 # Strategy parameter sweep (used by generate_strategy)
 altitude_fractions = np.linspace(0.1, 0.9, 5)
 
-# Engine query envelope
-MACH_MIN_FOR_ENGINE   = 0.00
-MACH_MAX_FOR_ENGINE   = 0.94
-ALT_MIN_FT_FOR_ENGINE = 0.0
-ALT_MAX_FT_FOR_ENGINE = 14000.0
+# Engine query envelope: MACH_/ALT_*_FOR_ENGINE (imported from segments)
 
 # (2) Strategy profiles (chosen BEFORE running the integrator) -------------------------
 class StrategyProfiles:
     """
     Strategy functions return raw weights (cw, sw).
     The integrator normalizes them so w_c + w_s = 1 and applies the specific energy magnitude.
+    All of them also accept altitude / velocity arrays (strategy_for flags them
+    `_vectorized` for simulate_climb_batch).
     """
     class FixedEnergy:
         class Linear:
             @staticmethod
             def profile(altitude, velocity, altitude_fraction):
-                af = float(np.clip(altitude_fraction, 0.0, 1.0))
+                af = min(max(float(altitude_fraction), 0.0), 1.0)
                 cw = af
                 sw = 1.0 - af
                 return cw, sw
@@ -49,28 +59,28 @@ class StrategyProfiles:
         class Exponential:
             @staticmethod
             def increasing_climb(altitude, velocity, altitude_fraction):
-                af = float(np.clip(altitude_fraction, 0.0, 1.0))
+                af = min(max(float(altitude_fraction), 0.0), 1.0)
                 cw = af * np.exp(altitude / target_altitude)
                 sw = (1.0 - af) * np.exp(-altitude / target_altitude)
                 return cw, sw
 
             @staticmethod
             def decreasing_climb(altitude, velocity, altitude_fraction):
-                af = float(np.clip(altitude_fraction, 0.0, 1.0))
+                af = min(max(float(altitude_fraction), 0.0), 1.0)
                 cw = af * np.exp(-altitude / target_altitude)
                 sw = (1.0 - af) * np.exp(altitude / target_altitude)
                 return cw, sw
 
             @staticmethod
             def increasing_speed(altitude, velocity, altitude_fraction):
-                af = float(np.clip(altitude_fraction, 0.0, 1.0))
+                af = min(max(float(altitude_fraction), 0.0), 1.0)
                 sw = af * np.exp(altitude / target_altitude)
                 cw = (1.0 - af) * np.exp(-altitude / target_altitude)
                 return cw, sw
 
             @staticmethod
             def decreasing_speed(altitude, velocity, altitude_fraction):
-                af = float(np.clip(altitude_fraction, 0.0, 1.0))
+                af = min(max(float(altitude_fraction), 0.0), 1.0)
                 sw = af * np.exp(-altitude / target_altitude)
                 cw = (1.0 - af) * np.exp(altitude / target_altitude)
                 return cw, sw
@@ -90,51 +100,74 @@ class StrategyProfiles:
                 cw, sw = 1.0, 0.0
                 return cw, sw
             _const_mach._const_mach = True
+            _const_mach._vectorized = True
             return _const_mach
 
 
+PROFILES = (
+    "linear",
+    "exponential_increasing_climb",
+    "exponential_decreasing_climb",
+    "exponential_increasing_speed",
+    "exponential_decreasing_speed",
+    "constant_speed",
+    "constant_mach",
+)
+
+
+def strategy_for(profile, altitude_fraction=None, shape=1.0):
+    """
+    Strategy function for one profile and altitude fraction (ignored by the constant-rate
+    profiles). Returns None for an unknown profile. Lets worker processes rebuild a
+    strategy from plain (profile, af) parameters instead of pickling closures.
+
+    `shape` scales the exponent of the exponential profiles (exp(±shape·h/h_target);
+    1 is the profile as defined above); the other profiles ignore it.
+    The returned function is flagged `_vectorized` (array altitude / velocity in).
+    """
+    if profile == 'linear':
+        func = StrategyProfiles.FixedEnergy.Linear.profile
+    elif profile == 'exponential_increasing_climb':
+        func = StrategyProfiles.FixedEnergy.Exponential.increasing_climb
+    elif profile == 'exponential_decreasing_climb':
+        func = StrategyProfiles.FixedEnergy.Exponential.decreasing_climb
+    elif profile == 'exponential_increasing_speed':
+        func = StrategyProfiles.FixedEnergy.Exponential.increasing_speed
+    elif profile == 'exponential_decreasing_speed':
+        func = StrategyProfiles.FixedEnergy.Exponential.decreasing_speed
+    elif profile == 'constant_speed':
+        func = StrategyProfiles.ConstantRates.constant_speed
+    elif profile == 'constant_mach':
+        return StrategyProfiles.ConstantRates.constant_mach()
+    else:
+        return None
+    if shape != 1.0 and profile.startswith("exponential"):
+        strategy = lambda h, V, af=altitude_fraction, f=func, k=float(shape): f(k * h, V, af)
+    else:
+        strategy = lambda h, V, af=altitude_fraction, f=func: f(h, V, af)
+    strategy._vectorized = True
+    return strategy
+
+
 def generate_strategy(profile='linear'):
     """
     Build a list of (altitude_fraction, strategy_function) pairs for the requested profile.
     For 'constant_speed' and 'constant_mach', altitude_fraction is None.
     """
-    strategies = []
-    for af in altitude_fractions:
-        if profile == 'linear':
-            func = StrategyProfiles.FixedEnergy.Linear.profile
-        elif profile == 'exponential_increasing_climb':
-            func = StrategyProfiles.FixedEnergy.Exponential.increasing_climb
-        elif profile == 'exponential_decreasing_climb':
-            func = StrategyProfiles.FixedEnergy.Exponential.decreasing_climb
-        elif profile == 'exponential_increasing_speed':
-            func = StrategyProfiles.FixedEnergy.Exponential.increasing_speed
-        elif profile == 'exponential_decreasing_speed':
-            func = StrategyProfiles.FixedEnergy.Exponential.decreasing_speed
-        else:
-            continue
-        
-        strategies.append((af, lambda h, V, af=af, f=func: f(h, V, af)))
-
-    if profile == 'constant_speed':
-        strategies.append((None, StrategyProfiles.ConstantRates.constant_speed))
-    elif profile == 'constant_mach':
-        strategies.append((None, StrategyProfiles.ConstantRates.constant_mach()))
-
-    return strategies
+    if profile in ('constant_speed', 'constant_mach'):
+        return [(None, strategy_for(profile))]
+    if strategy_for(profile) is None:
+        return []
+    return [(af, strategy_for(profile, af)) for af in altitude_fractions]
 
 
 # (3) Aerodynamics (used inside the integrator) ---------------------------------
-def compute_drag(rho, V, S, CD):
-    """D = 0.5 * rho * V^2 * S * CD  [N]"""
-    return 0.5 * rho * V**2 * S * CD
-
-def compute_CD(CL, AR, e, CD0):
-    """CD = CD0 + CL^2 / (pi * AR * e)"""
-    return CD0 + (CL**2) / (np.pi * AR * e)
+# compute_drag / compute_CD live in segments (shared with cruise and descent)
 
 # (4) Lever solver (FADEC-like) --------------------------------------------------------
 def find_lever_for_thrust(required_thrust_total, mach, altitude_ft,
-                          lever_grid=None, allow_refine=True):
+                          lever_grid=None, allow_refine=True, engine=None, solver=None,
+                          cache=None):
     """
     Simple FADEC-like lever solver:
       1) sample thrust at a lever grid (0..1)
@@ -142,76 +175,148 @@ def find_lever_for_thrust(required_thrust_total, mach, altitude_ft,
       3) linear interpolate in the bracketing interval
       4) optional single refine call at the interpolated lever
 
+    `engine` defaults to the module-level `eng` (the STUB engine); an EngineSurrogate can be passed instead.
+    With `solver` (a lever_solver.InverseLeverSolver) the grid sampling is skipped and the
+    lever comes from the precomputed monotone thrust surface.
+    With `cache` (a lever_cache.LeverCache for this engine) solutions are memoized on the
+    quantized (mach, altitude_ft, per-engine thrust), and the engine calls of the default
+    grid scan on the quantized (mach, altitude_ft).
+    The algorithm itself is segments.solve_lever (per-engine thrust in).
+
     Returns: (lever, per_engine_thrust, thrust_limited_flag)
     """
-    thrust_limited = False
-    T_req = float(required_thrust_total) / float(N_ENGINES)
-
-    
-    if lever_grid is None:
-        lever_grid = np.linspace(0.0, 1.0, 21)
-
-    def safe_thrust(lv):
-        try:
-            Tv = eng.get_thrust_with_lever_position(float(lv), float(mach), float(altitude_ft))
-            if not np.isfinite(Tv) or Tv < 0:
-                return None
-            return float(Tv)
-        except Exception:
-            return None
-
-    thrusts = [safe_thrust(lv) for lv in lever_grid]
-    valid_idx = [i for i, Tv in enumerate(thrusts) if Tv is not None]
-
-    if not valid_idx:
-        return None, None, thrust_limited
-
-    
-    for i in range(1, len(lever_grid)):
-        if (thrusts[i] is not None) and (thrusts[i-1] is not None) and (thrusts[i] < thrusts[i-1]):
-            thrusts[i] = thrusts[i-1]
-
-    T0 = thrusts[0]
-    T1 = thrusts[-1]
-
-    # Idle meets demand
-    if (T0 is not None) and (T0 >= T_req):
-        return 0.0, T0, thrust_limited
-
-    # Max insufficient -> clamp (thrust-limited)
-    if (T1 is None) or (T1 < T_req):
-        if T1 is None:
-            return None, None, thrust_limited
-        thrust_limited = True
-        return 1.0, T1, thrust_limited
-
-    # Search for bracket and interpolate
-    for i in range(len(lever_grid) - 1):
-        Ti   = thrusts[i]
-        Tip1 = thrusts[i + 1]
-        if (Ti is None) or (Tip1 is None):
-            continue
-        if (Ti <= T_req) and (T_req <= Tip1) and (Tip1 > Ti):
-            li, lj = lever_grid[i], lever_grid[i + 1]
-            lv = li + (T_req - Ti) * (lj - li) / (Tip1 - Ti)
-            if allow_refine:
-                Tstar = safe_thrust(lv)
-                if Tstar is not None:
-                    return float(lv), float(Tstar), thrust_limited
-            # fallback to closer endpoint if refine failed
-            if (T_req - Ti) <= (Tip1 - T_req):
-                return float(li), float(Ti), thrust_limited
-            else:
-                return float(lj), float(Tip1), thrust_limited
-
-    # Fallback: closest valid grid point
-    diffs = [(abs(thrusts[i] - T_req), lever_grid[i], thrusts[i]) for i in valid_idx]
-    diffs.sort(key=lambda x: x[0])
-    _, lv_best, Tv_best = diffs[0]
-    return float(lv_best), float(Tv_best), thrust_limited
+    if engine is None:
+        engine = get_engine(STUB)
+    return solve_lever(float(required_thrust_total) / float(N_ENGINES), mach, altitude_ft,
+                       engine, lever_grid=lever_grid, allow_refine=allow_refine,
+                       solver=solver, cache=cache)
 
 # (5) Main integrator (the core of the "run") -----------------------------------------
-def simulate_climb_path(strategy_function, altitude_fraction_input, dt=1.0):
+def climb_context(engine=None, lever_solver=None, lever_cache=None, atmosphere=None):
+    """
+    segments.SegmentContext from this module's aircraft constants (read at call time)
+    and `engine` (default `eng`); `atmosphere` defaults to ISA.
+    """
+    return SegmentContext(get_engine(STUB) if engine is None else engine, S_ref=S_ref, CD0=CD0, AR=AR, e=e,
+                          n_engines=N_ENGINES, lever_solver=lever_solver,
+                          lever_cache=lever_cache, atmosphere=atmosphere)
+
+
+def _with_profiler(ctx, profiler):
+    """`ctx` reporting to `profiler` (True: a new profiler.Profiler); unchanged if None."""
+    if profiler is None or profiler is False:
+        return ctx
+    if profiler is True:
+        from profiler import Profiler
+        profiler = Profiler()
+    return ctx if ctx.profiler is profiler else profiler.attach(ctx)
+
+
+def _add_profile(diagnostics, ctx):
+    if ctx.profiler is not None:
+        diagnostics["profiler"] = ctx.profiler
+        diagnostics["profile"] = ctx.profiler.summary()
+
+
+def _with_atmosphere(ctx, atmosphere):
+    return ctx if atmosphere is None else replace(ctx, atmosphere=atmosphere)
+
+
+def _add_ground_distance(final_results, traj, atmosphere):
+    ground_distance(traj, 0.0, atmosphere)
+    final_results["Ground Distance (m)"] = float(traj.x[-1]) if len(traj) else 0.0
+
+
+def _add_emissions(final_results, diagnostics, emissions, engine, atmosphere=None):
+    """Emission totals/steps (emissions.add_emissions) where `emissions` is set."""
+    if emissions is None or emissions is False:
+        return
+    from emissions import add_emissions, emission_model
+    add_emissions(final_results, diagnostics, emission_model(emissions, engine), atmosphere)
+
+
+def _expected_steps(h0, h_target, E_DOT_cmd, dt):
+    # dh/dt <= E_DOT_cmd, so this is a lower bound; twice that covers the usual splits
+    return int(min(2.0 * max(h_target - h0, 0.0) / max(E_DOT_cmd * dt, 1e-9), 1e6)) + 16
+
+
+def _energy_shares(cw, sw):
+    """Strategy weights → normalized shares (w_c + w_s = 1); scalars or arrays."""
+    s = _floor(cw + sw, 1e-12)
+    return cw / s, sw / s
+
+
+def _climb_rates(w_c, w_s, E_DOT_cmd, velocity, g, T=None, a=None, T_above=None):
+    """
+    Commanded specific energy (global magnitude; strategies only split it) → (dh_dt, dv_dt).
+    With `T_above` (the temperature 1 m higher) the speed instead follows the local speed
+    of sound `a` at temperature `T` (constant-Mach strategies). Scalars or arrays.
+    """
+    dh_dt = w_c * E_DOT_cmd
+    if T_above is None:
+        return dh_dt, (g / _floor(velocity, 1e-9)) * (w_s * E_DOT_cmd)
+    dTdh = (T_above - T) / _DTDH_STEP
+    dadh = 0.5 * a / _floor(T, 1e-9) * dTdh
+    return dh_dt, (velocity / _floor(a, 1e-9)) * dadh * dh_dt
+
+
+_DTDH_STEP = 1.0  # [m] finite-difference step of dT/dh for constant-Mach climbs
+
+
+def _climb_rhs(strategy_function, altitude_fraction_input, altitude, velocity, mass_kg,
+               E_DOT_cmd, ctx):
+    """
+    Right-hand side of the climb equations at one state (shared by all integrators).
+    `ctx` (a segments.SegmentContext) supplies the engine, lever solver and aircraft.
+
+    Returns (dh_dt, dv_dt, fuel_flow_kg_s_total, lever, thrust_limited, mach, alt_ft).
+    Where the lever solver fails, lever is None and the fuel flow NaN.
+    """
+    prof = ctx.profiler
+    if prof is not None:
+        prof.start()
+
+    # (1) Strategy → normalized shares (w_c + w_s = 1)
+    w_c, w_s = _energy_shares(*strategy_function(altitude, velocity, altitude_fraction_input))
+    if prof is not None:
+        prof.lap("rhs;strategy")
+
+    # (2) Atmosphere, weight and engine-query-safe state
+    T, P, rho, a, mach, g, alt_ft, mach_eng, alt_ft_eng = flight_condition(
+        altitude, velocity, ctx.atmosphere)
+    W = mass_kg * g
+    if prof is not None:
+        prof.lap("rhs;atmosphere")
+
+    # (3) Aerodynamics
+    D, CL_dyn, CD = drag_force(ctx, rho, velocity, W)
+    if prof is not None:
+        prof.lap("rhs;drag")
+
+    # (4) Commanded specific energy (global magnitude; strategies only split it)
+    if getattr(strategy_function, "_const_mach", False):
+        T_above, _, _ = ctx.atmosphere.calculate_atmospheric_properties_m(altitude + _DTDH_STEP)
+        dh_dt, dv_dt = _climb_rates(w_c, w_s, E_DOT_cmd, velocity, g, T, a, T_above)
+    else:
+        dh_dt, dv_dt = _climb_rates(w_c, w_s, E_DOT_cmd, velocity, g)
+
+    # (5) Power balance : total aircraft required thrust
+    F_required_total = required_thrust(D, W, velocity, g, dh_dt, dv_dt)
+    if prof is not None:
+        prof.lap("rhs;kinematics")
+
+    # (6) Lever selection (FADEC-like solver; includes idle/max logic) and fuel flow
+    #     (one stateless engine query at the selected lever; timed as rhs;lever / rhs;fuel_flow)
+    lv, thrust_limited, fuel_flow_kg_s_total = thrust_setting(
+        ctx, F_required_total, mach_eng, alt_ft_eng)
+    return dh_dt, dv_dt, fuel_flow_kg_s_total, lv, thrust_limited, mach, alt_ft
+
+
+def simulate_climb_path(strategy_function, altitude_fraction_input, dt=1.0, engine=None,
+                        lever_solver=None, initial_mass=None, E_DOT_cmd=None, method="euler",
+                        rtol=1e-6, atol=None, lever_cache=None, initial_altitude_m=None,
+                        initial_speed_mps=None, target_altitude_m=None, ctx=None,
+                        profiler=None, emissions=None, atmosphere=None):
     """
     Integrate climb using a specific-energy split:
       - Strategy provides (cw, sw) → normalized to (w_c, w_s).
@@ -221,143 +326,580 @@ def simulate_climb_path(strategy_function, altitude_fraction_input, dt=1.0):
           dv/dt = (g / V) * (w_s * E_DOT_cmd)  (or const-Mach variant)
       - Power balance:
           F_req = D + (W * E_DOT) / V
-    """
-    gamma, R = 1.4, 287.05  # for a = sqrt(gamma * R * T)
 
-    # Histories
-    h, V, t = [initial_altitude], [initial_speed], [0.0]
-    mass_kg = initial_mass_kg
-    lever_positions = []
-    none_lever_times = []
-    limit_times = []
-
-    # Fuel diagnostics
-    fuel_flow_kg_s_hist = []  # total (all engines)
-    fuel_burn_step_kg   = []
-    mass_kg_hist        = [mass_kg]
+    `engine` defaults to the module-level `eng`. Passing an EngineSurrogate (see
+    engine_surrogate.build_surrogate) replaces every native call with a table lookup.
+    `lever_solver` is forwarded to find_lever_for_thrust as its `solver`.
+    `initial_mass` and `E_DOT_cmd` default to initial_mass_kg and E_DOT_CMD.
+    `method="rk45"` switches to simulate_climb_adaptive (dt is then the initial step,
+    rtol/atol its error tolerances); the default is fixed-step explicit Euler.
+    `lever_cache` (a lever_cache.LeverCache) is forwarded to find_lever_for_thrust.
+    `initial_altitude_m`, `initial_speed_mps` and `target_altitude_m` default to
+    initial_altitude, initial_speed and target_altitude (see run_climb_segment).
+    `ctx` (a segments.SegmentContext, e.g. from aircraft_config.AircraftConfig) replaces
+    engine, lever_solver, lever_cache and this module's aircraft constants; by default
+    one is built from those (climb_context).
+    `profiler` (a profiler.Profiler, or True for a new one; default: ctx.profiler, else
+    off) times the integrator phases and counts engine calls and lever-solver paths;
+    diagnostics then holds its summary() under 'profile' and the object under 'profiler'.
+    `emissions` (an emissions.EmissionModel, or True for one on the engine's stub;
+    default off) adds CO2 / H2O / NOx totals to final_results and the per-step values
+    to diagnostics['emissions'], computed from the trajectory after the run.
+    `atmosphere` (e.g. an atmosphere.OffDesignAtmosphere for ΔISA / winds) replaces
+    ctx.atmosphere (default ISA). The trajectory's x column holds the ground distance
+    (ground speed sqrt(V^2 - (dh/dt)^2) + wind), its end value also final_results
+    'Ground Distance (m)'.
+    """
+    if method == "rk45":
+        return simulate_climb_adaptive(strategy_function, altitude_fraction_input, dt_initial=dt,
+                                       engine=engine, lever_solver=lever_solver,
+                                       initial_mass=initial_mass, E_DOT_cmd=E_DOT_cmd,
+                                       rtol=rtol, atol=atol, lever_cache=lever_cache,
+                                       initial_altitude_m=initial_altitude_m,
+                                       initial_speed_mps=initial_speed_mps,
+                                       target_altitude_m=target_altitude_m, ctx=ctx,
+                                       profiler=profiler, emissions=emissions,
+                                       atmosphere=atmosphere)
+    if method != "euler":
+        raise ValueError(f"Unknown integration method {method!r} (use 'euler' or 'rk45')")
+    if ctx is None:
+        ctx = climb_context(engine, lever_solver, lever_cache)
+    ctx = _with_profiler(_with_atmosphere(ctx, atmosphere), profiler)
+    prof = ctx.profiler
+    m0 = initial_mass_kg if initial_mass is None else float(initial_mass)
+    if E_DOT_cmd is None:
+        E_DOT_cmd = E_DOT_CMD
+    h0 = initial_altitude if initial_altitude_m is None else float(initial_altitude_m)
+    V0 = initial_speed if initial_speed_mps is None else float(initial_speed_mps)
+    h_target = target_altitude if target_altitude_m is None else float(target_altitude_m)
+
+    # History (one Trajectory row per step, preallocated)
+    traj = Trajectory(capacity=_expected_steps(h0, h_target, E_DOT_cmd, dt))
+    altitude, velocity, time_s = h0, V0, 0.0
+    mass_kg = m0
+    lv = None
 
     # March until target altitude
-    while h[-1] < target_altitude:
-        altitude, velocity, time_s = h[-1], V[-1], t[-1]
+    while altitude < h_target:
+        dh_dt, dv_dt, fuel_flow_kg_s_total, lv, thrust_limited, mach, alt_ft = _climb_rhs(
+            strategy_function, altitude_fraction_input, altitude, velocity, mass_kg,
+            E_DOT_cmd, ctx)
 
-        # Weight
-        g = atm.get_gravity(altitude)
-        W = mass_kg * g
-
-        # (1) Strategy → normalized shares (w_c + w_s = 1)
-        cw, sw = strategy_function(altitude, velocity, altitude_fraction_input)
-        s = max(cw + sw, 1e-12)
-        w_c = cw / s
-        w_s = sw / s
-
-        # (2) Atmosphere
-        T, P, rho = atm.calculate_atmospheric_properties(altitude)
-        a    = np.sqrt(gamma * R * T)
-        mach = velocity / max(a, 1e-9)
-        alt_ft = altitude * 3.28084
-
-        # Engine-query-safe state
-        mach_eng   = float(np.clip(mach,   MACH_MIN_FOR_ENGINE, MACH_MAX_FOR_ENGINE))
-        alt_ft_eng = float(np.clip(alt_ft, ALT_MIN_FT_FOR_ENGINE, ALT_MAX_FT_FOR_ENGINE))
-
-        # (3) Aerodynamics
-        CL_dyn = (2 * W) / (max(rho, 1e-12) * max(velocity, 1e-6)**2 * S_ref)
-        CD = compute_CD(CL_dyn, AR, e, CD0)
-        D  = compute_drag(rho, velocity, S_ref, CD)
-
-        # (4) Commanded specific energy (global magnitude; strategies only split it)
-        E_DOT_cmd = 6.5  # [m/s]
- 
-        if getattr(strategy_function, "_const_mach", False):
-            eps = 1.0
-            T2, _, _ = atm.calculate_atmospheric_properties(altitude + eps)
-            dTdh = (T2 - T) / eps
-            dadh = 0.5 * a / max(T, 1e-9) * dTdh
-
-            dh_dt = w_c * E_DOT_cmd
-            dv_dt = (velocity / max(a, 1e-9)) * dadh * dh_dt
-        else:
-            dh_dt = w_c * E_DOT_cmd
-            dv_dt = (g / max(velocity, 1e-9)) * (w_s * E_DOT_cmd)
-
-        # (5) Power balance : total aircraft required thrust
-        E_DOT = dh_dt + (velocity / g) * dv_dt
-        F_required_total = D + (E_DOT * W) / max(velocity, 1e-9)
-
-        # (6) Lever selection (FADEC-like solver; includes idle/max logic)
-        lv, real_thrust_per_engine, thrust_limited = find_lever_for_thrust(
-            F_required_total, mach_eng, alt_ft_eng, lever_grid=None, allow_refine=True
-        )
-
-        lever_positions.append(lv)
-
-        if lv is None or real_thrust_per_engine is None:
+        if lv is None:
             print(f"[WARNING] No valid lever at h={altitude:.1f} m, V={velocity:.1f} m/s "
                   f"(M={mach:.2f}, Alt={alt_ft:.0f} ft)")
-            none_lever_times.append(time_s)
+            burned_kg = 0.0
         else:
-            if thrust_limited:
-                limit_times.append(time_s)
-            # align engine state to selected lever for TSFC
-            real_thrust_per_engine = eng.get_thrust_with_lever_position(float(lv), mach_eng, alt_ft_eng)
-
-        # (7) Fuel burn 
-        if lv is not None and real_thrust_per_engine is not None:
-            tsfc = eng.get_tsfc()  # per engine at current state
-            if tsfc > 1e-3:        
-                tsfc /= 3600.0
-            fuel_flow_kg_s_per_engine = max(tsfc, 0.0) * max(real_thrust_per_engine, 0.0)
-            fuel_flow_kg_s_total = fuel_flow_kg_s_per_engine * N_ENGINES
             burned_kg = fuel_flow_kg_s_total * dt
-            mass_kg = max(mass_kg - burned_kg, 0.0)
-        else:
-            fuel_flow_kg_s_total = np.nan
-            burned_kg = 0.0
-
-        fuel_flow_kg_s_hist.append(fuel_flow_kg_s_total)
-        fuel_burn_step_kg.append(burned_kg)
-        mass_kg_hist.append(mass_kg)
+        traj.append_step(time_s, altitude, velocity, np.nan, mass_kg, lv, thrust_limited,
+                         fuel_flow_kg_s_total, burned_kg)
+        mass_kg = max(mass_kg - burned_kg, 0.0)
+        if prof is not None:
+            prof.lap("record")
 
         # (8) Integrate state
         h_new = altitude + dh_dt * dt
         V_new = velocity + dv_dt * dt
+        if prof is not None:
+            prof.lap("integrate")
+            prof.step()
 
         # Terminal condition with partial step
-        if h_new >= target_altitude:
-            h_new = target_altitude
-            dt_last = (target_altitude - altitude) / max(dh_dt, 1e-9)
-            t_new = time_s + dt_last
-            V_new = velocity + dv_dt * dt_last
-            t.append(t_new); h.append(h_new); V.append(V_new)
+        if h_new >= h_target:
+            h_new = h_target
+            dt_last = (h_target - altitude) / max(dh_dt, 1e-9)
+            altitude, velocity, time_s = h_new, velocity + dv_dt * dt_last, time_s + dt_last
             break
 
-        h.append(h_new); V.append(V_new); t.append(time_s + dt)
+        altitude, velocity, time_s = h_new, V_new, time_s + dt
+    traj.append_point(time_s, altitude, velocity, np.nan, mass_kg)
 
     # Final summary & diagnostics bundle
+    final_results = {
+        "Final Altitude": altitude,
+        "Final Velocity": velocity,
+        "Total Climb Time": time_s,
+        "Final Lever Position": lv if len(traj) > 1 else None,
+        "Final Mass (kg)": mass_kg,
+        "Total Fuel Burned (kg)": m0 - mass_kg,
+        "Engines": ctx.n_engines,
+    }
+
+    _add_ground_distance(final_results, traj, ctx.atmosphere)
+    diagnostics = traj.diagnostics()
+    diagnostics["trajectory"] = traj
+    _add_profile(diagnostics, ctx)
+    _add_emissions(final_results, diagnostics, emissions, ctx.engine, ctx.atmosphere)
+    t, h, V = diagnostics["times"], diagnostics["altitudes"], diagnostics["velocities"]
+    lever_positions = diagnostics["lever_positions"]
+
+    return t, h, V, lever_positions, final_results, diagnostics
+
+# (5a) Adaptive integrator (Dormand–Prince RK45 with events) --------------------------
+_DP_C = (0.0, 1/5, 3/10, 4/5, 8/9, 1.0, 1.0)
+_DP_A = (
+    (),
+    (1/5,),
+    (3/40, 9/40),
+    (44/45, -56/15, 32/9),
+    (19372/6561, -25360/2187, 64448/6561, -212/729),
+    (9017/3168, -355/33, 46732/5247, 49/176, -5103/18656),
+    (35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84),
+)
+_DP_B5 = np.array(_DP_A[6] + (0.0,))
+_DP_B4 = np.array((5179/57600, 0.0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40))
+_DP_E = _DP_B5 - _DP_B4
+
+ATOL_DEFAULT = (0.01, 1e-3, 1e-3)  # [m, m/s, kg] absolute tolerances on (h, V, mass)
+
+
+def simulate_climb_adaptive(strategy_function, altitude_fraction_input, dt_initial=1.0,
+                            engine=None, lever_solver=None, initial_mass=None, E_DOT_cmd=None,
+                            rtol=1e-6, atol=None, dt_max=120.0, event_tol=1e-3, max_steps=100000,
+                            lever_cache=None, initial_altitude_m=None, initial_speed_mps=None,
+                            target_altitude_m=None, ctx=None, profiler=None, emissions=None,
+                            atmosphere=None):
+    """
+    Same climb as simulate_climb_path, integrated with adaptive Dormand–Prince RK45.
+
+    The state (h, V, mass) is advanced with embedded 4th/5th-order error control
+    (`rtol`, `atol` per component). Events are located by bisection on the cubic Hermite
+    interpolant of each accepted step, down to `event_tol` seconds, and the step is cut
+    there so the integrator restarts exactly at the discontinuity:
+      - 'target_altitude'      h reaches target_altitude (terminal)
+      - 'thrust_limit_enter' / 'thrust_limit_leave'
+      - 'lever_failure' / 'lever_recovered'   lever solver (in)validity
+
+    `engine`, `lever_solver`, `lever_cache`, `initial_mass`, `E_DOT_cmd`, `ctx`,
+    `profiler`, `emissions`, `atmosphere` and the initial/target state overrides are as
+    in simulate_climb_path
+    (the profile covers the right-hand-side phases; one profiler step per accepted step).
+
+    Returns the same tuple and diagnostics keys as simulate_climb_path, one entry per
+    accepted step. diagnostics additionally holds 'events' [(time, name)] and 'n_rhs'
+    (right-hand-side evaluations).
+    """
+    if ctx is None:
+        ctx = climb_context(engine, lever_solver, lever_cache)
+    ctx = _with_profiler(_with_atmosphere(ctx, atmosphere), profiler)
+    m0 = initial_mass_kg if initial_mass is None else float(initial_mass)
+    if E_DOT_cmd is None:
+        E_DOT_cmd = E_DOT_CMD
+    h0 = float(initial_altitude if initial_altitude_m is None else initial_altitude_m)
+    V0 = float(initial_speed if initial_speed_mps is None else initial_speed_mps)
+    h_target = target_altitude if target_altitude_m is None else float(target_altitude_m)
+    atol = np.asarray(ATOL_DEFAULT if atol is None else atol, dtype=float)
+    n_rhs = 0
+
+    def rhs(y):
+        nonlocal n_rhs
+        n_rhs += 1
+        dh_dt, dv_dt, ff, lv, limited, mach, alt_ft = _climb_rhs(
+            strategy_function, altitude_fraction_input, y[0], y[1], y[2],
+            E_DOT_cmd, ctx)
+        dm_dt = 0.0 if lv is None else -ff
+        return np.array([dh_dt, dv_dt, dm_dt]), (lv, limited, ff, mach, alt_ft)
+
+    def rk_step(y, f0, step):
+        k = [f0]
+        for i in range(1, 7):
+            yi = y + step * sum(a * kj for a, kj in zip(_DP_A[i], k))
+            fi, aux = rhs(yi)
+            k.append(fi)
+        y_new = y + step * sum(b * kj for b, kj in zip(_DP_B5[:6], k[:6]))
+        err = step * sum(c * kj for c, kj in zip(_DP_E, k))
+        return y_new, k[6], aux, err  # FSAL: k[6] = f(y_new)
+
+    def hermite(y0, f0, y1, f1, step, theta):
+        t2, t3 = theta * theta, theta * theta * theta
+        return ((2 * t3 - 3 * t2 + 1) * y0 + (t3 - 2 * t2 + theta) * step * f0
+                + (-2 * t3 + 3 * t2) * y1 + (t3 - t2) * step * f1)
+
+    def regime(aux):
+        return (aux[0] is not None, bool(aux[1]))
+
+    # History (one Trajectory row per accepted step)
+    traj = Trajectory(capacity=256)
+    events = []
+
+    y = np.array([h0, V0, m0])
+    f, aux = rhs(y)
+    time_s = 0.0
+    step = float(dt_initial)
+
+    for _ in range(max_steps):
+        if y[0] >= h_target:
+            break
+        step = min(step, dt_max)
+        y_new, f_new, aux_new, err = rk_step(y, f, step)
+        scale = atol + rtol * np.maximum(np.abs(y), np.abs(y_new))
+        err_norm = float(np.sqrt(np.mean((err / scale) ** 2)))
+        if not np.isfinite(err_norm) or err_norm > 1.0:
+            factor = 0.2 if not np.isfinite(err_norm) else max(0.2, 0.9 * err_norm ** -0.2)
+            step *= factor
+            if step > 1e-6:
+                continue
+            err_norm = 0.0  # cannot shrink further: take the step as is
+
+        # Events inside the accepted step: cut the step at the earliest one
+        cut, names = None, []
+        if y_new[0] >= h_target:
+            lo, hi = 0.0, 1.0
+            while (hi - lo) * step > event_tol:
+                mid = 0.5 * (lo + hi)
+                if hermite(y, f, y_new, f_new, step, mid)[0] >= h_target:
+                    hi = mid
+                else:
+                    lo = mid
+            cut, names = hi, ["target_altitude"]
+        if regime(aux_new) != regime(aux):
+            lo, hi = 0.0, 1.0 if cut is None else cut
+            start = regime(aux)
+            while (hi - lo) * step > event_tol:
+                mid = 0.5 * (lo + hi)
+                _, aux_mid = rhs(hermite(y, f, y_new, f_new, step, mid))
+                if regime(aux_mid) == start:
+                    lo = mid
+                else:
+                    hi = mid
+            if cut is None or hi < cut:
+                cut, names = hi, []
+        if cut is not None and cut < 1.0:
+            step_taken = cut * step
+            y_new, f_new, aux_new, _ = rk_step(y, f, step_taken)
+        else:
+            step_taken = step
+        # regime events from the states actually reached (a cut may land just short)
+        (v0, l0), (v1, l1) = regime(aux), regime(aux_new)
+        if v0 != v1:
+            names.append("lever_recovered" if v1 else "lever_failure")
+        if v1 and l0 != l1:
+            names.append("thrust_limit_enter" if l1 else "thrust_limit_leave")
+
+        # Record the accepted step (lever/fuel flow at its start, like the Euler loop)
+        lv, limited, ff = aux[0], aux[1], aux[2]
+        if lv is None:
+            print(f"[WARNING] No valid lever at h={y[0]:.1f} m, V={y[1]:.1f} m/s "
+                  f"(M={aux[3]:.2f}, Alt={aux[4]:.0f} ft)")
+        traj.append_step(time_s, y[0], y[1], np.nan, y[2], lv, limited, ff, y[2] - y_new[2])
+        if ctx.profiler is not None:
+            ctx.profiler.step()
+
+        time_s += step_taken
+        for name in names:
+            events.append((time_s, name))
+        if "target_altitude" in names:
+            y_new[0] = h_target
+        y, f, aux = y_new, f_new, aux_new
+
+        # Next step size from the error estimate of the full step
+        step = step * min(5.0, max(0.2, 0.9 * max(err_norm, 1e-10) ** -0.2))
+    else:
+        print(f"[WARNING] Adaptive climb stopped after {max_steps} steps below target altitude")
+
+    mass_kg = float(y[2])
+    traj.append_point(time_s, y[0], y[1], np.nan, mass_kg)
+    diagnostics = traj.diagnostics()
+    diagnostics.update(trajectory=traj, events=events, n_rhs=n_rhs)
+    _add_profile(diagnostics, ctx)
+    t, h, V = diagnostics["times"], diagnostics["altitudes"], diagnostics["velocities"]
+    lever_positions = diagnostics["lever_positions"]
+
     final_results = {
         "Final Altitude": h[-1],
         "Final Velocity": V[-1],
         "Total Climb Time": t[-1],
         "Final Lever Position": lever_positions[-1] if lever_positions else None,
         "Final Mass (kg)": mass_kg,
-        "Total Fuel Burned (kg)": initial_mass_kg - mass_kg,
-        "Engines": N_ENGINES,
-    }
-
-    diagnostics = {
-        "altitudes": h,
-        "velocities": V,
-        "times": t,
-        "lever_positions": lever_positions,
-        "none_lever_times": none_lever_times,
-        "limit_times": limit_times,
-        "fuel_flow_kg_s": fuel_flow_kg_s_hist,    # total (all engines)
-        "fuel_burn_step_kg": fuel_burn_step_kg,
-        "mass_kg": mass_kg_hist[:-1],
+        "Total Fuel Burned (kg)": m0 - mass_kg,
+        "Engines": ctx.n_engines,
     }
+    _add_ground_distance(final_results, traj, ctx.atmosphere)
+    diagnostics["distances"] = traj.x.tolist()
+    _add_emissions(final_results, diagnostics, emissions, ctx.engine, ctx.atmosphere)
 
     return t, h, V, lever_positions, final_results, diagnostics
 
+# (5b) Batched integrator (all strategies advanced in lockstep) ----------------------
+BATCH_TAIL = 8  # active trajectories below which simulate_climb_batch goes one by one
+
+
+def simulate_climb_batch(strategies, dt=1.0, engine=None, lever_solver=None,
+                         initial_mass=None, E_DOT_cmd=None, lever_cache=None, emissions=None,
+                         atmosphere=None, CD0_values=None, e_values=None, thrust_factor=None,
+                         tsfc_factor=None, ctx=None, tail=BATCH_TAIL):
+    """
+    Integrate several climbs in lockstep with the same physics as simulate_climb_path.
+
+    `strategies` is a list of (altitude_fraction, strategy_function) pairs, e.g. the
+    concatenated output of generate_strategy for several profiles. The state (h, V, mass, t)
+    of all trajectories lives in NumPy arrays; atmosphere, drag and power balance are
+    evaluated once per step for every trajectory still below target_altitude, and
+    trajectories drop out of the active set as they reach it (with the same partial final
+    step). With a `lever_solver` the lever selection is vectorized too; otherwise each
+    active trajectory calls segments.solve_lever (memoized through `lever_cache` if given).
+
+    The physics is the scalar integrator's own (segments.flight_condition / drag_force /
+    required_thrust and _climb_rates on arrays), so results match simulate_climb_path
+    bit for bit. Every batched step carries a fixed array overhead of roughly six scalar
+    steps (the lever solve and the engine query dominate), so lockstep only pays while
+    more trajectories than that are active: an ensemble of one strategy runs >10x faster
+    than one by one, while a profile sweep is bounded by its longest climbs (two of the
+    27 default strategies take 30x the steps of the shortest). Once no more than `tail`
+    trajectories are left they therefore finish one by one on simulate_climb_path from
+    their current state. `tail=0` keeps everything batched; trajectories with a
+    deteriorated engine (below) always stay batched.
+
+    `initial_mass` and `E_DOT_cmd` may be scalars or per-trajectory arrays, and so may
+    the perturbations used by uncertainty.py: `CD0_values` / `e_values` replace the
+    context's CD0 / e, and a deteriorated engine delivers `thrust_factor` x the deck thrust
+    at a lever while burning `tsfc_factor` x the deck TSFC on the thrust it delivers
+    (defaults: nominal).
+    `ctx`, `emissions` and `atmosphere` are as for simulate_climb_path: the engine,
+    lever solver / cache and aircraft constants come from `ctx` (default: climb_context).
+
+    Returns one (t, h, V, lever_positions, final_results, diagnostics) tuple per strategy,
+    in input order, identical in layout to simulate_climb_path.
+    """
+    if ctx is None:
+        ctx = climb_context(engine, lever_solver, lever_cache)
+    ctx = _with_atmosphere(ctx, atmosphere)
+    engine, lever_solver, lever_cache = ctx.engine, ctx.lever_solver, ctx.lever_cache
+    evaluator = ctx.evaluator  # array-in evaluate for all active trajectories
+    air = ctx.atmosphere
+    n_engines = ctx.n_engines
+
+    n = len(strategies)
+    afs = [af for af, _ in strategies]
+    funcs = [fn for _, fn in strategies]
+    const_mach = np.array([getattr(fn, "_const_mach", False) for fn in funcs], dtype=bool)
+    # trajectories sharing one `_vectorized` strategy (e.g. an ensemble) get one array call
+    groups = {}
+    for i, (af, fn) in enumerate(strategies):
+        key = (id(fn), af) if getattr(fn, "_vectorized", False) else (i,)
+        groups.setdefault(key, []).append(i)
+    group_of = np.empty(n, dtype=int)
+    for k, members in enumerate(groups.values()):
+        group_of[members] = k
+    leaders = [members[0] for members in groups.values()]
+    shared = len(groups) < n
+
+    # State arrays
+    h_s = np.full(n, float(initial_altitude))
+    V_s = np.full(n, float(initial_speed))
+    t_s = np.zeros(n)
+    m0 = np.broadcast_to(np.asarray(initial_mass_kg if initial_mass is None else initial_mass,
+                                    dtype=float), (n,)).copy()
+    m_s = m0.copy()
+    E_cmd = np.broadcast_to(np.asarray(E_DOT_CMD if E_DOT_cmd is None else E_DOT_cmd,
+                                       dtype=float), (n,))
+
+    def per_trajectory(values, default):
+        return np.broadcast_to(np.asarray(default if values is None else values, dtype=float), (n,))
+
+    CD0_s, e_s = per_trajectory(CD0_values, ctx.CD0), per_trajectory(e_values, ctx.e)
+    k_thrust, k_tsfc = per_trajectory(thrust_factor, 1.0), per_trajectory(tsfc_factor, 1.0)
+    active = h_s < target_altitude
+
+    # Step records: one array per step covering the trajectories active in that step
+    rec = {k: [] for k in ("idx", "time", "lever", "limited", "fuel_flow", "burned",
+                           "mass", "h_new", "V_new", "t_new")}
+
+    nominal_engine = (k_thrust == 1.0) & (k_tsfc == 1.0)
+    while active.any():
+        idx = np.flatnonzero(active)
+        if idx.size <= tail and nominal_engine[idx].all():
+            break
+        altitude, velocity, time_s, mass_kg = h_s[idx], V_s[idx], t_s[idx], m_s[idx]
+
+        # (1) Strategy → normalized shares
+        if len(groups) == 1 and getattr(funcs[0], "_vectorized", False):
+            i = leaders[0]
+            cw_sw = np.empty((idx.size, 2))
+            cw_sw[:, 0], cw_sw[:, 1] = funcs[i](altitude, velocity, afs[i])
+        elif shared:
+            cw_sw = np.empty((idx.size, 2))
+            active_groups = group_of[idx]
+            for k in np.unique(active_groups):
+                rows = np.flatnonzero(active_groups == k)
+                i = leaders[k]
+                if getattr(funcs[i], "_vectorized", False):
+                    cw, sw = funcs[i](altitude[rows], velocity[rows], afs[i])
+                    cw_sw[rows, 0], cw_sw[rows, 1] = cw, sw
+                else:
+                    cw_sw[rows] = funcs[i](h_s[i], V_s[i], afs[i])
+        else:
+            cw_sw = np.array([funcs[i](h_s[i], V_s[i], afs[i]) for i in idx], dtype=float).reshape(-1, 2)
+        w_c, w_s = _energy_shares(cw_sw[:, 0], cw_sw[:, 1])
+
+        # (2)-(5) Same physics as _climb_rhs, on arrays
+        T, P, rho, a, mach, g, alt_ft, mach_eng, alt_ft_eng = flight_condition(
+            altitude, velocity, air)
+        W = mass_kg * g
+        D, _, _ = drag_force(ctx, rho, velocity, W, CD0=CD0_s[idx], e=e_s[idx])
+        dh_dt, dv_dt = _climb_rates(w_c, w_s, E_cmd[idx], velocity, g)
+        cm = const_mach[idx]
+        if cm.any():
+            T_above, _, _ = air.calculate_atmospheric_properties_array_m(altitude[cm] + _DTDH_STEP)
+            _, dv_dt[cm] = _climb_rates(w_c[cm], w_s[cm], E_cmd[idx][cm], velocity[cm], g[cm],
+                                        T[cm], a[cm], T_above)
+        F_required_total = required_thrust(D, W, velocity, g, dh_dt, dv_dt)
+        F_deck = F_required_total / k_thrust[idx]  # deck thrust the deteriorated engine needs
+
+        # (6) Lever selection
+        if lever_solver is not None:
+            sol = lever_solver.solve_many(F_deck / float(n_engines), mach_eng, alt_ft_eng)
+            lv = sol["lever"]
+            valid = sol["valid"]
+            thrust_limited = sol["thrust_limited"]
+        else:
+            lv = np.full(idx.size, np.nan)
+            valid = np.zeros(idx.size, dtype=bool)
+            thrust_limited = np.zeros(idx.size, dtype=bool)
+            for j in range(idx.size):
+                lv_j, T_j, lim_j = solve_lever(
+                    float(F_deck[j]) / float(n_engines), mach_eng[j], alt_ft_eng[j], engine,
+                    lever_grid=None, allow_refine=True, cache=lever_cache
+                )
+                if lv_j is not None and T_j is not None:
+                    lv[j], valid[j], thrust_limited[j] = lv_j, True, lim_j
+
+        for j in (() if valid.all() else np.flatnonzero(~valid)):
+            print(f"[WARNING] No valid lever at h={altitude[j]:.1f} m, V={velocity[j]:.1f} m/s "
+                  f"(M={mach[j]:.2f}, Alt={alt_ft[j]:.0f} ft)")
+
+        # (7) Fuel burn at the selected levers
+        fuel_flow_kg_s_total = np.full(idx.size, np.nan)
+        burned_kg = np.zeros(idx.size)
+        if valid.any():
+            _, _, ff = evaluator.evaluate(lv[valid], mach_eng[valid], alt_ft_eng[valid])
+            ff = np.maximum(ff, 0.0) * n_engines * (k_thrust[idx] * k_tsfc[idx])[valid]
+            fuel_flow_kg_s_total[valid] = ff
+            burned_kg[valid] = ff * dt
+        mass_new = np.where(valid, np.maximum(mass_kg - burned_kg, 0.0), mass_kg)
+
+        # (8) Integrate state, partial step for trajectories crossing the target
+        h_new = altitude + dh_dt * dt
+        V_new = velocity + dv_dt * dt
+        t_new = time_s + dt
+        done = h_new >= target_altitude
+        if done.any():
+            dt_last = (target_altitude - altitude[done]) / np.maximum(dh_dt[done], 1e-9)
+            h_new[done] = target_altitude
+            V_new[done] = velocity[done] + dv_dt[done] * dt_last
+            t_new[done] = time_s[done] + dt_last
+
+        for key, val in (("idx", idx), ("time", time_s), ("lever", np.where(valid, lv, np.nan)),
+                         ("limited", valid & thrust_limited), ("fuel_flow", fuel_flow_kg_s_total),
+                         ("burned", burned_kg), ("mass", mass_new),
+                         ("h_new", h_new), ("V_new", V_new), ("t_new", t_new)):
+            rec[key].append(val)
+
+        h_s[idx], V_s[idx], t_s[idx], m_s[idx] = h_new, V_new, t_new, mass_new
+        active[idx[done]] = False
+
+    # Long tail: the last trajectories continue on the scalar integrator, same records
+    for i in np.flatnonzero(active):
+        member_ctx = replace(ctx, CD0=float(CD0_s[i]), e=float(e_s[i]))
+        *_, diagnostics = simulate_climb_path(
+            funcs[i], afs[i], dt=dt, initial_mass=m_s[i], E_DOT_cmd=E_cmd[i],
+            initial_altitude_m=h_s[i], initial_speed_mps=V_s[i], ctx=member_ctx)
+        traj = diagnostics["trajectory"]
+        for key, val in (("idx", np.full(len(traj) - 1, i)), ("time", t_s[i] + traj.t[:-1]),
+                         ("lever", traj.lever[:-1]), ("limited", traj.thrust_limited[:-1] > 0.0),
+                         ("fuel_flow", traj.fuel_flow[:-1]), ("burned", traj.fuel_burn[:-1]),
+                         ("mass", traj.mass[1:]), ("h_new", traj.h[1:]), ("V_new", traj.V[1:]),
+                         ("t_new", t_s[i] + traj.t[1:])):
+            rec[key].append(val)
+        h_s[i], V_s[i], t_s[i], m_s[i] = traj.h[-1], traj.V[-1], t_s[i] + traj.t[-1], traj.mass[-1]
+        active[i] = False
+
+    # Regroup the step records per trajectory (stable sort keeps step order)
+    if rec["idx"]:
+        flat = {k: np.concatenate(v) for k, v in rec.items()}
+    else:
+        flat = {k: np.empty(0) for k in rec}
+    order = np.argsort(flat["idx"], kind="stable")
+    bounds = np.searchsorted(flat["idx"][order], np.arange(n + 1))
+
+    results = []
+    for i in range(n):
+        sel = order[bounds[i]:bounds[i + 1]]
+        lever_positions = [None if x != x else x for x in flat["lever"][sel].tolist()]  # NaN -> None
+        step_times = flat["time"][sel]
+        h = [initial_altitude] + flat["h_new"][sel].tolist()
+        V = [initial_speed] + flat["V_new"][sel].tolist()
+        t = [0.0] + flat["t_new"][sel].tolist()
+        mass_kg = float(m_s[i])
+
+        final_results = {
+            "Final Altitude": h[-1],
+            "Final Velocity": V[-1],
+            "Total Climb Time": t[-1],
+            "Final Lever Position": lever_positions[-1] if lever_positions else None,
+            "Final Mass (kg)": mass_kg,
+            "Total Fuel Burned (kg)": float(m0[i]) - mass_kg,
+            "Engines": n_engines,
+        }
+        diagnostics = {
+            "altitudes": h,
+            "velocities": V,
+            "times": t,
+            "lever_positions": lever_positions,
+            "none_lever_times": step_times[np.isnan(flat["lever"][sel])].tolist(),
+            "limit_times": step_times[flat["limited"][sel].astype(bool)].tolist(),
+            "fuel_flow_kg_s": flat["fuel_flow"][sel].tolist(),    # total (all engines)
+            "fuel_burn_step_kg": flat["burned"][sel].tolist(),
+            "mass_kg": [float(m0[i])] + flat["mass"][sel][:-1].tolist(),
+        }
+        diagnostics["trajectory"] = Trajectory.from_columns(
+            t=t, h=h, V=V, mass=np.append(m0[i], flat["mass"][sel]),
+            lever=np.append(flat["lever"][sel], np.nan),
+            thrust_limited=np.append(flat["limited"][sel], np.nan),
+            fuel_flow=np.append(flat["fuel_flow"][sel], np.nan),
+            fuel_burn=np.append(flat["burned"][sel], np.nan))
+        _add_ground_distance(final_results, diagnostics["trajectory"], air)
+        diagnostics["distances"] = diagnostics["trajectory"].x.tolist()
+        _add_emissions(final_results, diagnostics, emissions, engine, air)
+        results.append((t, h, V, lever_positions, final_results, diagnostics))
+    return results
+
+
+# (5c) Mission segment wrapper --------------------------------------------------------
+def run_climb_segment(state, strategy_function, altitude_fraction_input, target_altitude_m=None,
+                      dt=1.0, method="euler", **kwargs):
+    """
+    Climb from a MissionState (altitude, speed, weight) to `target_altitude_m`, as one
+    segment of a mission (see segments, cruise, descent).
+
+    Remaining keyword arguments go to simulate_climb_path, which fills in the ground
+    distance (segments.ground_distance, wind included); here it is offset by the
+    state's distance.
+
+    Returns (MissionState at the top of climb, diagnostics); the diagnostics are those of
+    simulate_climb_path with times on the mission clock and the distances filled in
+    (also in diagnostics['trajectory']).
+    """
+    t, h, V, lever_positions, final_results, diagnostics = simulate_climb_path(
+        strategy_function, altitude_fraction_input, dt=dt, method=method,
+        initial_mass=state.weight, initial_altitude_m=state.altitude,
+        initial_speed_mps=state.speed, target_altitude_m=target_altitude_m, **kwargs)
+
+    # ground distance and mission clock on the mission's origin
+    traj = diagnostics["trajectory"]
+    traj.x[:] += state.distance
+    traj.t[:] += state.time
+
+    diagnostics = dict(diagnostics, **traj.diagnostics())
+    diagnostics["final_results"] = final_results
+
+    burned = final_results["Total Fuel Burned (kg)"]
+    out = replace(state, time=state.time + t[-1], weight=final_results["Final Mass (kg)"],
+                  altitude=h[-1], speed=V[-1], distance=float(traj.x[-1]),
+                  fuel_used=state.fuel_used + burned, segment_name="climb")
+    return out, diagnostics
+
+
 # (6) Runner stub (entry used by external pipeline) ------------------------------------
 def simulate_physics_based_climb():
     print("Physics-based climb simulation placeholder executed.")
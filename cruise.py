@@ -1 +1,149 @@
- 
\ No newline at end of file
+from dataclasses import replace
+
+import numpy as np
+
+from segments import (FT_PER_M, ALT_MAX_FT_FOR_ENGINE, atm, default_context,
+                      drag_force, flight_condition, ground_speed_component, march,
+                      required_thrust, specific_range, start_trajectory, thrust_setting)
+
+# (1) Defaults ---------------------------------------------------------------------------
+CRUISE_DT          = 60.0    # [s] step with the Breguet fuel burn
+CRUISE_DT_STEP     = 1.0     # [s] step with plain ff*dt integration
+STEP_CLIMB_HEIGHT  = 300.0   # [m] altitude gained per step climb
+STEP_CLIMB_RATE    = 5.0     # [m/s] rate of climb during a step
+STEP_CHECK_INTERVAL = 600.0  # [s] cruise time between step-climb checks
+STEP_MIN_GAIN      = 0.005   # [-] required relative specific-range improvement
+CRUISE_CEILING     = ALT_MAX_FT_FOR_ENGINE / FT_PER_M  # [m] top of the engine deck
+
+
+# (2) Level flight ----------------------------------------------------------------------
+def cruise_rhs(ctx):
+    """Level flight with thrust = drag at constant true airspeed (= constant Mach)."""
+    def rhs(altitude, velocity, mass_kg):
+        T, P, rho, a, m, g, alt_ft, mach_eng, alt_ft_eng = flight_condition(
+            altitude, velocity, ctx.atmosphere)
+        D, _, _ = drag_force(ctx, rho, velocity, mass_kg * g)
+        lv, thrust_limited, ff = thrust_setting(ctx, D, mach_eng, alt_ft_eng)
+        return 0.0, 0.0, velocity + ctx.atmosphere.get_wind(altitude), lv, thrust_limited, ff
+    return rhs
+
+
+def step_climb_rhs(ctx, rate):
+    """Constant-Mach climb at a fixed rate [m/s] (speed follows the speed of sound)."""
+    def rhs(altitude, velocity, mass_kg):
+        T, P, rho, a, mach, g, alt_ft, mach_eng, alt_ft_eng = flight_condition(
+            altitude, velocity, ctx.atmosphere)
+        W = mass_kg * g
+        D, _, _ = drag_force(ctx, rho, velocity, W)
+        dadh = 0.5 * a / max(T, 1e-9) * _temperature_gradient(altitude, T, ctx.atmosphere)
+        dv_dt = mach * dadh * rate
+        F_required_total = required_thrust(D, W, velocity, g, rate, dv_dt)
+        lv, thrust_limited, ff = thrust_setting(ctx, F_required_total, mach_eng, alt_ft_eng)
+        wind = ctx.atmosphere.get_wind(altitude)
+        return rate, dv_dt, ground_speed_component(velocity, rate, wind), lv, thrust_limited, ff
+    return rhs
+
+
+def _temperature_gradient(altitude, T, atmosphere=atm, eps=1.0):
+    # same finite difference as the constant-Mach climb strategy
+    T2, _, _ = atmosphere.calculate_atmospheric_properties_m(altitude + eps)
+    return (T2 - T) / eps
+
+
+def _speed_for_mach(altitude, mach, atmosphere=atm):
+    a = flight_condition(altitude, 1.0, atmosphere)[3]
+    return float(mach * a)
+
+
+# (3) Cruise segment --------------------------------------------------------------------
+def simulate_cruise(state, distance_m, ctx=None, mach=None, dt=None, method="breguet",
+                    step_climb=False, step_height=STEP_CLIMB_HEIGHT, step_rate=STEP_CLIMB_RATE,
+                    check_interval=STEP_CHECK_INTERVAL, min_gain=STEP_MIN_GAIN,
+                    ceiling=CRUISE_CEILING):
+    """
+    Cruise over `distance_m` [m] of ground distance from a MissionState.
+
+    Level flight at the state's altitude with thrust = drag; with `mach` the speed is
+    set to that Mach number (and kept through step climbs), otherwise the state's speed
+    is held. Fuel burn per step:
+      - method="breguet": Breguet weight fraction, exact for constant TSFC and L/D over
+        the step, so long steps (default CRUISE_DT) stay accurate
+      - method="step":    ff * dt with short steps (default CRUISE_DT_STEP)
+
+    With `step_climb=True` the specific range (distance per kg of fuel) at the current
+    altitude is compared with the one `step_height` higher every `check_interval`
+    seconds. If the higher level is at least `min_gain` better, below `ceiling` and
+    reachable without thrust limiting, the aircraft climbs to it at `step_rate` [m/s]
+    at constant Mach; the climb distance counts towards `distance_m`.
+
+    `ctx` is a segments.SegmentContext (default: segments.default_context()).
+
+    Returns (MissionState at the end of cruise, diagnostics). The diagnostics have the
+    climb keys plus 'distances', 'trajectory' and 'step_climbs'
+    [(time, from_altitude, to_altitude)].
+    """
+    if method not in ("breguet", "step"):
+        raise ValueError(f"Unknown cruise method {method!r} (use 'breguet' or 'step')")
+    if ctx is None:
+        ctx = default_context()
+    breguet = method == "breguet"
+    if dt is None:
+        dt = CRUISE_DT if breguet else CRUISE_DT_STEP
+
+    if mach is not None:
+        state = replace(state, speed=_speed_for_mach(state.altitude, mach, ctx.atmosphere))
+    x_end = state.distance + float(distance_m)
+    traj = start_trajectory(state)
+    step_climbs = []
+    level = cruise_rhs(ctx)
+
+    while state.distance < x_end:
+        max_time = check_interval if step_climb else None
+        state, traj = march(state, level, dt, 2, x_end, "cruise", breguet=breguet,
+                            max_time=max_time, trajectory=traj, profiler=ctx.profiler)
+        if not step_climb or state.distance >= x_end:
+            break
+        if not _step_is_better(ctx, state, step_height, min_gain, ceiling):
+            continue
+
+        # climb at constant Mach to the next level (plain ff*dt steps)
+        h_from = state.altitude
+        h_to = min(h_from + step_height, ceiling)
+        state, traj = march(state, step_climb_rhs(ctx, step_rate), CRUISE_DT_STEP, 0, h_to,
+                            "cruise", trajectory=traj, profiler=ctx.profiler)
+        step_climbs.append((state.time, h_from, state.altitude))
+        if state.distance > x_end:
+            print(f"[WARNING] Cruise distance exceeded by {state.distance - x_end:.0f} m "
+                  f"during a step climb")
+
+    diagnostics = traj.diagnostics()
+    diagnostics.update(trajectory=traj, step_climbs=step_climbs)
+    return state, diagnostics
+
+
+def _step_is_better(ctx, state, step_height, min_gain, ceiling):
+    """True if cruising `step_height` higher gives at least `min_gain` more range per kg."""
+    h_up = state.altitude + step_height
+    if h_up > ceiling + 1e-6:
+        return False
+    sr_here, _ = specific_range(ctx, state.altitude, state.speed, state.weight)
+    # constant Mach: the speed follows the speed of sound at the new level
+    mach = state.speed / flight_condition(state.altitude, state.speed, ctx.atmosphere)[3]
+    sr_up, feasible = specific_range(ctx, h_up, _speed_for_mach(h_up, mach, ctx.atmosphere),
+                                     state.weight)
+    if not (np.isfinite(sr_here) and np.isfinite(sr_up)) or not feasible:
+        return False
+    return sr_up >= (1.0 + min_gain) * sr_here
+
+
+# (4) Quick self-test when run directly ------------------------------------------------
+if __name__ == "__main__":
+    from mission_state import MissionState
+    start = MissionState(weight=58000.0, altitude=3000.0, speed=150.0)
+    for method in ("breguet", "step"):
+        end, diagnostics = simulate_cruise(start, 200e3, method=method, mach=0.45)
+        print(f"[INFO] Cruise ({method}): {end.time:.0f} s, fuel {end.fuel_used:.1f} kg, "
+              f"final mass {end.weight:.1f} kg")
+    end, diagnostics = simulate_cruise(start, 500e3, mach=0.45, step_climb=True)
+    print(f"[INFO] Cruise with step climbs: fuel {end.fuel_used:.1f} kg, "
+          f"steps {len(diagnostics['step_climbs'])}, final altitude {end.altitude:.0f} m")
@@ -1 +1,140 @@
- 
\ No newline at end of file
+import math
+from dataclasses import replace
+
+from segments import (GAMMA, R_AIR, default_context, drag_force, flight_condition,
+                      ground_speed_component, idle_setting, march, required_thrust,
+                      start_trajectory, thrust_setting)
+
+# (1) Defaults ---------------------------------------------------------------------------
+DESCENT_DT        = 1.0    # [s] integration step
+DESCENT_RATE      = -7.5   # [m/s] commanded rate in fixed-rate mode (~1500 ft/min)
+MIN_IDLE_SINK     = 0.5    # [m/s] sink kept when idle thrust exceeds drag
+DESCENT_MODES     = ("idle", "fixed_rate")
+FL100_M           = 3048.0 # [m] boundary of a (below, above FL100) speed schedule
+P_SL, A_SL        = 101325.0, 340.294  # [Pa], [m/s] ISA sea level, for CAS
+
+
+def cas_to_tas(cas, altitude, atmosphere):
+    """True airspeed [m/s] flying calibrated airspeed `cas` [m/s] at `altitude` [m] (subsonic)."""
+    T, P, _ = atmosphere.calculate_atmospheric_properties_m(altitude)
+    qc = P_SL * ((1.0 + 0.2 * (cas / A_SL)**2)**3.5 - 1.0)
+    mach = math.sqrt(5.0 * ((qc / P + 1.0)**(2.0 / 7.0) - 1.0))
+    return mach * math.sqrt(GAMMA * R_AIR * T)
+
+
+def _tas_gradient(cas, altitude, atmosphere, eps=1.0):
+    """dTAS/dh [1/s] at constant CAS (forward difference); 0 without a CAS (constant TAS)."""
+    if cas is None:
+        return 0.0
+    return (cas_to_tas(cas, altitude + eps, atmosphere) - cas_to_tas(cas, altitude, atmosphere)) / eps
+
+
+# (2) Right-hand sides ------------------------------------------------------------------
+def idle_descent_rhs(ctx, cas=None):
+    """
+    Idle-thrust descent at constant true airspeed, or at constant calibrated airspeed
+    `cas` [m/s] (TAS falling as the air thickens): the power balance gives the sink
+    rate dh/dt = (T_idle - D) V / W / (1 + V/g dV/dh). Where idle thrust exceeds drag
+    the aircraft still descends at MIN_IDLE_SINK (airbrakes, not modelled).
+    """
+    def rhs(altitude, velocity, mass_kg):
+        T, P, rho, a, mach, g, alt_ft, mach_eng, alt_ft_eng = flight_condition(
+            altitude, velocity, ctx.atmosphere)
+        W = mass_kg * g
+        D, _, _ = drag_force(ctx, rho, velocity, W)
+        T_idle, ff = idle_setting(ctx, mach_eng, alt_ft_eng)
+        wind = ctx.atmosphere.get_wind(altitude)
+        dv_dh = _tas_gradient(cas, altitude, ctx.atmosphere)
+        if math.isnan(T_idle):  # no valid idle point in the deck
+            return -MIN_IDLE_SINK, -MIN_IDLE_SINK * dv_dh, velocity + wind, None, False, ff
+        dh_dt = (T_idle - D) * velocity / max(W, 1e-9) / (1.0 + velocity / g * dv_dh)
+        dh_dt = min(dh_dt, -MIN_IDLE_SINK)
+        return (dh_dt, dh_dt * dv_dh, ground_speed_component(velocity, dh_dt, wind), 0.0, False,
+                ff)
+    return rhs
+
+
+def fixed_rate_descent_rhs(ctx, rate, cas=None):
+    """
+    Descent at a commanded rate [m/s] (negative) and constant true airspeed, or constant
+    calibrated airspeed `cas` [m/s]; the lever comes from the power balance
+    F_req = D + W (dh/dt + V/g dV/dt) / V (idle where that is below idle).
+    """
+    def rhs(altitude, velocity, mass_kg):
+        T, P, rho, a, mach, g, alt_ft, mach_eng, alt_ft_eng = flight_condition(
+            altitude, velocity, ctx.atmosphere)
+        W = mass_kg * g
+        D, _, _ = drag_force(ctx, rho, velocity, W)
+        dv_dt = rate * _tas_gradient(cas, altitude, ctx.atmosphere)
+        F_required_total = required_thrust(D, W, velocity, g, rate, dv_dt)
+        lv, thrust_limited, ff = thrust_setting(ctx, F_required_total, mach_eng, alt_ft_eng)
+        wind = ctx.atmosphere.get_wind(altitude)
+        return rate, dv_dt, ground_speed_component(velocity, rate, wind), lv, thrust_limited, ff
+    return rhs
+
+
+# (3) Descent segment -------------------------------------------------------------------
+def simulate_descent(state, target_altitude_m=0.0, ctx=None, mode="idle", rate=DESCENT_RATE,
+                     speed=None, dt=DESCENT_DT, speed_schedule=None):
+    """
+    Descend from a MissionState to `target_altitude_m` [m].
+
+      - mode="idle":       lever 0, sink rate from the power balance
+      - mode="fixed_rate": commanded `rate` [m/s, negative], lever solved for it
+
+    The true airspeed is held at `speed` (default: the state's speed). With a
+    `speed_schedule` (CAS below FL100, CAS above FL100) [m/s], e.g. a mission's
+    descent_speed_below/above_FL100, the descent instead flies the upper CAS down to
+    FL100 and the lower one below it; the speed changes at the top of descent and at
+    FL100 are instantaneous. `ctx` is a segments.SegmentContext (default:
+    segments.default_context()).
+
+    Returns (MissionState at the end of descent, diagnostics) with the climb keys plus
+    'distances' and 'trajectory'.
+    """
+    if mode not in DESCENT_MODES:
+        raise ValueError(f"Unknown descent mode {mode!r} (use one of {DESCENT_MODES})")
+    if mode == "fixed_rate" and not rate < 0.0:
+        raise ValueError(f"Descent rate must be negative, got {rate}")
+    if ctx is None:
+        ctx = default_context()
+    if speed is not None:
+        state = replace(state, speed=float(speed))
+    if state.altitude <= target_altitude_m:
+        print(f"[WARNING] Descent start {state.altitude:.1f} m is not above "
+              f"target {target_altitude_m:.1f} m; nothing to do")
+        traj = start_trajectory(state)
+        return replace(state, segment_name="descent"), dict(traj.diagnostics(), trajectory=traj)
+
+    target = float(target_altitude_m)
+    if speed_schedule is None:
+        legs = [(target, None)]
+    else:
+        cas_below, cas_above = speed_schedule
+        legs = []
+        if state.altitude > FL100_M:
+            legs.append((max(FL100_M, target), cas_above))
+        if target < FL100_M:
+            legs.append((target, cas_below))
+
+    traj = None
+    for stop, cas in legs:
+        if cas is not None:
+            state = replace(state, speed=cas_to_tas(cas, state.altitude, ctx.atmosphere))
+        rhs = idle_descent_rhs(ctx, cas) if mode == "idle" else fixed_rate_descent_rhs(ctx, rate, cas)
+        state, traj = march(state, rhs, dt, 0, stop, "descent", trajectory=traj,
+                            profiler=ctx.profiler)
+    return state, dict(traj.diagnostics(), trajectory=traj)
+
+
+# (4) Quick self-test when run directly ------------------------------------------------
+if __name__ == "__main__":
+    from mission_state import MissionState
+    start = MissionState(weight=56000.0, altitude=4267.2, speed=140.0)
+    for mode in DESCENT_MODES:
+        end, diagnostics = simulate_descent(start, 0.0, mode=mode)
+        print(f"[INFO] Descent ({mode}): {end.time:.0f} s, {end.distance / 1000:.1f} km, "
+              f"fuel {end.fuel_used:.1f} kg")
+    end, _ = simulate_descent(start, 0.0, speed_schedule=(128.6112, 154.3334))
+    print(f"[INFO] Descent (idle, 250/300 kt CAS): {end.time:.0f} s, {end.distance / 1000:.1f} km, "
+          f"fuel {end.fuel_used:.1f} kg, landing TAS {end.speed:.1f} m/s")
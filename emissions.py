@@ -0,0 +1,127 @@
+from pathlib import Path
+
+import numpy as np
+
+from pyengine import DeckEngine, get_engine
+from segments import (MACH_MIN_FOR_ENGINE, MACH_MAX_FOR_ENGINE, ALT_MIN_FT_FOR_ENGINE,
+                      ALT_MAX_FT_FOR_ENGINE, FT_PER_M, GAMMA, R_AIR, atm)
+
+# Fallbacks where the engine XML has no <EmissionFactors> (values of the bundled stub)
+CO2_FACTOR = 3.149   # [kg/kg fuel]
+H2O_FACTOR = 1.2     # [kg/kg fuel]
+NOX_FACTOR = 32.0    # [g/kg fuel per unit sNOx]
+
+# species -> final_results key (totals over a trajectory)
+FINAL_KEYS = {"co2": "Total CO2 (kg)", "h2o": "Total H2O (kg)", "nox": "Total NOx (kg)"}
+
+_DECK_ENGINES = {}  # resolved stub path -> DeckEngine used for the sNOx lookup
+
+
+# (1) Emission model --------------------------------------------------------------------
+class EmissionModel:
+    """
+    Emission indices [kg per kg fuel] of one engine.
+
+    CO2 and H2O are fixed stoichiometric factors. NOx follows the stub's sNOx severity
+    deck: EI_NOx [g/kg] = sNOx x NOxFactor, with sNOx read at the step's lever, Mach and
+    altitude through the same lever→N1 mapping as thrust (DeckEngine.deck_values).
+    The factors and the deck name come from <EmissionFactors> / <Deck> of the engine XML.
+    """
+
+    def __init__(self, deck_engine):
+        data = deck_engine.data
+        self.engine = deck_engine
+        self.co2_factor = float(data.get("CO2Factor", CO2_FACTOR))
+        self.h2o_factor = float(data.get("H2OFactor", H2O_FACTOR))
+        self.nox_factor = float(data.get("NOxFactor", NOX_FACTOR))
+        self.nox_deck = deck_engine.deck_key("SNoxDeckName", "sNOx")
+
+    @classmethod
+    def for_engine(cls, engine=None, stub_path=None):
+        """
+        Model for `engine`. The sNOx lookup needs the decks, so engines that are not a
+        DeckEngine (the native Engine, an EngineSurrogate) use a DeckEngine on their
+        stub (`stub_path`, the engine's own, else climb.STUB); it is built once per stub.
+        """
+        if isinstance(engine, DeckEngine):
+            return cls(engine)
+        stub = stub_path or getattr(engine, "stub_path", None)
+        if stub is None:
+            import climb
+            stub = climb.STUB
+        deck = get_engine(stub)
+        if not isinstance(deck, DeckEngine):
+            key = str(Path(stub).resolve())
+            deck = _DECK_ENGINES.get(key)
+            if deck is None:
+                deck = _DECK_ENGINES[key] = DeckEngine(key)
+        return cls(deck)
+
+    def indices(self, lever, mach, altitude_ft):
+        """{'co2', 'h2o', 'nox'}: emission indices [kg/kg fuel] (arrays broadcast)."""
+        snox = self.engine.deck_values(self.nox_deck, lever, mach, altitude_ft)
+        return {"co2": np.full(snox.shape, self.co2_factor),
+                "h2o": np.full(snox.shape, self.h2o_factor),
+                "nox": snox * self.nox_factor * 1e-3}
+
+    def trajectory_emissions(self, traj, atmosphere=atm):
+        """
+        Per-step emissions of a Trajectory (climb, cruise or descent), computed in one
+        vectorized pass after the run: the lever of step i was set at the state of row
+        i, so the engine query point is rebuilt from h and V as in
+        segments.flight_condition (in `atmosphere`, default ISA). Returns a dict of step arrays: 'ei_nox' [g/kg] and
+        'co2_kg', 'h2o_kg', 'nox_kg' [kg]; steps without a valid lever emit nothing.
+        """
+        steps = slice(0, max(len(traj) - 1, 0))
+        h, V, lever = traj.h[steps], traj.V[steps], traj.lever[steps]
+        burned = np.nan_to_num(traj.fuel_burn[steps], nan=0.0)
+        T, _, _ = atmosphere.calculate_atmospheric_properties_array_m(h)
+        mach = V / np.maximum(np.sqrt(GAMMA * R_AIR * T), 1e-9)
+        mach_eng = np.clip(mach, MACH_MIN_FOR_ENGINE, MACH_MAX_FOR_ENGINE)
+        alt_ft_eng = np.clip(h * FT_PER_M, ALT_MIN_FT_FOR_ENGINE, ALT_MAX_FT_FOR_ENGINE)
+        ei = self.indices(np.nan_to_num(lever, nan=0.0), mach_eng, alt_ft_eng)
+        ei_nox = np.where(np.isnan(lever), np.nan, ei["nox"])
+        out = {"ei_nox": 1e3 * ei_nox}
+        for species, index in ei.items():
+            out[f"{species}_kg"] = np.where(np.isnan(lever), 0.0, np.nan_to_num(index) * burned)
+        return out
+
+
+def emission_model(emissions, engine=None):
+    """`emissions` argument of the integrators -> EmissionModel or None (True: for `engine`)."""
+    if emissions is None or emissions is False:
+        return None
+    if emissions is True:
+        return EmissionModel.for_engine(engine)
+    return emissions
+
+
+# (2) Totals ----------------------------------------------------------------------------
+def add_emissions(final_results, diagnostics, model, atmosphere=None):
+    """
+    Emissions of diagnostics['trajectory'] under diagnostics['emissions'] (per step)
+    and their totals in final_results (FINAL_KEYS). Returns the per-step dict.
+    """
+    steps = model.trajectory_emissions(diagnostics["trajectory"], atmosphere or atm)
+    diagnostics["emissions"] = steps
+    for species, key in FINAL_KEYS.items():
+        final_results[key] = float(steps[f"{species}_kg"].sum())
+    return steps
+
+
+# (3) Quick self-test when run directly ------------------------------------------------
+if __name__ == "__main__":
+    import time
+    import climb
+
+    strategy = climb.strategy_for("linear", 0.5)
+    t0 = time.perf_counter()
+    *_, base, _ = climb.simulate_climb_path(strategy, 0.5, dt=1.0)
+    t1 = time.perf_counter()
+    *_, final_results, diagnostics = climb.simulate_climb_path(strategy, 0.5, dt=1.0, emissions=True)
+    t2 = time.perf_counter()
+    ei_nox = diagnostics["emissions"]["ei_nox"]
+    print(f"[INFO] Fuel {final_results['Total Fuel Burned (kg)']:.1f} kg -> "
+          + ", ".join(f"{key} {final_results[key]:.2f}" for key in FINAL_KEYS.values()))
+    print(f"[INFO] EI_NOx {np.nanmin(ei_nox):.1f} .. {np.nanmax(ei_nox):.1f} g/kg; "
+          f"runtime {1e3 * (t1 - t0):.0f} ms without, {1e3 * (t2 - t1):.0f} ms with emissions")
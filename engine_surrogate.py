@@ -0,0 +1,302 @@
+import hashlib
+
+import numpy as np
+from bisect import bisect_right
+from pathlib import Path
+
+from pyengine.decks import stub_key
+from pyengine.stateless import tsfc_to_si
+
+
+class EngineSurrogate:
+    """
+    Tabulated thrust/TSFC surrogate of a pyengine Engine.
+
+    The engine is scanned once on a dense (lever, Mach, altitude_ft) grid; afterwards
+    thrust and TSFC come from vectorized trilinear interpolation of that table.
+    Points the engine could not evaluate (exception, non-finite or negative) are stored
+    as NaN, so the surrogate reports them as invalid exactly like the live engine does.
+
+    The scalar methods mirror pyengine.Engine (get_thrust_with_lever_position followed by
+    get_tsfc on the last evaluated state), so an instance can be passed wherever the
+    integrator expects `eng`.
+    """
+
+    def __init__(self, levers, machs, altitudes_ft, thrust, tsfc):
+        self.levers = np.asarray(levers, dtype=float)
+        self.machs = np.asarray(machs, dtype=float)
+        self.altitudes_ft = np.asarray(altitudes_ft, dtype=float)
+        self.thrust_table = np.asarray(thrust, dtype=float)
+        self.tsfc_table = np.asarray(tsfc, dtype=float)
+        self._stacked = np.stack([self.thrust_table, self.tsfc_table], axis=-1)
+        self._state = (0.0, 0.0, 0.0)  # last (lever, mach, altitude_ft) for get_tsfc()
+        self.errors = None             # filled by build_surrogate() when an error bound is set
+        # plain-Python copies for the scalar path (numpy per-call overhead dominates there)
+        self._axes = (self.levers.tolist(), self.machs.tolist(), self.altitudes_ft.tolist())
+        self._thrust_nested = self.thrust_table.tolist()
+        self._tsfc_nested = self.tsfc_table.tolist()
+
+    # --- construction -----------------------------------------------------------------
+    @classmethod
+    def from_engine(cls, eng, levers=None, machs=None, altitudes_ft=None):
+        """Scan `eng` on the full grid (one native call pair per grid point)."""
+        levers = DEFAULT_LEVERS if levers is None else np.asarray(levers, dtype=float)
+        machs = DEFAULT_MACHS if machs is None else np.asarray(machs, dtype=float)
+        altitudes_ft = DEFAULT_ALTITUDES_FT if altitudes_ft is None else np.asarray(altitudes_ft, dtype=float)
+
+        shape = (len(levers), len(machs), len(altitudes_ft))
+        thrust = np.full(shape, np.nan)
+        tsfc = np.full(shape, np.nan)
+        for i, lever in enumerate(levers):
+            for j, mach in enumerate(machs):
+                for k, alt_ft in enumerate(altitudes_ft):
+                    Tv, sfc = _query_engine(eng, lever, mach, alt_ft)
+                    thrust[i, j, k] = Tv
+                    tsfc[i, j, k] = sfc
+        return cls(levers, machs, altitudes_ft, thrust, tsfc)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(data["levers"], data["machs"], data["altitudes_ft"], data["thrust"], data["tsfc"])
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(path, levers=self.levers, machs=self.machs, altitudes_ft=self.altitudes_ft,
+                            thrust=self.thrust_table, tsfc=self.tsfc_table)
+
+    def refined(self, eng):
+        """Return a new surrogate with every grid spacing halved (re-scans `eng`)."""
+        return EngineSurrogate.from_engine(eng, _midpoint_refine(self.levers),
+                                           _midpoint_refine(self.machs),
+                                           _midpoint_refine(self.altitudes_ft))
+
+    # --- vectorized evaluation ---------------------------------------------------------
+    def thrust(self, lever, mach, altitude_ft):
+        """Per-engine thrust, broadcast over array inputs. NaN where the deck is invalid."""
+        return self._interpolate(self.thrust_table, lever, mach, altitude_ft)
+
+    def tsfc(self, lever, mach, altitude_ft):
+        """TSFC in the engine's native unit, broadcast over array inputs."""
+        return self._interpolate(self.tsfc_table, lever, mach, altitude_ft)
+
+    def thrust_and_tsfc(self, lever, mach, altitude_ft):
+        """Both quantities from a single cell lookup (what the integrators need per step)."""
+        both = self._interpolate(self._stacked, lever, mach, altitude_ft)
+        return both[..., 0], both[..., 1]
+
+    def evaluate(self, lever, mach, altitude_ft):
+        """
+        Stateless (thrust [N], tsfc [kg/(N·s)], fuel_flow [kg/s]) per engine, scalars or
+        broadcast arrays; same contract as pyengine DeckEngine.evaluate.
+        """
+        if isinstance(lever, (int, float)) and isinstance(mach, (int, float)) \
+                and isinstance(altitude_ft, (int, float)):
+            state = (float(lever), float(mach), float(altitude_ft))
+            thrust = self._interpolate_scalar(self._thrust_nested, *state)
+            tsfc = tsfc_to_si(self._interpolate_scalar(self._tsfc_nested, *state))
+            return thrust, tsfc, max(tsfc, 0.0) * max(thrust, 0.0)
+        thrust, tsfc = self.thrust_and_tsfc(lever, mach, altitude_ft)
+        tsfc = tsfc_to_si(tsfc)
+        return thrust, tsfc, np.maximum(tsfc, 0.0) * np.maximum(thrust, 0.0)
+
+    def _interpolate(self, table, lever, mach, altitude_ft):
+        lever, mach, altitude_ft = np.broadcast_arrays(np.asarray(lever, dtype=float),
+                                                       np.asarray(mach, dtype=float),
+                                                       np.asarray(altitude_ft, dtype=float))
+        il, wl = _locate(self.levers, lever)
+        im, wm = _locate(self.machs, mach)
+        ia, wa = _locate(self.altitudes_ft, altitude_ft)
+
+        # all 8 cell corners in one gather: weights (8, ...) and values (8, ..., [k])
+        wl2, wm2, wa2 = np.stack([1.0 - wl, wl]), np.stack([1.0 - wm, wm]), np.stack([1.0 - wa, wa])
+        w = (wl2[:, None, None] * wm2[None, :, None] * wa2[None, None, :]).reshape((8,) + lever.shape)
+        corner = _CORNERS.reshape((8, 3) + (1,) * lever.ndim)
+        vals = table[il + corner[:, 0], im + corner[:, 1], ia + corner[:, 2]]
+        w = w.reshape(w.shape + (1,) * (vals.ndim - w.ndim))
+        # zero-weight corners must not leak NaN from the invalid region
+        out = np.where(w > 0.0, w * vals, 0.0).sum(axis=0)
+        if out.ndim == 0:
+            return float(out)
+        return out
+
+    # --- pyengine.Engine-compatible scalar interface ------------------------------------
+    def get_thrust_with_lever_position(self, lever, mach, altitude_ft):
+        self._state = (float(lever), float(mach), float(altitude_ft))
+        return self._interpolate_scalar(self._thrust_nested, *self._state)
+
+    def get_tsfc(self):
+        return self._interpolate_scalar(self._tsfc_nested, *self._state)
+
+    def _interpolate_scalar(self, table, lever, mach, altitude_ft):
+        (il, wl), (im, wm), (ia, wa) = (_locate_scalar(axis, x) for axis, x
+                                        in zip(self._axes, (lever, mach, altitude_ft)))
+        out = 0.0
+        for dl, fl in ((0, 1.0 - wl), (1, wl)):
+            if fl <= 0.0:
+                continue
+            plane = table[il + dl]
+            for dm, fm in ((0, 1.0 - wm), (1, wm)):
+                if fm <= 0.0:
+                    continue
+                row = plane[im + dm]
+                for da, fa in ((0, 1.0 - wa), (1, wa)):
+                    if fa > 0.0:
+                        out += fl * fm * fa * row[ia + da]
+        return out
+
+    # --- accuracy against the live engine ----------------------------------------------
+    def error_against(self, eng, n_samples=200, seed=0, thrust_floor_frac=0.01):
+        """
+        Compare against `eng` at random off-grid points inside the table bounds.
+
+        Relative errors use max(|reference|, thrust_floor_frac * max thrust) as denominator
+        for thrust, so near-idle points do not dominate. TSFC (fuel flow over a vanishing
+        thrust) is only compared where the reference thrust is above that floor; the
+        near-idle points left out are counted in 'tsfc_excluded'. Points where either side
+        is invalid are counted in 'validity_mismatch' instead.
+        """
+        rng = np.random.default_rng(seed)
+        lv = rng.uniform(self.levers[0], self.levers[-1], n_samples)
+        mn = rng.uniform(self.machs[0], self.machs[-1], n_samples)
+        alt = rng.uniform(self.altitudes_ft[0], self.altitudes_ft[-1], n_samples)
+
+        ref = np.array([_query_engine(eng, lv[i], mn[i], alt[i]) for i in range(n_samples)])
+        T_ref, sfc_ref = ref[:, 0], ref[:, 1]
+        T_sur, sfc_sur = self.thrust(lv, mn, alt), self.tsfc(lv, mn, alt)
+
+        both = np.isfinite(T_ref) & np.isfinite(T_sur)
+        mismatch = int(np.sum(np.isfinite(T_ref) != np.isfinite(T_sur)))
+        if not np.any(both):
+            return {"thrust_max_rel": np.inf, "thrust_mean_rel": np.inf,
+                    "tsfc_max_rel": np.inf, "tsfc_mean_rel": np.inf, "tsfc_excluded": 0,
+                    "validity_mismatch": mismatch, "samples": n_samples}
+
+        T_floor = thrust_floor_frac * np.nanmax(np.abs(self.thrust_table))
+        err_T = np.abs(T_sur[both] - T_ref[both]) / np.maximum(np.abs(T_ref[both]), T_floor)
+        sfc_ok = both & np.isfinite(sfc_ref) & np.isfinite(sfc_sur) & (np.abs(sfc_ref) > 0.0)
+        near_idle = sfc_ok & (np.abs(T_ref) < T_floor)
+        sfc_ok &= ~near_idle
+        err_sfc = np.abs(sfc_sur[sfc_ok] - sfc_ref[sfc_ok]) / np.abs(sfc_ref[sfc_ok])
+        return {
+            "thrust_max_rel": float(err_T.max()),
+            "thrust_mean_rel": float(err_T.mean()),
+            "tsfc_max_rel": float(err_sfc.max()) if err_sfc.size else 0.0,
+            "tsfc_mean_rel": float(err_sfc.mean()) if err_sfc.size else 0.0,
+            "tsfc_excluded": int(near_idle.sum()),
+            "validity_mismatch": mismatch,
+            "samples": n_samples,
+        }
+
+
+# Default grid: covers the climb integrator's engine query envelope
+# (Mach 0..0.94, 0..14,000 ft) at the deck's own altitude spacing.
+DEFAULT_LEVERS = np.linspace(0.0, 1.0, 21)
+DEFAULT_MACHS = np.linspace(0.0, 0.94, 48)
+DEFAULT_ALTITUDES_FT = np.arange(0.0, 14000.0 + 500.0, 500.0)
+
+_CORNERS = np.array([(dl, dm, da) for dl in (0, 1) for dm in (0, 1) for da in (0, 1)])
+
+_SURROGATES = {}  # in-process cache: (stub dir, surrogate_key) -> EngineSurrogate
+
+
+def surrogate_key(stub_dir, levers=None, machs=None, altitudes_ft=None, max_rel_error=None,
+                  max_refinements=2):
+    """
+    Hash of everything a cached surrogate depends on: names and contents of the stub's
+    files (decks and engine XML) and the requested grid and error bound.
+    """
+    h = hashlib.sha1(stub_key(stub_dir).encode())
+    for axis, default in ((levers, DEFAULT_LEVERS), (machs, DEFAULT_MACHS),
+                          (altitudes_ft, DEFAULT_ALTITUDES_FT)):
+        h.update(np.asarray(default if axis is None else axis, dtype=float).tobytes())
+        h.update(b"|")
+    if max_rel_error is not None:
+        h.update(repr((float(max_rel_error), int(max_refinements))).encode())
+    return h.hexdigest()[:16]
+
+
+def build_surrogate(eng, stub_dir, cache_dir=None, max_rel_error=None,
+                    max_refinements=2, n_check=200, levers=None, machs=None, altitudes_ft=None):
+    """
+    Build (or reuse) the surrogate for one engine stub directory.
+
+    - Reused from the in-process cache, else loaded from
+      `cache_dir/<stub>_<surrogate_key>_surrogate.npz`, else scanned from `eng` and written
+      there. The key hashes the stub's files and the grid / error bound, so an edited deck
+      or a different grid never picks up a stale table.
+    - With `max_rel_error` set, the thrust/TSFC max relative error against `eng` is checked
+      on `n_check` random points (as EngineSurrogate.error_against measures it, i.e.
+      without near-idle TSFC); the grid is refined by halving (up to `max_refinements`
+      times) until the bound holds. The achieved errors are stored in `surrogate.errors`.
+      A table that still misses the bound raises ValueError and is neither returned nor
+      cached. (The engine's thrust jumps where the blended idle N1 changes at deck nodes,
+      so a bound of a few percent is not always reachable on a regular grid.)
+    """
+    stub_dir = Path(stub_dir)
+    content = surrogate_key(stub_dir, levers, machs, altitudes_ft, max_rel_error, max_refinements)
+    key = (str(stub_dir.resolve()), content)
+    if key in _SURROGATES:
+        return _SURROGATES[key]
+
+    cache_file = None
+    if cache_dir is not None:
+        cache_file = Path(cache_dir) / f"{stub_dir.name}_{content}_surrogate.npz"
+
+    if cache_file is not None and cache_file.exists():
+        sur = EngineSurrogate.load(cache_file)
+    else:
+        sur = EngineSurrogate.from_engine(eng, levers, machs, altitudes_ft)
+
+    if max_rel_error is not None:
+        for refinement in range(max_refinements + 1):
+            sur.errors = sur.error_against(eng, n_samples=n_check)
+            worst = max(sur.errors["thrust_max_rel"], sur.errors["tsfc_max_rel"])
+            if worst <= max_rel_error:
+                break
+            if refinement == max_refinements:
+                raise ValueError(
+                    f"Surrogate error {worst:.3%} (thrust {sur.errors['thrust_max_rel']:.3%}, "
+                    f"TSFC {sur.errors['tsfc_max_rel']:.3%}) exceeds bound {max_rel_error:.3%} "
+                    f"after {max_refinements} refinements")
+            sur = sur.refined(eng)
+
+    if cache_file is not None:
+        sur.save(cache_file)
+    _SURROGATES[key] = sur
+    return sur
+
+
+# --- helpers ---------------------------------------------------------------------------
+def _query_engine(eng, lever, mach, altitude_ft):
+    """One thrust + TSFC evaluation; (nan, nan) where the engine rejects the point."""
+    try:
+        Tv = eng.get_thrust_with_lever_position(float(lever), float(mach), float(altitude_ft))
+        sfc = eng.get_tsfc()
+    except Exception:
+        return np.nan, np.nan
+    if not (np.isfinite(Tv) and np.isfinite(sfc)) or Tv < 0 or sfc < 0:
+        return np.nan, np.nan
+    return float(Tv), float(sfc)
+
+
+def _locate(grid, x):
+    """Cell index and fractional position of x in a sorted grid (clamped to its range)."""
+    # searching the interior nodes gives the clamped cell index directly; clamping the
+    # weight afterwards equals clamping x first (bit for bit with _locate_scalar)
+    i = np.searchsorted(grid[1:-1], x, side="right")
+    w = (x - grid[i]) / (grid[i + 1] - grid[i])
+    return i, np.minimum(np.maximum(w, 0.0), 1.0)
+
+
+def _locate_scalar(grid, x):
+    """Scalar twin of _locate on a plain list."""
+    x = min(max(x, grid[0]), grid[-1])
+    i = min(max(bisect_right(grid, x) - 1, 0), len(grid) - 2)
+    return i, (x - grid[i]) / (grid[i + 1] - grid[i])
+
+
+def _midpoint_refine(grid):
+    mids = 0.5 * (grid[:-1] + grid[1:])
+    return np.sort(np.concatenate([grid, mids]))
@@ -0,0 +1,195 @@
+import os
+import pickle
+from collections import OrderedDict
+from pathlib import Path
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Bounded mapping with least-recently-used eviction and hit/miss counters.
+    With `journal` set to a list, every put() is also recorded there as (key, value).
+    """
+
+    def __init__(self, maxsize=100_000):
+        self.maxsize = int(maxsize)
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.journal = None
+
+    def get(self, key, default=None):
+        value = self.data.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.data.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if self.journal is not None:
+            self.journal.append((key, value))
+        self.data[key] = value
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self.data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class LeverCache:
+    """
+    Memoized lever solutions in front of find_lever_for_thrust.
+
+    Two LRU levels, both keyed on the flight condition quantized with `mach_tol` and
+    `alt_tol_ft`:
+      - solutions: (mach, alt_ft, T_req per engine) -> (lever, thrust, thrust_limited),
+        T_req quantized with `thrust_tol` [N]
+      - curves:    (mach, alt_ft) -> engine thrust on the default lever grid, i.e. the
+        engine calls of the grid scan
+
+    The climb kinematics do not depend on the aerodynamic constants, so after changing
+    only those the required thrust moves (solution misses) but the flight conditions
+    repeat and the engine curves still hit. A cache belongs to one engine: `fingerprint`
+    (e.g. sweep.lever_cache_fingerprint) is stored with the entries, and files written
+    for another fingerprint are ignored on load.
+
+    With `path`, the cache is loaded from that pickle (plus any per-process shards
+    written next to it, see save) and save() without arguments writes back to it.
+    """
+
+    def __init__(self, mach_tol=1e-4, alt_tol_ft=1.0, thrust_tol=1.0, maxsize=200_000, path=None,
+                 fingerprint=None):
+        self.mach_tol = float(mach_tol)
+        self.alt_tol_ft = float(alt_tol_ft)
+        self.thrust_tol = float(thrust_tol)
+        self.fingerprint = fingerprint
+        self.solutions = LRUCache(maxsize)
+        self.curves = LRUCache(maxsize)
+        self.path = None if path is None else Path(path)
+        if self.path is not None:
+            self.load(self.path)
+            self._start_journal()
+
+    # --- keys ---------------------------------------------------------------------------
+    def curve_key(self, mach, altitude_ft):
+        return (round(float(mach) / self.mach_tol), round(float(altitude_ft) / self.alt_tol_ft))
+
+    def solution_key(self, required_thrust_per_engine, mach, altitude_ft):
+        return self.curve_key(mach, altitude_ft) + (round(float(required_thrust_per_engine) / self.thrust_tol),)
+
+    # --- statistics ---------------------------------------------------------------------
+    def stats(self):
+        return {"solutions": self.solutions.stats(), "curves": self.curves.stats()}
+
+    def counters(self):
+        """(solution hits, solution misses, curve hits, curve misses), for deltas per run."""
+        return (self.solutions.hits, self.solutions.misses, self.curves.hits, self.curves.misses)
+
+    def clear(self):
+        journal = self.solutions.journal is not None
+        self.solutions = LRUCache(self.solutions.maxsize)
+        self.curves = LRUCache(self.curves.maxsize)
+        if journal:
+            self._start_journal()
+
+    # --- persistence --------------------------------------------------------------------
+    def _start_journal(self):
+        self.solutions.journal, self.curves.journal = [], []
+
+    def _payload(self, solutions, curves):
+        return {
+            "tolerances": (self.mach_tol, self.alt_tol_ft, self.thrust_tol),
+            "fingerprint": self.fingerprint,
+            "solutions": solutions,
+            "curves": curves,
+        }
+
+    def save(self, path=None, shard=None, new_only=False):
+        """
+        Pickle the entries to `path` (default: the constructor path). With `shard`
+        (e.g. a worker pid) they go to '<stem>.<shard><suffix>' instead, so several
+        processes can persist without overwriting each other; load() merges shards.
+
+        With `new_only`, only the entries put since the cache was loaded or last saved
+        (it must have been opened with a `path`) are appended to the file as one more
+        record, so repeated saves cost the new entries rather than the whole cache.
+        """
+        path = Path(self.path if path is None else path)
+        if shard is not None:
+            path = path.with_name(f"{path.stem}.{shard}{path.suffix}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if new_only:
+            if self.solutions.journal is None:
+                raise ValueError("save(new_only=True) needs a cache opened with a path")
+            if self.solutions.journal or self.curves.journal:
+                with open(path, "ab") as f:
+                    pickle.dump(self._payload(self.solutions.journal, self.curves.journal), f,
+                                protocol=pickle.HIGHEST_PROTOCOL)
+        else:
+            tmp = path.with_name(path.name + ".tmp")
+            with open(tmp, "wb") as f:
+                pickle.dump(self._payload(list(self.solutions.data.items()),
+                                          list(self.curves.data.items())),
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        if self.solutions.journal is not None:
+            self._start_journal()
+        return path
+
+    def load(self, path):
+        """
+        Merge entries from `path` and its shards (every record of each file). Records with
+        other tolerances or another engine fingerprint are skipped.
+        """
+        path = Path(path)
+        files = [path] + sorted(path.parent.glob(f"{path.stem}.*{path.suffix}"))
+        for file in files:
+            if not file.is_file() or file.name.endswith(".tmp"):
+                continue
+            skipped = set()
+            for payload in _records(file):
+                if tuple(payload.get("tolerances", ())) != (self.mach_tol, self.alt_tol_ft, self.thrust_tol):
+                    skipped.add("different tolerances")
+                    continue
+                if payload.get("fingerprint") != self.fingerprint:
+                    skipped.add("another engine fingerprint")
+                    continue
+                for key, value in payload["solutions"]:
+                    self.solutions.put(key, value)
+                for key, value in payload["curves"]:
+                    self.curves.put(key, value)
+            if skipped:
+                print(f"[WARNING] Lever cache {file}: ignored entries with {' and '.join(sorted(skipped))}")
+
+    def shards(self, path=None):
+        path = Path(self.path if path is None else path)
+        return sorted(path.parent.glob(f"{path.stem}.*{path.suffix}"))
+
+
+def _records(file):
+    """Yield the pickled records of a cache file; a torn trailing record ends the file."""
+    try:
+        with open(file, "rb") as f:
+            while True:
+                try:
+                    yield pickle.load(f)
+                except EOFError:
+                    return
+    except (OSError, pickle.UnpicklingError) as e:
+        print(f"[WARNING] Could not read lever cache {file}: {e}")
@@ -0,0 +1,163 @@
+import numpy as np
+from bisect import bisect_left
+
+from engine_surrogate import EngineSurrogate, _locate, _locate_scalar
+from pyengine.stateless import as_stateless
+
+
+class InverseLeverSolver:
+    """
+    Lever solver on a precomputed monotone thrust surface.
+
+    For every (Mach, altitude_ft) grid cell the lever→thrust curve is tabulated once and
+    made non-decreasing (running maximum, as find_lever_for_thrust does per step). A query
+    blends the four surrounding curves bilinearly (a convex combination of monotone curves
+    stays monotone) and inverts the result by bracketing + linear interpolation, so a
+    required thrust maps to a lever without any engine call.
+
+    With `confirm=True` the solver makes one engine call at the solved lever and returns
+    that thrust instead of the tabulated one (the equivalent of allow_refine).
+    """
+
+    def __init__(self, levers, machs, altitudes_ft, thrust, confirm=False):
+        self.levers = np.asarray(levers, dtype=float)
+        self.machs = np.asarray(machs, dtype=float)
+        self.altitudes_ft = np.asarray(altitudes_ft, dtype=float)
+        self.confirm = confirm
+
+        # (mach, alt, lever) so one flight condition owns a contiguous lever curve
+        curves = np.moveaxis(np.asarray(thrust, dtype=float), 0, -1)
+        curves = np.fmax.accumulate(curves, axis=-1)  # leading NaNs stay NaN
+        self.curves = curves
+        # flat (mach*alt, lever) view: the four corner curves of a query in one gather
+        self._curves_flat = curves.reshape(-1, self.levers.size)
+        self._corner_offsets = (_CORNERS[:, 0] * self.altitudes_ft.size + _CORNERS[:, 1])[:, None]
+
+        self._levers_list = self.levers.tolist()
+        self._machs_list = self.machs.tolist()
+        self._alts_list = self.altitudes_ft.tolist()
+        self._curves_nested = curves.tolist()
+
+    @classmethod
+    def from_surrogate(cls, surrogate, confirm=False):
+        return cls(surrogate.levers, surrogate.machs, surrogate.altitudes_ft,
+                   surrogate.thrust_table, confirm=confirm)
+
+    @classmethod
+    def from_engine(cls, eng, levers=None, machs=None, altitudes_ft=None, confirm=False):
+        return cls.from_surrogate(EngineSurrogate.from_engine(eng, levers, machs, altitudes_ft),
+                                  confirm=confirm)
+
+    # --- scalar path (used once per integration step) ----------------------------------
+    def solve(self, required_thrust_per_engine, mach, altitude_ft, engine=None):
+        """
+        Same contract as find_lever_for_thrust, but per-engine thrust in:
+        returns (lever, per_engine_thrust, thrust_limited_flag), (None, None, False)
+        where the flight condition lies outside the valid deck.
+        """
+        T_req = float(required_thrust_per_engine)
+        curve = self._blend_scalar(float(mach), float(altitude_ft))
+        if curve is None:
+            return None, None, False
+
+        T0, T1 = curve[0], curve[-1]
+        if T0 >= T_req:                      # idle meets demand
+            return 0.0, T0, False
+        if T1 < T_req:                       # max insufficient -> clamp
+            return 1.0, T1, True
+
+        k = bisect_left(curve, T_req)        # curve[k-1] < T_req <= curve[k]
+        li, lj = self._levers_list[k - 1], self._levers_list[k]
+        Ti, Tj = curve[k - 1], curve[k]
+        lv = li + (T_req - Ti) * (lj - li) / (Tj - Ti)
+        Tv = T_req
+        if self.confirm and engine is not None:
+            Tv = _confirm_thrust(engine, lv, mach, altitude_ft, T_req)
+        return float(lv), float(Tv), False
+
+    def _blend_scalar(self, mach, altitude_ft):
+        im, wm = _locate_scalar(self._machs_list, mach)
+        ia, wa = _locate_scalar(self._alts_list, altitude_ft)
+        curve = [0.0] * len(self._levers_list)
+        for dm, fm in ((0, 1.0 - wm), (1, wm)):
+            if fm <= 0.0:
+                continue
+            for da, fa in ((0, 1.0 - wa), (1, wa)):
+                if fa <= 0.0:
+                    continue
+                w = fm * fa
+                corner = self._curves_nested[im + dm][ia + da]
+                curve = [c + w * v for c, v in zip(curve, corner)]
+        if any(c != c for c in curve):       # NaN anywhere: cell touches the invalid region
+            return None
+        return curve
+
+    # --- vectorized path (batched integrators, envelope studies) -----------------------
+    def solve_many(self, required_thrust_per_engine, mach, altitude_ft):
+        """
+        Vectorized solve over broadcast arrays.
+
+        Returns a dict of arrays: 'lever', 'thrust' (per engine, NaN where invalid),
+        'valid', 'idle' (idle thrust already meets demand) and 'thrust_limited' (max
+        lever cannot meet demand).
+        """
+        T_req, mach, altitude_ft = _broadcast(required_thrust_per_engine, mach, altitude_ft)
+        shape = T_req.shape
+        T_req, mach, altitude_ft = T_req.ravel(), mach.ravel(), altitude_ft.ravel()
+
+        im, wm = _locate(self.machs, mach)
+        ia, wa = _locate(self.altitudes_ft, altitude_ft)
+        # the four (Mach, alt) corner curves in one gather: (4, N, n_levers)
+        corners = self._curves_flat[(im * self.altitudes_ft.size + ia) + self._corner_offsets]
+        um, ua = 1.0 - wm, 1.0 - wa  # weights in _CORNERS order (direct products, no stacking)
+        w = np.array([um * ua, um * wa, wm * ua, wm * wa])[:, :, None]
+        curve = np.where(w > 0.0, w * corners, 0.0).sum(axis=0)
+
+        valid = np.all(np.isfinite(curve), axis=1)
+        T0, T1 = curve[:, 0], curve[:, -1]
+        idle = valid & (T0 >= T_req)
+        limited = valid & ~idle & (T1 < T_req)
+        inside = valid & ~idle & ~limited
+
+        k = np.minimum(np.maximum(np.sum(curve < T_req[:, None], axis=1), 1), self.levers.size - 1)
+        rows = np.arange(T_req.size)
+        Ti, Tj = curve[rows, k - 1], curve[rows, k]
+        li, lj = self.levers[k - 1], self.levers[k]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            lv_inside = li + (T_req - Ti) * (lj - li) / (Tj - Ti)
+
+        lever = np.where(inside, lv_inside, np.nan)
+        lever[idle] = 0.0
+        lever[limited] = 1.0
+        thrust = np.where(inside, T_req, np.nan)
+        thrust[idle] = T0[idle]
+        thrust[limited] = T1[limited]
+        return {
+            "lever": lever.reshape(shape),
+            "thrust": thrust.reshape(shape),
+            "valid": valid.reshape(shape),
+            "idle": idle.reshape(shape),
+            "thrust_limited": limited.reshape(shape),
+        }
+
+
+_CORNERS = np.array([(dm, da) for dm in (0, 1) for da in (0, 1)])
+
+
+# --- helpers ---------------------------------------------------------------------------
+def _broadcast(*xs):
+    """Float arrays of a common shape (skips np.broadcast_arrays when the shapes already agree)."""
+    xs = [np.asarray(x, dtype=float) for x in xs]
+    if all(x.shape == xs[0].shape for x in xs[1:]):
+        return xs
+    return np.broadcast_arrays(*xs)
+
+
+def _confirm_thrust(engine, lever, mach, altitude_ft, fallback):
+    try:
+        Tv = as_stateless(engine).evaluate(float(lever), float(mach), float(altitude_ft))[0]
+    except Exception:
+        return fallback
+    if not np.isfinite(Tv) or Tv < 0:
+        return fallback
+    return float(Tv)
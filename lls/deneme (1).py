@@ -14,15 +14,8 @@ mach        = 0.76
 altitude_ft = 10_000
 levers      = np.linspace(0.0, 0.99, 100)
 
-# ── 4. gather data without repeated np.append ────────
-thrust_N = []
-tsfc     = []
-
-for lv in levers:
-    thrust_N.append(eng.get_thrust_with_lever_position(lv, mach, altitude_ft))
-    tsfc.append(eng.get_tsfc())
-
-tsfc = np.asarray(tsfc)
+# ── 4. gather data in one stateless call ─────────────
+thrust_N, tsfc, fuel_flow = engine.as_stateless(eng).evaluate(levers, mach, altitude_ft)
 
 # ── 5. plot ──────────────────────────────────────────
 plt.plot(levers * 100, tsfc)
@@ -1,141 +1,320 @@
-import numpy as np
-import pandas as pd
+"""
+Engine envelope scan over (lever, altitude_ft, Mach).
+
+Importable module + CLI. The grid is split into chunks (one lever × a block of
+altitudes each) that are scanned in parallel worker processes, every worker with its
+own Engine. Each finished chunk is written to disk immediately (npz, or Parquet when
+pyarrow is available), so an interrupted scan resumes by skipping chunks already
+present. Once all chunks exist they are merged into the detailed CSV and summaries.
+
+    python eng_envelope.py --mach-step 0.01 --alt-step-ft 500 --levers 51 --workers 16
+"""
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-import pyengine as engine
 
-# === USER SETTINGS ===
-STUB = Path(r"D:\Icloud\iCloudDrive\Master Thesis\Mission Analysis Code\lls\stubs\engines\PW1127G-JM")
-OUT_DIR = Path(r"D:\Icloud\iCloudDrive\Master Thesis\Mission Analysis Code\lls\envelope_scan")
-OUT_DIR.mkdir(parents=True, exist_ok=True)
+import numpy as np
 
-OUTPUT_FILE  = OUT_DIR / "engine_envelope.csv"
-SUMMARY_ALT  = OUT_DIR / "engine_envelope_summary_by_alt.csv"
-SUMMARY_LEV  = OUT_DIR / "engine_envelope_summary_by_lever.csv"
-SUMMARY_ALL  = OUT_DIR / "engine_envelope_overall_bounds.csv"
+# === DEFAULT SETTINGS ===
+HERE = Path(__file__).resolve().parent
+STUB = HERE / "stubs" / "engines" / "PW1127G-JM"
+OUT_DIR = HERE / "envelope_scan"
 
 MACH_MIN, MACH_MAX, MACH_STEP = 0.0, 1.0, 0.02
 ALT_MIN_FT, ALT_MAX_FT, ALT_STEP_FT = 0, 40000, 2000
-LEVERS = np.linspace(0.0, 1.0, 6)  # 0.0, 0.2, ..., 1.0
+N_LEVERS = 6  # 0.0, 0.2, ..., 1.0
+ALTS_PER_CHUNK = 4
+
+COLUMNS = ["Lever", "Altitude_ft", "Mach", "Thrust_N", "TSFC_kg_per_Ns",
+           "TSFC_unit_flag", "Valid", "Error"]
+
 
-# === ENGINE ===
-eng = engine.Engine(str(STUB))
+# === Grids ===
+def make_grids(mach_min=MACH_MIN, mach_max=MACH_MAX, mach_step=MACH_STEP,
+               alt_min_ft=ALT_MIN_FT, alt_max_ft=ALT_MAX_FT, alt_step_ft=ALT_STEP_FT,
+               n_levers=N_LEVERS):
+    """Stable grids (avoid float arange drift)."""
+    num_mach = int(round((mach_max - mach_min) / mach_step)) + 1
+    mach_grid = np.linspace(mach_min, mach_max, num_mach)
+    alt_grid = np.arange(alt_min_ft, alt_max_ft + alt_step_ft, alt_step_ft, dtype=float)
+    levers = np.linspace(0.0, 1.0, n_levers)
+    return levers, alt_grid, mach_grid
+
+
+def make_chunks(levers, alt_grid, alts_per_chunk=ALTS_PER_CHUNK):
+    """Chunk = (chunk_id, lever, altitude block). Ids depend only on the grid."""
+    chunks = []
+    for lever in levers:
+        for start in range(0, len(alt_grid), alts_per_chunk):
+            chunks.append((len(chunks), float(lever), alt_grid[start:start + alts_per_chunk]))
+    return chunks
+
+
+def grid_key(levers, alt_grid, mach_grid, alts_per_chunk):
+    """Short hash naming the chunk directory, so a different grid never reuses chunks."""
+    spec = json.dumps([levers.tolist(), alt_grid.tolist(), mach_grid.tolist(), alts_per_chunk])
+    return hashlib.sha1(spec.encode()).hexdigest()[:12]
 
-# === Stable grids (avoid float arange drift) ===
-num_mach = int(round((MACH_MAX - MACH_MIN) / MACH_STEP)) + 1
-mach_grid = np.linspace(MACH_MIN, MACH_MAX, num_mach)
-alt_grid  = np.arange(ALT_MIN_FT, ALT_MAX_FT + ALT_STEP_FT, ALT_STEP_FT, dtype=float)
 
 # === Scan ===
-rows = []
-for lever in LEVERS:
-    for alt_ft in alt_grid:
-        for mach in mach_grid:
-            try:
-                thrust = eng.get_thrust_with_lever_position(float(lever), float(mach), float(alt_ft))
-                tsfc = eng.get_tsfc()  # uses last evaluated state (lever, mach, altitude)
-                # Heuristic unit check for TSFC: if too large, assume kg/(N·hr) and convert to kg/(N·s)
-                tsfc_unit = "kg/(N·s)"
-                if tsfc > 1e-3:
-                    tsfc /= 3600.0
-                    tsfc_unit = "kg/(N·hr)->kg/(N·s)"
-                valid = (np.isfinite(thrust) and np.isfinite(tsfc) and thrust >= 0.0 and tsfc >= 0.0)
-                rows.append({
-                    "Lever": float(lever),
-                    "Altitude_ft": float(alt_ft),
-                    "Mach": float(mach),
-                    "Thrust_N": float(thrust) if valid else None,
-                    "TSFC_kg_per_Ns": float(tsfc) if valid else None,
-                    "TSFC_unit_flag": tsfc_unit if valid else "",
-                    "Valid": int(valid),
-                    "Error": "" if valid else "non-finite or negative",
-                })
-            except Exception as e:
-                rows.append({
-                    "Lever": float(lever),
-                    "Altitude_ft": float(alt_ft),
-                    "Mach": float(mach),
-                    "Thrust_N": None,
-                    "TSFC_kg_per_Ns": None,
-                    "TSFC_unit_flag": "",
-                    "Valid": 0,
-                    "Error": str(e)[:200],
-                })
-
-df = pd.DataFrame(rows)
-df.to_csv(OUTPUT_FILE, index=False)
-print(f"[INFO] Detailed envelope saved: {OUTPUT_FILE}  ({len(df)} rows)")
-
-# === Overall boundary summary (only where Valid==1) ===
-valid = df[df["Valid"] == 1].copy()
-if not valid.empty:
-    overall = pd.DataFrame([{
-        "mach_min": float(valid["Mach"].min()),
-        "mach_max": float(valid["Mach"].max()),
-        "altitude_min_ft": float(valid["Altitude_ft"].min()),
-        "altitude_max_ft": float(valid["Altitude_ft"].max()),
-        "lever_min": float(valid["Lever"].min()),
-        "lever_max": float(valid["Lever"].max()),
-        "tsfc_min_kg_per_Ns": float(valid["TSFC_kg_per_Ns"].min()),
-        "tsfc_max_kg_per_Ns": float(valid["TSFC_kg_per_Ns"].max()),
-        "num_valid_points": int(valid.shape[0]),
-        "num_total_points": int(df.shape[0]),
-    }])
-else:
-    overall = pd.DataFrame([{
-        "mach_min": None, "mach_max": None,
-        "altitude_min_ft": None, "altitude_max_ft": None,
-        "lever_min": None, "lever_max": None,
-        "tsfc_min_kg_per_Ns": None, "tsfc_max_kg_per_Ns": None,
-        "num_valid_points": 0,
-        "num_total_points": int(df.shape[0]),
-    }])
-
-overall.to_csv(SUMMARY_ALL, index=False)
-print(f"[INFO] Overall bounds saved: {SUMMARY_ALL}")
-
-# === Per-altitude summary: Mach fully valid across all levers ===
-df["Mach_bin"] = df["Mach"].round(3)
-summary_alt = []
-for alt_ft, group in df.groupby("Altitude_ft", sort=True):
-    fully_valid_by_mach = group.groupby("Mach_bin")["Valid"].sum() == len(LEVERS)
-    mach_valid = fully_valid_by_mach[fully_valid_by_mach].index.to_numpy()
-    sub = valid[valid["Altitude_ft"] == alt_ft]
-    tsfc_min = float(sub["TSFC_kg_per_Ns"].min()) if not sub.empty else None
-    tsfc_max = float(sub["TSFC_kg_per_Ns"].max()) if not sub.empty else None
-    summary_alt.append({
-        "Altitude_ft": float(alt_ft),
-        "num_points": int(len(group)),
-        "valid_points": int(group["Valid"].sum()),
-        "mach_min_full_valid": float(mach_valid.min()) if mach_valid.size else None,
-        "mach_max_full_valid": float(mach_valid.max()) if mach_valid.size else None,
-        "tsfc_min_kg_per_Ns_at_alt": tsfc_min,
-        "tsfc_max_kg_per_Ns_at_alt": tsfc_max,
-        "any_valid": int(group["Valid"].any()),
-    })
-pd.DataFrame(summary_alt).sort_values("Altitude_ft").to_csv(SUMMARY_ALT, index=False)
-print(f"[INFO] Summary by altitude saved: {SUMMARY_ALT}")
-
-# === Per-lever summary: Mach/alt ranges where valid for each lever ===
-summary_lev = []
-for lever, group in valid.groupby("Lever", sort=True):
-    summary_lev.append({
-        "Lever": float(lever),
-        "mach_min_valid": float(group["Mach"].min()),
-        "mach_max_valid": float(group["Mach"].max()),
-        "altitude_min_ft_valid": float(group["Altitude_ft"].min()),
-        "altitude_max_ft_valid": float(group["Altitude_ft"].max()),
-        "tsfc_min_kg_per_Ns_at_lever": float(group["TSFC_kg_per_Ns"].min()),
-        "tsfc_max_kg_per_Ns_at_lever": float(group["TSFC_kg_per_Ns"].max()),
-        "valid_points_at_lever": int(group.shape[0]),
-    })
-pd.DataFrame(summary_lev).sort_values("Lever").to_csv(SUMMARY_LEV, index=False)
-print(f"[INFO] Summary by lever saved: {SUMMARY_LEV}")
-
-# === Console recap ===
-if not valid.empty:
-    print("[BOUNDS] Mach:", overall.loc[0, "mach_min"], "→", overall.loc[0, "mach_max"])
-    print("[BOUNDS] Altitude_ft:", overall.loc[0, "altitude_min_ft"], "→", overall.loc[0, "altitude_max_ft"])
-    print("[BOUNDS] Lever:", overall.loc[0, "lever_min"], "→", overall.loc[0, "lever_max"])
-    print("[BOUNDS] TSFC_kg_per_Ns:", overall.loc[0, "tsfc_min_kg_per_Ns"], "→", overall.loc[0, "tsfc_max_kg_per_Ns"])
-else:
-    print("[BOUNDS] No valid points found.")
+def scan_points(eng, lever, alt_grid, mach_grid):
+    """Evaluate one lever over alt_grid × mach_grid; returns a dict of column arrays."""
+    n = len(alt_grid) * len(mach_grid)
+    out = {
+        "Lever": np.full(n, float(lever)),
+        "Altitude_ft": np.repeat(np.asarray(alt_grid, dtype=float), len(mach_grid)),
+        "Mach": np.tile(np.asarray(mach_grid, dtype=float), len(alt_grid)),
+        "Thrust_N": np.full(n, np.nan),
+        "TSFC_kg_per_Ns": np.full(n, np.nan),
+        "TSFC_unit_flag": np.full(n, "", dtype=object),
+        "Valid": np.zeros(n, dtype=np.int8),
+        "Error": np.full(n, "", dtype=object),
+    }
+    if hasattr(eng, "evaluate"):
+        # stateless engines: the whole chunk in one array call
+        thrust, tsfc, _ = eng.evaluate(out["Lever"], out["Mach"], out["Altitude_ft"])
+        valid = np.isfinite(thrust) & np.isfinite(tsfc) & (thrust >= 0.0) & (tsfc >= 0.0)
+        out["Thrust_N"] = np.where(valid, thrust, np.nan)
+        out["TSFC_kg_per_Ns"] = np.where(valid, tsfc, np.nan)
+        out["TSFC_unit_flag"] = np.where(valid, "kg/(N·s)", "")
+        out["Valid"] = valid.astype(np.int8)
+        out["Error"] = np.where(valid, "", "non-finite or negative")
+        return out
+    for i in range(n):
+        try:
+            thrust = eng.get_thrust_with_lever_position(float(lever), float(out["Mach"][i]),
+                                                        float(out["Altitude_ft"][i]))
+            tsfc = eng.get_tsfc()  # uses last evaluated state (lever, mach, altitude)
+            # Heuristic unit check for TSFC: if too large, assume kg/(N·hr) and convert to kg/(N·s)
+            tsfc_unit = "kg/(N·s)"
+            if tsfc > 1e-3:
+                tsfc /= 3600.0
+                tsfc_unit = "kg/(N·hr)->kg/(N·s)"
+            valid = (np.isfinite(thrust) and np.isfinite(tsfc) and thrust >= 0.0 and tsfc >= 0.0)
+            if valid:
+                out["Thrust_N"][i] = float(thrust)
+                out["TSFC_kg_per_Ns"][i] = float(tsfc)
+                out["TSFC_unit_flag"][i] = tsfc_unit
+                out["Valid"][i] = 1
+            else:
+                out["Error"][i] = "non-finite or negative"
+        except Exception as e:
+            out["Error"][i] = str(e)[:200]
+    out["TSFC_unit_flag"] = out["TSFC_unit_flag"].astype(str)
+    out["Error"] = out["Error"].astype(str)
+    return out
+
+
+def _chunk_path(chunk_dir, chunk_id, fmt):
+    return Path(chunk_dir) / f"chunk_{chunk_id:05d}.{'parquet' if fmt == 'parquet' else 'npz'}"
+
+
+def write_chunk(path, columns, fmt):
+    """Write atomically (temp file + rename) so a killed scan never leaves a partial chunk."""
+    tmp = path.with_name(path.name + ".tmp")
+    if fmt == "parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        pq.write_table(pa.table(columns), tmp)
+    else:
+        with open(tmp, "wb") as f:
+            np.savez(f, **columns)
+    os.replace(tmp, path)
+
+
+def read_chunk(path):
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+        return {k: v.to_numpy(zero_copy_only=False) for k, v in pq.read_table(path).to_pydict().items()}
+    with np.load(path) as data:
+        return {k: data[k] for k in data.files}
+
+
+# === Worker side ===
+_ENGINE = None
+
+
+def _init_worker(stub_dir):
+    """Process initializer: one Engine per worker process."""
+    global _ENGINE
+    import pyengine as engine
+    _ENGINE = engine.get_engine(stub_dir)
+
+
+def _scan_chunk(chunk, mach_grid, chunk_dir, fmt):
+    chunk_id, lever, alts = chunk
+    columns = scan_points(_ENGINE, lever, alts, mach_grid)
+    write_chunk(_chunk_path(chunk_dir, chunk_id, fmt), columns, fmt)
+    return chunk_id, int(columns["Valid"].size)
+
+
+# === Driver ===
+def run_scan(stub=STUB, out_dir=OUT_DIR, levers=None, alt_grid=None, mach_grid=None,
+             alts_per_chunk=ALTS_PER_CHUNK, workers=None, fmt="npz"):
+    """
+    Scan every chunk that is not on disk yet and return the chunk directory.
+
+    Chunks live in out_dir/chunks_<grid hash>/, one file per chunk, written as each
+    completes. Re-running with the same grid skips existing chunks (resume).
+    """
+    if levers is None or alt_grid is None or mach_grid is None:
+        d_levers, d_alts, d_machs = make_grids()
+        levers = d_levers if levers is None else np.asarray(levers, dtype=float)
+        alt_grid = d_alts if alt_grid is None else np.asarray(alt_grid, dtype=float)
+        mach_grid = d_machs if mach_grid is None else np.asarray(mach_grid, dtype=float)
+
+    chunk_dir = Path(out_dir) / f"chunks_{grid_key(levers, alt_grid, mach_grid, alts_per_chunk)}"
+    chunk_dir.mkdir(parents=True, exist_ok=True)
+
+    chunks = make_chunks(levers, alt_grid, alts_per_chunk)
+    todo = [c for c in chunks if not _chunk_path(chunk_dir, c[0], fmt).exists()]
+    print(f"[INFO] {len(chunks) - len(todo)}/{len(chunks)} chunks already on disk in {chunk_dir}")
+    if not todo:
+        return chunk_dir
+
+    workers = workers or os.cpu_count() or 1
+    done = len(chunks) - len(todo)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(str(stub),)) as pool:
+        futures = [pool.submit(_scan_chunk, c, mach_grid, str(chunk_dir), fmt) for c in todo]
+        for fut in as_completed(futures):
+            fut.result()
+            done += 1
+            print(f"[INFO] chunk {done}/{len(chunks)} written")
+    return chunk_dir
+
+
+def load_scan(chunk_dir):
+    """Merge all chunk files of a scan into one DataFrame (sorted like the serial scan)."""
+    import pandas as pd
+    files = sorted(Path(chunk_dir).glob("chunk_*.npz")) + sorted(Path(chunk_dir).glob("chunk_*.parquet"))
+    frames = [pd.DataFrame(read_chunk(f)) for f in files]
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    df = pd.concat(frames, ignore_index=True)
+    df = df.sort_values(["Lever", "Altitude_ft", "Mach"], kind="stable").reset_index(drop=True)
+    df["Valid"] = df["Valid"].astype(int)
+    return df[COLUMNS]
+
+
+def write_summaries(df, n_levers, out_dir=OUT_DIR):
+    """Detailed CSV plus the overall / per-altitude / per-lever summaries."""
+    import pandas as pd
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    OUTPUT_FILE = out_dir / "engine_envelope.csv"
+    SUMMARY_ALT = out_dir / "engine_envelope_summary_by_alt.csv"
+    SUMMARY_LEV = out_dir / "engine_envelope_summary_by_lever.csv"
+    SUMMARY_ALL = out_dir / "engine_envelope_overall_bounds.csv"
+
+    df.to_csv(OUTPUT_FILE, index=False)
+    print(f"[INFO] Detailed envelope saved: {OUTPUT_FILE}  ({len(df)} rows)")
+
+    # === Overall boundary summary (only where Valid==1) ===
+    valid = df[df["Valid"] == 1].copy()
+    if not valid.empty:
+        overall = pd.DataFrame([{
+            "mach_min": float(valid["Mach"].min()),
+            "mach_max": float(valid["Mach"].max()),
+            "altitude_min_ft": float(valid["Altitude_ft"].min()),
+            "altitude_max_ft": float(valid["Altitude_ft"].max()),
+            "lever_min": float(valid["Lever"].min()),
+            "lever_max": float(valid["Lever"].max()),
+            "tsfc_min_kg_per_Ns": float(valid["TSFC_kg_per_Ns"].min()),
+            "tsfc_max_kg_per_Ns": float(valid["TSFC_kg_per_Ns"].max()),
+            "num_valid_points": int(valid.shape[0]),
+            "num_total_points": int(df.shape[0]),
+        }])
+    else:
+        overall = pd.DataFrame([{
+            "mach_min": None, "mach_max": None,
+            "altitude_min_ft": None, "altitude_max_ft": None,
+            "lever_min": None, "lever_max": None,
+            "tsfc_min_kg_per_Ns": None, "tsfc_max_kg_per_Ns": None,
+            "num_valid_points": 0,
+            "num_total_points": int(df.shape[0]),
+        }])
+
+    overall.to_csv(SUMMARY_ALL, index=False)
+    print(f"[INFO] Overall bounds saved: {SUMMARY_ALL}")
+
+    # === Per-altitude summary: Mach fully valid across all levers ===
+    df = df.assign(Mach_bin=df["Mach"].round(3))
+    summary_alt = []
+    for alt_ft, group in df.groupby("Altitude_ft", sort=True):
+        fully_valid_by_mach = group.groupby("Mach_bin")["Valid"].sum() == n_levers
+        mach_valid = fully_valid_by_mach[fully_valid_by_mach].index.to_numpy()
+        sub = valid[valid["Altitude_ft"] == alt_ft]
+        tsfc_min = float(sub["TSFC_kg_per_Ns"].min()) if not sub.empty else None
+        tsfc_max = float(sub["TSFC_kg_per_Ns"].max()) if not sub.empty else None
+        summary_alt.append({
+            "Altitude_ft": float(alt_ft),
+            "num_points": int(len(group)),
+            "valid_points": int(group["Valid"].sum()),
+            "mach_min_full_valid": float(mach_valid.min()) if mach_valid.size else None,
+            "mach_max_full_valid": float(mach_valid.max()) if mach_valid.size else None,
+            "tsfc_min_kg_per_Ns_at_alt": tsfc_min,
+            "tsfc_max_kg_per_Ns_at_alt": tsfc_max,
+            "any_valid": int(group["Valid"].any()),
+        })
+    pd.DataFrame(summary_alt).sort_values("Altitude_ft").to_csv(SUMMARY_ALT, index=False)
+    print(f"[INFO] Summary by altitude saved: {SUMMARY_ALT}")
+
+    # === Per-lever summary: Mach/alt ranges where valid for each lever ===
+    summary_lev = []
+    for lever, group in valid.groupby("Lever", sort=True):
+        summary_lev.append({
+            "Lever": float(lever),
+            "mach_min_valid": float(group["Mach"].min()),
+            "mach_max_valid": float(group["Mach"].max()),
+            "altitude_min_ft_valid": float(group["Altitude_ft"].min()),
+            "altitude_max_ft_valid": float(group["Altitude_ft"].max()),
+            "tsfc_min_kg_per_Ns_at_lever": float(group["TSFC_kg_per_Ns"].min()),
+            "tsfc_max_kg_per_Ns_at_lever": float(group["TSFC_kg_per_Ns"].max()),
+            "valid_points_at_lever": int(group.shape[0]),
+        })
+    pd.DataFrame(summary_lev).sort_values("Lever").to_csv(SUMMARY_LEV, index=False)
+    print(f"[INFO] Summary by lever saved: {SUMMARY_LEV}")
+
+    # === Console recap ===
+    if not valid.empty:
+        print("[BOUNDS] Mach:", overall.loc[0, "mach_min"], "→", overall.loc[0, "mach_max"])
+        print("[BOUNDS] Altitude_ft:", overall.loc[0, "altitude_min_ft"], "→", overall.loc[0, "altitude_max_ft"])
+        print("[BOUNDS] Lever:", overall.loc[0, "lever_min"], "→", overall.loc[0, "lever_max"])
+        print("[BOUNDS] TSFC_kg_per_Ns:", overall.loc[0, "tsfc_min_kg_per_Ns"], "→", overall.loc[0, "tsfc_max_kg_per_Ns"])
+    else:
+        print("[BOUNDS] No valid points found.")
+
+
+# === CLI ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Parallel, resumable engine envelope scan.")
+    parser.add_argument("--stub", type=Path, default=STUB, help="engine stub directory")
+    parser.add_argument("--out-dir", type=Path, default=OUT_DIR, help="output directory")
+    parser.add_argument("--mach-min", type=float, default=MACH_MIN)
+    parser.add_argument("--mach-max", type=float, default=MACH_MAX)
+    parser.add_argument("--mach-step", type=float, default=MACH_STEP)
+    parser.add_argument("--alt-min-ft", type=float, default=ALT_MIN_FT)
+    parser.add_argument("--alt-max-ft", type=float, default=ALT_MAX_FT)
+    parser.add_argument("--alt-step-ft", type=float, default=ALT_STEP_FT)
+    parser.add_argument("--levers", type=int, default=N_LEVERS, help="number of lever positions in [0, 1]")
+    parser.add_argument("--alts-per-chunk", type=int, default=ALTS_PER_CHUNK)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--format", choices=("npz", "parquet"), default="npz", help="chunk file format")
+    parser.add_argument("--no-merge", action="store_true", help="only scan chunks, skip CSV/summaries")
+    args = parser.parse_args(argv)
+
+    levers, alt_grid, mach_grid = make_grids(args.mach_min, args.mach_max, args.mach_step,
+                                             args.alt_min_ft, args.alt_max_ft, args.alt_step_ft,
+                                             args.levers)
+    chunk_dir = run_scan(args.stub, args.out_dir, levers, alt_grid, mach_grid,
+                         alts_per_chunk=args.alts_per_chunk, workers=args.workers, fmt=args.format)
+    if not args.no_merge:
+        write_summaries(load_scan(chunk_dir), len(levers), args.out_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Stateless engine queries.
+
+    ``evaluate(lever, mach, altitude) -> (thrust, tsfc, fuel_flow)`` per engine, in N,
+    kg/(N·s) and kg/s, for scalars or broadcast arrays, without touching any "last
+    evaluated state". DeckEngine and EngineSurrogate implement it natively; any other
+    engine (the py11engine binary) is wrapped by StatelessEngine.
+"""
+import threading
+
+import numpy as np
+
+TSFC_PER_HOUR_THRESHOLD = 1e-3
+
+
+def tsfc_to_si(tsfc):
+    """Unit heuristic used throughout: values above 1e-3 are kg/(N·hr) → kg/(N·s)."""
+    if isinstance(tsfc, float):
+        return tsfc / 3600.0 if tsfc > TSFC_PER_HOUR_THRESHOLD else tsfc
+    tsfc = np.asarray(tsfc, dtype=float)
+    return np.where(tsfc > TSFC_PER_HOUR_THRESHOLD, tsfc / 3600.0, tsfc)
+
+
+class StatelessEngine:
+    """
+    evaluate() on top of an engine that only has the stateful pair
+    get_thrust_with_lever_position / get_tsfc.
+
+    The pair runs under a lock, so one adapter may be shared across threads; get it
+    through as_stateless, which hands out the same adapter (and lock) for an engine on
+    every call. Points the engine cannot evaluate (exception, non-finite) come back as
+    NaN. Every other attribute is forwarded to the wrapped engine.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
+
+    def evaluate(self, lever, mach, altitude):
+        if _is_scalar(lever) and _is_scalar(mach) and _is_scalar(altitude):
+            return self._evaluate_scalar(float(lever), float(mach), float(altitude))
+        lever, mach, altitude = np.broadcast_arrays(
+            np.asarray(lever, dtype=float), np.asarray(mach, dtype=float),
+            np.asarray(altitude, dtype=float))
+        out = np.array([self._evaluate_scalar(l, m, a) for l, m, a
+                        in zip(lever.ravel().tolist(), mach.ravel().tolist(),
+                               altitude.ravel().tolist())], dtype=float).reshape(-1, 3)
+        return tuple(out[:, k].reshape(lever.shape) for k in range(3))
+
+    def _evaluate_scalar(self, lever, mach, altitude):
+        try:
+            with self._lock:
+                thrust = float(self.engine.get_thrust_with_lever_position(lever, mach, altitude))
+                tsfc = float(self.engine.get_tsfc())
+        except Exception:
+            return np.nan, np.nan, np.nan
+        tsfc = tsfc_to_si(tsfc)
+        return thrust, tsfc, max(tsfc, 0.0) * max(thrust, 0.0)
+
+
+# engines without an instance __dict__ (e.g. a pybind11 class): id -> {engine, adapter},
+# holding the engine so its id is never reused
+_ADAPTERS = {}
+_ADAPTERS_LOCK = threading.Lock()
+
+
+def as_stateless(engine):
+    """
+    `engine` itself if it already has evaluate(), otherwise its StatelessEngine wrapper.
+    One wrapper per engine (stored on the engine), so every caller and thread serializes
+    on the same lock around the engine's stateful pair.
+    """
+    if hasattr(engine, "evaluate"):
+        return engine
+    with _ADAPTERS_LOCK:
+        if hasattr(engine, "__dict__"):
+            slot = vars(engine)
+        else:
+            slot = _ADAPTERS.setdefault(id(engine), {"engine": engine})
+        adapter = slot.get("_stateless_adapter")
+        if adapter is None:
+            adapter = slot["_stateless_adapter"] = StatelessEngine(engine)
+    return adapter
+
+
+def _is_scalar(x):
+    return isinstance(x, (int, float))
@@ -1,13 +1,279 @@
-from climb import generate_strategy, simulate_climb_path, target_altitude
-from plotting import interactive_plot
+import argparse
+import itertools
+import sys
+from pathlib import Path
+
+# Only the `plot` command imports matplotlib/tkinter (via plotting); `sweep`, `mission`
+# and `optimize` run headless, so they work on nodes without a display.
+
+
+# (1) Commands --------------------------------------------------------------------------
+def run_plot(args):
+    from climb import generate_strategy, simulate_climb_path, target_altitude
+    from plotting import interactive_plot
+
+    executor = None
+    if args.processes:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=args.workers)
 
-def main():
     print("Starting full simulation ...")
-    interactive_plot(
-        generate_strategy_func=generate_strategy,
-        simulate_func=simulate_climb_path,
-        target_altitude=target_altitude
-    )
+    try:
+        interactive_plot(
+            generate_strategy_func=generate_strategy,
+            simulate_func=simulate_climb_path,
+            target_altitude=target_altitude,
+            executor=executor,
+            max_workers=args.workers,
+            case_func=_plot_case if args.processes else None,
+        )
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _plot_case(profile, altitude_fraction):
+    """Worker-process job for `plot --processes` (strategy closures do not pickle)."""
+    import climb
+    return climb.simulate_climb_path(climb.strategy_for(profile, altitude_fraction), altitude_fraction)
+
+
+def run_sweep_command(args):
+    import climb
+    from sweep import build_cases, run_sweep
+
+    unknown = set(args.profiles or ()) - set(climb.PROFILES)
+    if unknown:
+        raise SystemExit(f"[ERROR] Unknown profile(s): {', '.join(sorted(unknown))}")
+    cases = build_cases(profiles=args.profiles or climb.PROFILES,
+                        altitude_fractions=args.altitude_fractions,
+                        initial_masses=args.masses, E_DOT_cmds=args.edots, dts=args.dts,
+                        delta_isas=args.delta_isa)
+    if args.emissions:
+        cases = [dict(case, emissions=True) for case in cases]
+    if args.weather:
+        cases = [dict(case, weather=args.weather, track_deg=args.track) for case in cases]
+    print(f"[INFO] {len(cases)} climb cases")
+    tolerances = None
+    if args.lever_cache_tol:
+        tolerances = dict(zip(("mach_tol", "alt_tol_ft", "thrust_tol"), args.lever_cache_tol))
+    store = _open_store(args.out, trajectories=args.trajectories)
+    store = run_sweep(cases, stub_dir=args.stub, max_workers=args.workers,
+                      surrogate_cache_dir=args.surrogate_cache, store=store,
+                      progress=not args.quiet, lever_cache_path=args.lever_cache,
+                      trajectories=args.trajectories, lever_cache_tolerances=tolerances)
+    _close_store(store, args.out)
+
+
+def run_mission_command(args):
+    from aircraft_config import load_aircraft_config
+    from mission import run_missions
+
+    config = load_aircraft_config(args.config, mission=args.mission)
+    profiles = args.profiles or ["linear"]
+    afs = args.altitude_fractions or [0.5]
+    grid = {key: _coerce_grid_values(key, values) for key, values in args.grid or ()}
+    keys = list(grid)
+    weather = {"weather": args.weather, "track_deg": args.track} if args.weather else {}
+    cases = [dict(profile=p, altitude_fraction=af, **dict(zip(keys, values)), **weather)
+             for p, af in itertools.product(profiles, afs)
+             for values in itertools.product(*grid.values())]
+    print(f"[INFO] {len(cases)} missions ({config.name}, {config.mission.name})")
+    rows = run_missions(config, cases, max_workers=args.workers, emissions=args.emissions)
+    failed = sum(1 for row in rows if row.get("error"))
+    if failed:
+        print(f"[WARNING] {failed} mission(s) failed")
+    store = _open_store(args.out, trajectories=False)
+    store.extend(rows)
+    _close_store(store, args.out)
+
+
+def run_optimize_command(args):
+    import climb
+    from optimizer import EvaluationCache, optimize_profiles
+
+    cache = EvaluationCache(args.cache) if args.cache else None
+    results, best = optimize_profiles(args.profiles or climb.PROFILES, budget=args.budget,
+                                      max_workers=args.workers, cache=cache,
+                                      objective=args.objective, dt=args.dt, seed=args.seed,
+                                      verbose=not args.quiet)
+    for profile, result in results.items():
+        print(f"[INFO] {profile:30s} {result.objective} {result.best_value:10.2f}  "
+              f"{result.n_simulations:4d} sims  {result.best_params}")
+    print(f"[INFO] Best profile: {best.profile} ({best.objective} {best.best_value:.2f})")
+
+
+def run_uncertainty_command(args):
+    import climb
+    from uncertainty import run_ensemble
+
+    if climb.strategy_for(args.profile) is None:
+        raise SystemExit(f"[ERROR] Unknown profile: {args.profile}")
+    store = _open_store(args.out, trajectories=False) if args.out else None
+    result = run_ensemble(args.members, profile=args.profile,
+                          altitude_fraction=args.altitude_fraction, dt=args.dt, seed=args.seed,
+                          chunk_size=args.chunk_size, max_workers=args.workers,
+                          surrogate_cache_dir=args.surrogate_cache, store=store,
+                          progress=not args.quiet)
+    print(result.report())
+    if store is not None:
+        _close_store(store, args.out)
+
+
+# (2) Output ----------------------------------------------------------------------------
+def _open_store(out, trajectories):
+    """
+    `.csv` paths collect rows in memory (sweep.ColumnStore) and write one CSV file;
+    anything else is a results_store.ResultsStore Parquet dataset directory.
+    """
+    if Path(out).suffix.lower() == ".csv":
+        if trajectories:
+            raise SystemExit("[ERROR] --trajectories needs a Parquet output directory")
+        from sweep import ColumnStore
+        return ColumnStore()
+    from results_store import ResultsStore
+    return ResultsStore(out)
+
+
+def _close_store(store, out):
+    if hasattr(store, "close"):
+        store.close()
+    else:
+        store.to_frame().to_csv(out, index=False)
+    print(f"[INFO] Results written to {out}")
+
+
+# (3) Command line ----------------------------------------------------------------------
+def _grid_entry(text):
+    """'CD0=0.018,0.02' -> ('CD0', ['0.018', '0.02']) (typed by _coerce_grid_values)"""
+    key, sep, values = text.partition("=")
+    if not sep or not key or not values:
+        raise argparse.ArgumentTypeError(f"expected KEY=v1,v2,..., got {text!r}")
+    return key, values.split(",")
+
+
+def _coerce_grid_values(key, values):
+    """
+    --grid values as the type of the AircraftConfig / MissionSpec field they override
+    (n_engines=2 stays an int); other keys (delta_isa, weather, ...) become floats where
+    they parse as one.
+    """
+    from aircraft_config import AircraftConfig
+
+    kind = AircraftConfig.override_type(key)
+    if kind is None:
+        parsed = []
+        for value in values:
+            try:
+                parsed.append(float(value))
+            except ValueError:
+                parsed.append(value)
+        return parsed
+    try:
+        return [kind(value) for value in values]
+    except ValueError:
+        raise SystemExit(f"[ERROR] --grid {key}: expected {kind.__name__} values, "
+                         f"got {','.join(values)}") from None
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="main", description="Climb / mission performance runs.")
+    commands = parser.add_subparsers(dest="command")
+
+    plot = commands.add_parser("plot", help="interactive strategy plot (default; needs a display)")
+    plot.add_argument("--workers", type=int, default=None,
+                      help="background simulation workers (default: 1 thread; "
+                           "with --processes the executor default)")
+    plot.add_argument("--processes", action="store_true",
+                      help="simulate in worker processes instead of threads")
+    plot.set_defaults(func=run_plot)
+
+    def common(sub, default_out):
+        sub.add_argument("--profiles", nargs="+", metavar="PROFILE",
+                         help="climb profiles (default: all for sweep, linear for mission)")
+        sub.add_argument("--altitude-fractions", nargs="+", type=float, metavar="AF")
+        sub.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+        sub.add_argument("--out", default=default_out,
+                         help="Parquet dataset directory, or a .csv file (default: %(default)s)")
+        sub.add_argument("--weather", default=None, metavar="CSV",
+                         help="temperature / wind profile (atmosphere.OffDesignAtmosphere.from_file)")
+        sub.add_argument("--track", type=float, default=0.0, metavar="DEG",
+                         help="true track for projecting --weather winds (default: %(default)s)")
+
+    sweep = commands.add_parser("sweep", help="headless parallel climb sweep written to disk")
+    common(sweep, "sweep_results")
+    sweep.add_argument("--masses", nargs="+", type=float, metavar="KG", help="initial masses [kg]")
+    sweep.add_argument("--edots", nargs="+", type=float, metavar="W",
+                       help="commanded specific energy rates E_DOT_cmd")
+    sweep.add_argument("--dts", nargs="+", type=float, metavar="S", help="time steps [s]")
+    sweep.add_argument("--delta-isa", nargs="+", type=float, metavar="K",
+                       help="ISA temperature offsets [K]")
+    sweep.add_argument("--stub", default=None, help="engine stub directory (default: climb.STUB)")
+    sweep.add_argument("--trajectories", action="store_true",
+                       help="also store every trajectory (Parquet output only)")
+    sweep.add_argument("--surrogate-cache", default=None, metavar="DIR",
+                       help="run on the engine surrogate cached in DIR")
+    sweep.add_argument("--lever-cache", default=None, metavar="FILE",
+                       help="persistent lever-solution cache file")
+    sweep.add_argument("--lever-cache-tol", nargs=3, type=float, default=None,
+                       metavar=("MACH", "FT", "N"),
+                       help="lever cache quantization: Mach, altitude [ft], thrust per engine [N] "
+                            "(default: 1e-4 1 1)")
+    sweep.add_argument("--emissions", action="store_true", help="also total CO2, H2O and NOx")
+    sweep.add_argument("--quiet", action="store_true", help="no per-chunk progress")
+    sweep.set_defaults(func=run_sweep_command)
+
+    mission = commands.add_parser("mission", help="headless climb-cruise-descent missions")
+    common(mission, "mission_results")
+    mission.add_argument("--config", default=None, help="aircraft exchange XML (default: bundled)")
+    mission.add_argument("--mission", default="design_mission",
+                         help="mission block of the XML (default: %(default)s)")
+    mission.add_argument("--grid", nargs="+", type=_grid_entry, metavar="KEY=V1,V2",
+                         help="AircraftConfig overrides to sweep, e.g. CD0=0.018,0.02, "
+                              "or delta_isa=-10,0,15")
+    mission.add_argument("--emissions", action="store_true", help="also CO2, H2O and NOx")
+    mission.set_defaults(func=run_mission_command)
+
+    optimize = commands.add_parser("optimize", help="CMA-ES search of the climb strategy parameters")
+    optimize.add_argument("--profiles", nargs="+", metavar="PROFILE", help="default: all")
+    optimize.add_argument("--objective", choices=("fuel", "time", "co2", "nox"), default="fuel")
+    optimize.add_argument("--budget", type=int, default=200, help="simulations per profile")
+    optimize.add_argument("--dt", type=float, default=1.0, help="integration step [s]")
+    optimize.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    optimize.add_argument("--cache", default=None, metavar="FILE",
+                          help="persistent evaluation cache (pickle)")
+    optimize.add_argument("--seed", type=int, default=0)
+    optimize.add_argument("--quiet", action="store_true", help="no per-generation progress")
+    optimize.set_defaults(func=run_optimize_command)
+
+    uncertainty = commands.add_parser(
+        "uncertainty", help="Monte Carlo climb ensemble over mass, drag and engine deterioration")
+    uncertainty.add_argument("--profile", default="linear")
+    uncertainty.add_argument("--altitude-fraction", type=float, default=0.5, metavar="AF")
+    uncertainty.add_argument("--members", type=int, default=2000, help="ensemble size")
+    uncertainty.add_argument("--chunk-size", type=int, default=256,
+                             help="members integrated together per batch (default: %(default)s)")
+    uncertainty.add_argument("--dt", type=float, default=1.0, help="integration step [s]")
+    uncertainty.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    uncertainty.add_argument("--seed", type=int, default=0)
+    uncertainty.add_argument("--surrogate-cache", default=None, metavar="DIR",
+                             help="run on the engine surrogate cached in DIR")
+    uncertainty.add_argument("--out", default=None,
+                             help="also write every member to a Parquet directory or .csv file")
+    uncertainty.add_argument("--quiet", action="store_true", help="no per-chunk progress")
+    uncertainty.set_defaults(func=run_uncertainty_command)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command is None:
+        args = build_parser().parse_args(["plot"])
+    if getattr(args, "config", "") is None:
+        from aircraft_config import DEFAULT_XML
+        args.config = DEFAULT_XML
+    args.func(args)
+
 
 if __name__ == "__main__":
-    main()
+    main(sys.argv[1:])
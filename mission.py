@@ -0,0 +1,180 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+
+from aircraft_config import load_aircraft_config
+from mission_state import MissionState
+from segments import ALT_MAX_FT_FOR_ENGINE, FT_PER_M, atm, flight_condition
+
+ENGINE_DECK_CEILING_M = ALT_MAX_FT_FOR_ENGINE / FT_PER_M  # [m] top of the engine deck
+ATMOSPHERE_KEYS = ("delta_isa", "weather", "track_deg")  # case entries of sweep.case_atmosphere
+
+
+# (1) Single mission --------------------------------------------------------------------
+def run_mission(config, profile="linear", altitude_fraction=0.5, ctx=None, engine=None,
+                lever_solver=None, lever_cache=None, climb_method="euler", climb_dt=1.0,
+                E_DOT_cmd=None, cruise_method="breguet", step_climb=False, cruise_mach=None,
+                descent_mode="idle", landing_altitude_m=0.0, emissions=None, atmosphere=None):
+    """
+    Climb → cruise → descent for one AircraftConfig, chained through MissionState.
+
+    - climb:   `profile` / `altitude_fraction` strategy (see climb.strategy_for) from
+               the take-off mass and initial speed up to the mission's initial cruise
+               altitude, capped at the engine deck ceiling
+    - cruise:  at `cruise_mach` (default: the mission's initial cruise Mach) over the
+               mission range minus the climb and descent distances (the descent
+               distance comes from a trial descent from top of climb at cruise speed)
+    - descent: `descent_mode` down to `landing_altitude_m` on the mission's descent
+               speed schedule (descent_speed_below/above_FL100, CAS)
+
+    `ctx` defaults to config.context(engine, lever_solver, lever_cache).
+    `emissions` (an emissions.EmissionModel, or True for one on the context's engine)
+    adds per-step CO2 / H2O / NOx to every segment's diagnostics under 'emissions'.
+    `atmosphere` (e.g. an atmosphere.OffDesignAtmosphere) replaces the context's ISA
+    for all three segments; its winds enter the ground distances and so the cruise length.
+    Without it, a context still on ISA flies at the mission's delta_isa.
+
+    Returns (final MissionState, {segment name: (MissionState at its end, diagnostics)}).
+    """
+    import climb
+    import cruise
+    import descent
+    from sweep import case_atmosphere
+
+    if ctx is None:
+        ctx = config.context(engine, lever_solver, lever_cache)
+    if atmosphere is None and ctx.atmosphere is atm:
+        atmosphere = case_atmosphere({"delta_isa": config.mission.delta_isa})
+    if atmosphere is not None:
+        ctx = replace(ctx, atmosphere=atmosphere)
+    if cruise_mach is None:
+        cruise_mach = config.mission.initial_cruise_mach
+    strategy = climb.strategy_for(profile, altitude_fraction)
+    if strategy is None:
+        raise ValueError(f"Unknown climb profile {profile!r}")
+
+    top_of_climb = config.mission.initial_cruise_altitude_m
+    if top_of_climb > ENGINE_DECK_CEILING_M:
+        print(f"[WARNING] Cruise altitude {top_of_climb:.0f} m is above the engine deck "
+              f"({ENGINE_DECK_CEILING_M:.0f} m); climbing to the deck ceiling instead")
+        top_of_climb = ENGINE_DECK_CEILING_M
+
+    segments = {}
+    state = MissionState(weight=config.takeoff_mass_kg, altitude=0.0,
+                         speed=config.initial_speed_mps, segment_name="takeoff")
+
+    state, diagnostics = climb.run_climb_segment(
+        state, strategy, altitude_fraction, target_altitude_m=top_of_climb, dt=climb_dt,
+        method=climb_method, E_DOT_cmd=E_DOT_cmd, ctx=ctx)
+    segments["climb"] = (state, diagnostics)
+
+    descent_speeds = (config.mission.descent_speed_below_FL100,
+                      config.mission.descent_speed_above_FL100)
+    cruise_speed = cruise_mach * flight_condition(state.altitude, state.speed, ctx.atmosphere)[3]
+    trial, _ = descent.simulate_descent(replace(state, speed=cruise_speed), landing_altitude_m,
+                                        ctx=ctx, mode=descent_mode, speed_schedule=descent_speeds)
+    descent_distance = trial.distance - state.distance
+    cruise_distance = config.mission.range_m - state.distance - descent_distance
+    if cruise_distance <= 0.0:
+        print(f"[WARNING] Climb and descent already cover the range "
+              f"({config.mission.range_m / 1000:.0f} km); no cruise segment")
+    else:
+        state, diagnostics = cruise.simulate_cruise(
+            state, cruise_distance, ctx=ctx, mach=cruise_mach, method=cruise_method,
+            step_climb=step_climb)
+        segments["cruise"] = (state, diagnostics)
+
+    state, diagnostics = descent.simulate_descent(state, landing_altitude_m, ctx=ctx,
+                                                  mode=descent_mode,
+                                                  speed_schedule=descent_speeds)
+    segments["descent"] = (state, diagnostics)
+
+    if emissions is not None and emissions is not False:
+        from emissions import emission_model
+        model = emission_model(emissions, ctx.engine)
+        for _, diagnostics in segments.values():
+            diagnostics["emissions"] = model.trajectory_emissions(diagnostics["trajectory"],
+                                                                  ctx.atmosphere)
+    return state, segments
+
+
+def mission_row(case, state, segments):
+    """Flat result row: case parameters + final state + fuel (and emissions) per segment."""
+    row = dict(case)
+    row.update({
+        "block_time_s": state.time,
+        "block_fuel_kg": state.fuel_used,
+        "distance_m": state.distance,
+        "landing_mass_kg": state.weight,
+        "error": "",
+    })
+    fuel_before = 0.0
+    for name, (end, diagnostics) in segments.items():
+        row[f"{name}_fuel_kg"] = end.fuel_used - fuel_before
+        row[f"{name}_end_time_s"] = end.time
+        fuel_before = end.fuel_used
+        for species in ("co2", "h2o", "nox"):
+            if "emissions" in diagnostics:
+                total = float(diagnostics["emissions"][f"{species}_kg"].sum())
+                row[f"{name}_{species}_kg"] = total
+                row[f"block_{species}_kg"] = row.get(f"block_{species}_kg", 0.0) + total
+    return row
+
+
+# (2) Many missions across processes -----------------------------------------------------
+_WORKER = {"config": None, "ctx": None, "emissions": None}
+
+
+def _init_worker(config, emissions=False):
+    """Process initializer: the config arrives pickled; the engine is loaded once here."""
+    _WORKER["config"] = config
+    _WORKER["ctx"] = config.context()
+    _WORKER["emissions"] = emissions or None
+
+
+def _run_case(case):
+    from sweep import case_atmosphere
+
+    config, ctx = _WORKER["config"], _WORKER["ctx"]
+    overrides = {k: v for k, v in case.items()
+                 if k not in ("profile", "altitude_fraction") + ATMOSPHERE_KEYS}
+    air_case = case if "delta_isa" in case else dict(case, delta_isa=config.mission.delta_isa)
+    try:
+        if overrides:
+            config = config.with_overrides(**overrides)
+            ctx = config.context(engine=ctx.engine)
+        state, segments = run_mission(config, case.get("profile", "linear"),
+                                      case.get("altitude_fraction", 0.5), ctx=ctx,
+                                      emissions=_WORKER["emissions"],
+                                      atmosphere=case_atmosphere(air_case) or atm)
+    except Exception as e:
+        return dict(case, error=str(e)[:200])
+    return mission_row(case, state, segments)
+
+
+def run_missions(config, cases, max_workers=None, emissions=False):
+    """
+    run_mission for every case dict ('profile', 'altitude_fraction' and any
+    AircraftConfig field override, e.g. {'CD0': 0.021, 'takeoff_mass_kg': 62000}, and
+    optionally 'delta_isa' / 'weather' / 'track_deg', see sweep.case_atmosphere).
+
+    The parsed config is sent to each worker once, so the XML is never re-read there.
+    With `emissions` the rows also hold CO2 / H2O / NOx per segment and per block.
+    Returns the result rows in case order.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(config, emissions)) as pool:
+        return list(pool.map(_run_case, cases, chunksize=max(1, len(cases) // (max_workers * 4))))
+
+
+# (3) Quick self-test when run directly ------------------------------------------------
+if __name__ == "__main__":
+    config = load_aircraft_config(mission="study_mission")
+    state, segments = run_mission(config)
+    for name, (end, _) in segments.items():
+        print(f"[INFO] {name:8s} t={end.time:8.0f} s  x={end.distance / 1000:8.1f} km  "
+              f"h={end.altitude:7.0f} m  fuel={end.fuel_used:8.1f} kg")
+    rows = run_missions(config, [{"CD0": cd0} for cd0 in (0.018, 0.02, 0.022)], max_workers=3)
+    for row in rows:
+        print(f"[INFO] CD0={row['CD0']:.3f}: block fuel {row['block_fuel_kg']:.1f} kg")
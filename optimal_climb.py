@@ -0,0 +1,333 @@
+from bisect import bisect_right
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+
+import climb
+from segments import (MACH_MIN_FOR_ENGINE, MACH_MAX_FOR_ENGINE, ALT_MIN_FT_FOR_ENGINE,
+                      ALT_MAX_FT_FOR_ENGINE, FT_PER_M, GAMMA, R_AIR, atm, compute_CD,
+                      compute_drag)
+
+OBJECTIVES = ("fuel", "time")
+V_MAX_DEFAULT = 250.0   # [m/s] top of the default speed axis
+LIMIT_PENALTY = 1e6     # cost added per thrust-limited edge end (as optimizer.LIMIT_PENALTY)
+
+
+# (1) Schedule (the solver's output, replayable as a strategy function) -------------------
+@dataclass
+class ClimbSchedule:
+    """
+    Optimal climb path as (altitude, TAS) waypoints with the time, fuel and lever the
+    DP grid predicts at each of them.
+
+    The schedule is itself a strategy function: called as f(altitude, velocity,
+    altitude_fraction) it returns the (cw, sw) split that aims the aircraft at the next
+    waypoint in energy height He = h + V²/2g. Every waypoint lies at a higher He than
+    the one before, and the integrators raise He at E_DOT_cmd whatever the split, so
+    the lookup is well defined and a state that drifts off the path is steered back
+    onto it. Past the last waypoint it climbs only. It pickles, so worker processes
+    can replay it too.
+    """
+    altitude: np.ndarray          # [m]
+    velocity: np.ndarray          # [m/s]
+    time: np.ndarray              # [s] from the first waypoint
+    fuel: np.ndarray              # [kg] burned since the first waypoint
+    lever: np.ndarray             # [-] NaN where no valid lever
+    thrust_limited: np.ndarray    # bool
+    objective: str = "fuel"
+    E_DOT_cmd: float = climb.E_DOT_CMD
+    initial_mass: float = climb.initial_mass_kg
+    energy_height: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        g = atm.get_gravity_array(self.altitude)
+        self.energy_height = self.altitude + self.velocity**2 / (2.0 * g)
+        self._He = self.energy_height.tolist()
+        self._h = self.altitude.tolist()
+
+    @property
+    def total_fuel(self):
+        return float(self.fuel[-1])
+
+    @property
+    def total_time(self):
+        return float(self.time[-1])
+
+    def __call__(self, altitude, velocity, altitude_fraction=None):
+        He = altitude + velocity * velocity / (2.0 * atm.get_gravity(altitude))
+        k = bisect_right(self._He, He + 1e-6)
+        if k >= len(self._He):
+            return 1.0, 0.0
+        w_c = (self._h[k] - altitude) / max(self._He[k] - He, 1e-9)
+        w_c = min(max(w_c, 0.0), 1.0)
+        return w_c, 1.0 - w_c
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state.pop("_He", None)
+        state.pop("_h", None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._He = self.energy_height.tolist()
+        self._h = self.altitude.tolist()
+
+    def simulate(self, dt=1.0, **kwargs):
+        """Replay through climb.simulate_climb_path (same E_DOT_cmd and initial mass)."""
+        kwargs.setdefault("E_DOT_cmd", self.E_DOT_cmd)
+        kwargs.setdefault("initial_mass", self.initial_mass)
+        kwargs.setdefault("initial_altitude_m", float(self.altitude[0]))
+        kwargs.setdefault("initial_speed_mps", float(self.velocity[0]))
+        kwargs.setdefault("target_altitude_m", float(self.altitude[-1]))
+        return climb.simulate_climb_path(self, None, dt=dt, **kwargs)
+
+
+# (2) Node and edge costs (vectorized over the whole grid) -------------------------------
+def node_fuel_flow(ctx, altitudes, speeds, mass_kg, E_DOT_cmd, lever_solver):
+    """
+    Lever, thrust-limited flag and total fuel flow [kg/s] at every (altitude, TAS) node.
+
+    With the specific-energy split the required thrust F = D + W·E_DOT_cmd/V does not
+    depend on how E_DOT_cmd is shared between climb and acceleration, so the engine is
+    queried once per node (not per edge). `mass_kg` is one mass per altitude row.
+    Same physics as climb.simulate_climb_batch, in ctx.atmosphere. Returns (n_h, n_v) arrays.
+    """
+    h = altitudes[:, None]
+    V = speeds[None, :]
+    g = atm.get_gravity_array(altitudes)[:, None]
+    T, P, rho = ctx.atmosphere.calculate_atmospheric_properties_array_m(altitudes)
+    rho = rho[:, None]
+    a = np.sqrt(GAMMA * R_AIR * T)[:, None]
+    W = np.asarray(mass_kg, dtype=float).reshape(-1, 1) * g
+
+    mach_eng = np.clip(V / np.maximum(a, 1e-9), MACH_MIN_FOR_ENGINE, MACH_MAX_FOR_ENGINE)
+    alt_ft_eng = np.clip(h * FT_PER_M, ALT_MIN_FT_FOR_ENGINE, ALT_MAX_FT_FOR_ENGINE)
+    mach_eng, alt_ft_eng = np.broadcast_arrays(mach_eng, alt_ft_eng)
+
+    CL = (2 * W) / (np.maximum(rho, 1e-12) * np.maximum(V, 1e-6)**2 * ctx.S_ref)
+    D = compute_drag(rho, V, ctx.S_ref, compute_CD(CL, ctx.AR, ctx.e, ctx.CD0))
+    F_required_total = D + (E_DOT_cmd * W) / np.maximum(V, 1e-9)
+
+    sol = lever_solver.solve_many(F_required_total / float(ctx.n_engines), mach_eng, alt_ft_eng)
+    lever, valid = sol["lever"], sol["valid"]
+    fuel_flow = np.full(lever.shape, np.nan)
+    if valid.any():
+        _, _, ff = ctx.evaluator.evaluate(lever[valid], mach_eng[valid], alt_ft_eng[valid])
+        fuel_flow[valid] = np.maximum(ff, 0.0) * ctx.n_engines
+    return np.where(valid, lever, np.nan), valid & sol["thrust_limited"], fuel_flow
+
+
+def edge_costs(altitudes, speeds, fuel_flow, limited, E_DOT_cmd, objective="fuel",
+               time_weight=0.0, limit_penalty=LIMIT_PENALTY):
+    """
+    Cost of every grid edge, as two arrays indexed [row, from speed, to speed]:
+
+      climb (n_h-1, n_v, n_v)  from (h_i, V_j) to (h_i+1, V_k), V_k >= V_j
+      level (n_h, n_v, n_v)    from (h_i, V_j) to (h_i, V_k),   V_k >  V_j
+
+    An edge takes dt = ΔHe / E_DOT_cmd and burns the trapezoidal mean of its end-node
+    fuel flows over dt. The cost is that fuel (+ time_weight [kg/s] x dt) or dt alone.
+    Thrust-limited nodes are a constraint, as in optimizer.objective_value: an edge gets
+    limit_penalty x (share of its end nodes that are thrust-limited) added, so at the
+    default 1e6 any path through such a node costs more than every path without one
+    (and among those, fewer limited nodes win); `limit_penalty=np.inf` excludes the
+    edges outright. Decelerating edges and edges touching a node without a valid lever
+    are inf.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r} (use one of {OBJECTIVES})")
+    g = atm.get_gravity_array(altitudes)
+    ke = 0.5 * speeds**2
+    dke = ke[None, :] - ke[:, None]                     # [from, to]
+    bad = np.where(np.isfinite(fuel_flow), limited.astype(float), np.inf)
+    ff = np.nan_to_num(fuel_flow, nan=0.0)
+
+    def cost(dt, ff_from, ff_to, bad_from, bad_to):
+        if objective == "fuel":
+            value = 0.5 * (ff_from + ff_to) * dt + time_weight * dt
+        else:
+            value = dt
+        bad_share = 0.5 * (bad_from + bad_to)
+        with np.errstate(invalid="ignore"):  # inf penalty x 0 share
+            return value + np.where(bad_share > 0.0, limit_penalty * bad_share, 0.0)
+
+    g_mid = 0.5 * (g[:-1] + g[1:])[:, None, None]
+    dt = (np.diff(altitudes)[:, None, None] + dke[None] / g_mid) / E_DOT_cmd
+    climb_cost = cost(dt, ff[:-1, :, None], ff[1:, None, :], bad[:-1, :, None], bad[1:, None, :])
+    climb_cost[:, dke < 0.0] = np.inf
+
+    dt = dke[None] / (g[:, None, None] * E_DOT_cmd)
+    level_cost = cost(dt, ff[:, :, None], ff[:, None, :], bad[:, :, None], bad[:, None, :])
+    level_cost[:, dke <= 0.0] = np.inf
+    return climb_cost, level_cost
+
+
+# (3) Dynamic programming ---------------------------------------------------------------
+def _shortest_path(climb_cost, level_cost, start, final_mask):
+    """
+    Minimum-cost path from node (0, start) to any allowed node of the top row.
+
+    Rows are visited bottom-up; each row is first reached by climb edges from the row
+    below, then relaxed once with its level (acceleration) edges. One relaxation is
+    enough because a direct level edge exists between every pair of speeds. The top
+    row is not relaxed: the integrators stop on reaching the target altitude, so the
+    final speed must be reached on arrival.
+    Returns the path as [(row, speed index), ...] and its cost.
+    """
+    n_h, n_v = level_cost.shape[0], level_cost.shape[1]
+    cols = np.arange(n_v)
+    climb_parent = np.zeros((n_h, n_v), dtype=np.int64)
+    level_parent = np.full((n_h, n_v), -1, dtype=np.int64)
+
+    arrived = np.full(n_v, np.inf)
+    arrived[start] = 0.0
+    for i in range(n_h):
+        if i > 0:
+            total = cost[:, None] + climb_cost[i - 1]
+            climb_parent[i] = np.argmin(total, axis=0)
+            arrived = total[climb_parent[i], cols]
+        if i == n_h - 1:
+            cost = arrived
+            break
+        total = arrived[:, None] + level_cost[i]
+        j = np.argmin(total, axis=0)
+        via_level = total[j, cols] < arrived
+        level_parent[i] = np.where(via_level, j, -1)
+        cost = np.where(via_level, total[j, cols], arrived)
+
+    final = np.where(final_mask, cost, np.inf)
+    k = int(np.argmin(final))
+    if not np.isfinite(final[k]):
+        raise ValueError("No feasible climb path on the grid (every path touches a node "
+                         "without a valid lever, or the final speed range is unreachable)")
+    path = []
+    for i in range(n_h - 1, -1, -1):
+        path.append((i, k))
+        if level_parent[i, k] >= 0:
+            k = int(level_parent[i, k])
+            path.append((i, k))
+        if i > 0:
+            k = int(climb_parent[i, k])
+    return path[::-1], float(final.min())
+
+
+def optimal_climb(objective="fuel", n_altitudes=200, n_speeds=200, speeds=None,
+                  v_max=V_MAX_DEFAULT, final_speed_range=None, initial_mass=None,
+                  E_DOT_cmd=None, initial_altitude_m=None, initial_speed_mps=None,
+                  target_altitude_m=None, time_weight=0.0, limit_penalty=LIMIT_PENALTY,
+                  mass_iterations=2, ctx=None, engine=None, lever_solver=None,
+                  atmosphere=None):
+    """
+    Minimum-fuel (or minimum-time) climb from the initial state to target_altitude by
+    dynamic programming on an altitude x TAS grid.
+
+    The aircraft model is the one simulate_climb_path flies: specific energy rises at
+    E_DOT_cmd and a strategy only chooses how it is split between climb and
+    acceleration. Instead of a fixed analytical split (StrategyProfiles) the solver
+    searches every path through the grid: n_altitudes rows from the initial altitude
+    to the target, n_speeds speeds from the initial speed to `v_max` (or the given
+    `speeds`, to which the initial speed is added). Speed never decreases along a path
+    (the strategy weights are non-negative) and may rise at constant altitude below the
+    target.
+
+    Node fuel flows come from one vectorized lever solve over the grid (node_fuel_flow)
+    and edge costs from array arithmetic over all edges (edge_costs), so a 200 x 200
+    grid solves in seconds. Mass is taken per altitude row: the first pass uses the
+    initial mass, each further pass (`mass_iterations` in all) the masses along the
+    previous optimum.
+
+    objective : 'fuel' (total fuel [kg] + time_weight [kg/s] x time) or 'time'. Climb
+        time is ΔHe / E_DOT_cmd, so minimum time means the lowest final speed allowed.
+    final_speed_range : (min, max) TAS [m/s] at the target altitude, or None (any).
+    ctx / engine / lever_solver : as for simulate_climb_path; the vectorized lever
+        solve needs an InverseLeverSolver and builds one from the engine if none given.
+    atmosphere : replaces ctx.atmosphere (default ISA), e.g. an OffDesignAtmosphere;
+        replay the schedule with simulate(atmosphere=...) in the same atmosphere.
+
+    Returns a ClimbSchedule; replay it with schedule.simulate() or pass it as the
+    strategy function of any climb integrator.
+    """
+    if ctx is None:
+        ctx = climb.climb_context(engine, lever_solver)
+    if atmosphere is not None:
+        ctx = replace(ctx, atmosphere=atmosphere)
+    if lever_solver is None:
+        lever_solver = ctx.lever_solver
+    if lever_solver is None:
+        from lever_solver import InverseLeverSolver
+        lever_solver = InverseLeverSolver.from_engine(ctx.engine)
+    m0 = climb.initial_mass_kg if initial_mass is None else float(initial_mass)
+    E_DOT_cmd = climb.E_DOT_CMD if E_DOT_cmd is None else float(E_DOT_cmd)
+    h0 = climb.initial_altitude if initial_altitude_m is None else float(initial_altitude_m)
+    V0 = climb.initial_speed if initial_speed_mps is None else float(initial_speed_mps)
+    h_target = climb.target_altitude if target_altitude_m is None else float(target_altitude_m)
+    if h_target <= h0:
+        raise ValueError(f"Target altitude {h_target} m is not above the initial altitude {h0} m")
+
+    altitudes = np.linspace(h0, h_target, int(n_altitudes))
+    if speeds is None:
+        speeds = np.linspace(V0, max(float(v_max), V0), int(n_speeds))
+    else:
+        speeds = np.unique(np.append(np.asarray(speeds, dtype=float), V0))
+    start = int(np.searchsorted(speeds, V0))
+    final_mask = np.ones(speeds.size, dtype=bool)
+    if final_speed_range is not None:
+        lo, hi = final_speed_range
+        final_mask = (speeds >= lo) & (speeds <= hi)
+
+    mass = np.full(altitudes.size, m0)
+    for _ in range(max(int(mass_iterations), 1)):
+        lever, limited, fuel_flow = node_fuel_flow(ctx, altitudes, speeds, mass, E_DOT_cmd,
+                                                   lever_solver)
+        climb_cost, level_cost = edge_costs(altitudes, speeds, fuel_flow, limited, E_DOT_cmd,
+                                            objective, time_weight, limit_penalty)
+        path, _ = _shortest_path(climb_cost, level_cost, start, final_mask)
+        rows, cols = np.array(path).T
+        schedule = _schedule(altitudes[rows], speeds[cols], fuel_flow[rows, cols],
+                             lever[rows, cols], limited[rows, cols], objective, E_DOT_cmd, m0)
+        # mass on each row: the last waypoint of that row on the current optimum
+        last = np.flatnonzero(np.append(rows[1:] != rows[:-1], True))
+        mass = m0 - schedule.fuel[last]
+    if schedule.thrust_limited.any():
+        print(f"[WARNING] No climb path without thrust-limited nodes on the grid; "
+              f"{int(schedule.thrust_limited.sum())} of {len(schedule.altitude)} waypoints are limited")
+    return schedule
+
+
+def _schedule(h, V, fuel_flow, lever, limited, objective, E_DOT_cmd, m0):
+    g = atm.get_gravity_array(h)
+    He = h + V**2 / (2.0 * g)
+    dt = np.diff(He) / E_DOT_cmd
+    burned = 0.5 * (fuel_flow[:-1] + fuel_flow[1:]) * dt
+    return ClimbSchedule(altitude=h, velocity=V, time=np.concatenate([[0.0], np.cumsum(dt)]),
+                         fuel=np.concatenate([[0.0], np.cumsum(burned)]), lever=lever,
+                         thrust_limited=limited.astype(bool), objective=objective,
+                         E_DOT_cmd=E_DOT_cmd, initial_mass=m0)
+
+
+# (4) Quick self-test when run directly ------------------------------------------------
+if __name__ == "__main__":
+    import time
+    from lever_solver import InverseLeverSolver
+
+    t0 = time.perf_counter()
+    schedule = optimal_climb("fuel")
+    print(f"[INFO] 200 x 200 grid solved in {time.perf_counter() - t0:.2f} s: "
+          f"{len(schedule.altitude)} waypoints, predicted fuel {schedule.total_fuel:.1f} kg, "
+          f"time {schedule.total_time:.1f} s, final TAS {schedule.velocity[-1]:.1f} m/s")
+    *_, final_results, diagnostics = schedule.simulate(dt=1.0)
+    print(f"[INFO] Replayed: fuel {final_results['Total Fuel Burned (kg)']:.1f} kg, "
+          f"time {final_results['Total Climb Time']:.1f} s, "
+          f"final TAS {final_results['Final Velocity']:.1f} m/s, "
+          f"{len(diagnostics['limit_times'])} thrust-limited steps")
+    cases = [(profile, af, fn) for profile in climb.PROFILES for af, fn in climb.generate_strategy(profile)]
+    runs = climb.simulate_climb_batch([(af, fn) for _, af, fn in cases], dt=1.0,
+                                      lever_solver=InverseLeverSolver.from_engine(climb.eng))
+    # same ranking as the DP: fewest thrust-limited / failed steps first, then fuel
+    ranked = [(len(run[5]["limit_times"]) + len(run[5]["none_lever_times"]),
+               run[4]["Total Fuel Burned (kg)"], profile, af)
+              for (profile, af, _), run in zip(cases, runs)]
+    bad, fuel, profile, af = min(ranked)
+    print(f"[INFO] Best fixed profile: {profile} (AF={af}) {fuel:.1f} kg, "
+          f"{bad} thrust-limited steps")
@@ -0,0 +1,415 @@
+import math
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+import climb
+
+OBJECTIVES = ("fuel", "time", "co2", "nox")
+EMISSION_OBJECTIVES = {"co2": "total_co2_kg", "nox": "total_nox_kg"}  # objective -> row column
+DEFAULT_BOUNDS = {
+    "altitude_fraction": (0.1, 1.0),  # [-] climb share of the specific energy (0 never climbs)
+    "E_DOT_cmd": (2.0, 12.0),         # [m/s] commanded specific-energy rate
+    "shape": (0.25, 4.0),             # [-] exponent scale of the exponential profiles
+}
+LIMIT_PENALTY = 1e6             # added to climbs with limited/failed steps (x 1 + their share)
+SURROGATE_MIN_RANK_CORR = 0.5   # prescreen only while the surrogate ranks batches this well
+BOUNDARY_PENALTY = 1e3          # CMA-ES penalty per squared normalized distance outside bounds
+
+
+# (1) Search space and objective ----------------------------------------------------------
+def search_space(profile, bounds=None, fixed=None):
+    """
+    {parameter: (low, high)} searched for `profile`: the constant-rate profiles have no
+    altitude fraction and only the exponential profiles have a shape; parameters in
+    `fixed` are not searched.
+    """
+    bounds = dict(DEFAULT_BOUNDS if bounds is None else bounds)
+    if profile in ("constant_speed", "constant_mach"):
+        bounds.pop("altitude_fraction", None)
+    if not profile.startswith("exponential"):
+        bounds.pop("shape", None)
+    for name in fixed or ():
+        bounds.pop(name, None)
+    return bounds
+
+
+def objective_value(row, objective="fuel", time_weight=0.0, limit_penalty=LIMIT_PENALTY):
+    """
+    Scalar to minimize from a sweep.run_case row: total fuel [kg] (+ time_weight [kg/s]
+    x climb time), climb time [s] or total CO2 / NOx [kg] (rows simulated with
+    emissions, see optimize_climb). Failed runs are inf.
+
+    Thrust-limited and failed-lever steps mean the commanded climb was not flown, so
+    they are a constraint, not a cost: such a climb gets limit_penalty x (1 + their share
+    of all steps) added, which (at the default 1e6, in objective units) ranks it behind
+    every climb flown as commanded, and infeasible climbs among themselves by how much
+    of the climb was not flown. `limit_penalty=math.inf` makes them inf outright.
+    """
+    if row.get("error") or not np.isfinite(row.get("total_fuel_burn_kg", np.nan)):
+        return math.inf
+    if objective == "fuel":
+        value = row["total_fuel_burn_kg"] + time_weight * row["final_time_s"]
+    elif objective == "time":
+        value = row["final_time_s"]
+    elif objective in EMISSION_OBJECTIVES:
+        value = row[EMISSION_OBJECTIVES[objective]]
+    else:
+        raise ValueError(f"Unknown objective {objective!r} (use one of {OBJECTIVES})")
+    bad = row.get("thrust_limited_steps", 0) + row.get("none_lever_steps", 0)
+    if bad:
+        value += limit_penalty * (1.0 + bad / max(row.get("n_steps", 1), 1))
+    return value
+
+
+# (2) Evaluation cache and parallel batches -----------------------------------------------
+class EvaluationCache:
+    """
+    Simulation rows keyed on the case (profile, dt, mass and parameters rounded to
+    `decimals`), so repeated candidates are never simulated twice. Rows are independent
+    of the objective, so one cache serves fuel and time runs alike. With `path` the
+    cache is loaded from / saved to a pickle file.
+    """
+
+    def __init__(self, path=None, decimals=6):
+        self.path = None if path is None else Path(path)
+        self.decimals = decimals
+        self.rows = {}
+        if self.path is not None and self.path.exists():
+            with open(self.path, "rb") as f:
+                self.rows.update(pickle.load(f))
+
+    def key(self, case):
+        return tuple(sorted((k, round(v, self.decimals) if isinstance(v, float) else v)
+                            for k, v in case.items()))
+
+    def get(self, case):
+        return self.rows.get(self.key(case))
+
+    def put(self, case, row):
+        self.rows[self.key(case)] = row
+
+    def __len__(self):
+        return len(self.rows)
+
+    def save(self, path=None):
+        path = Path(path or self.path)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(self.rows, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+
+class BatchEvaluator:
+    """
+    Runs batches of sweep cases: in this process for max_workers=1, otherwise on a
+    ProcessPoolExecutor whose workers load their engine once (sweep._init_worker).
+    Use as a context manager so the pool is shut down.
+    """
+
+    def __init__(self, max_workers=None, stub_dir=None, surrogate_cache_dir=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = None
+        if self.max_workers > 1:
+            import sweep
+            stub_dir = str(climb.STUB if stub_dir is None else stub_dir)
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                             initializer=sweep._init_worker,
+                                             initargs=(stub_dir, surrogate_cache_dir))
+
+    def __call__(self, cases):
+        import sweep
+        if self._pool is None:
+            return [sweep.run_case(case) for case in cases]
+        size = max(1, math.ceil(len(cases) / self.max_workers))
+        chunks = [cases[i:i + size] for i in range(0, len(cases), size)]
+        return [row for rows in self._pool.map(sweep._run_chunk, chunks) for row in rows]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# (3) Surrogate ---------------------------------------------------------------------------
+class QuadraticSurrogate:
+    """
+    Full quadratic response surface fitted by (ridge-regularized) least squares on
+    normalized parameters: cheap enough to rank hundreds of candidates per generation.
+    """
+
+    def __init__(self, ridge=1e-8):
+        self.ridge = ridge
+        self.coef = None
+
+    @staticmethod
+    def n_terms(dim):
+        return (dim + 1) * (dim + 2) // 2
+
+    @staticmethod
+    def _features(X):
+        X = np.atleast_2d(X)
+        rows, cols = np.triu_indices(X.shape[1])
+        return np.hstack([np.ones((len(X), 1)), X, X[:, rows] * X[:, cols]])
+
+    def fit(self, X, y):
+        A = self._features(X)
+        lhs = A.T @ A + self.ridge * np.eye(A.shape[1])
+        self.coef = np.linalg.solve(lhs, A.T @ np.asarray(y, dtype=float))
+        return self
+
+    def predict(self, X):
+        return self._features(X) @ self.coef
+
+
+def _rank_correlation(a, b):
+    """Spearman rank correlation (no ties handling needed for continuous values)."""
+    if len(a) < 3:
+        return 0.0
+    ra = np.argsort(np.argsort(a)).astype(float)
+    rb = np.argsort(np.argsort(b)).astype(float)
+    ra -= ra.mean()
+    rb -= rb.mean()
+    denom = math.sqrt(float(ra @ ra) * float(rb @ rb))
+    return float(ra @ rb) / denom if denom > 0.0 else 0.0
+
+
+# (4) CMA-ES ------------------------------------------------------------------------------
+class CMAES:
+    """
+    (mu/mu_w, lambda)-CMA-ES with rank-one and rank-mu covariance updates and cumulative
+    step-size adaptation (Hansen's tutorial defaults), in ask/tell form.
+    """
+
+    def __init__(self, x0, sigma0, popsize=None, seed=0):
+        self.mean = np.asarray(x0, dtype=float)
+        self.sigma = float(sigma0)
+        n = self.dim = len(self.mean)
+        self.popsize = popsize or 4 + int(3 * math.log(n))
+        self.mu = self.popsize // 2
+        w = math.log(self.mu + 0.5) - np.log(np.arange(1, self.mu + 1))
+        self.weights = w / w.sum()
+        self.mueff = 1.0 / float(self.weights @ self.weights)
+        self.cc = (4 + self.mueff / n) / (n + 4 + 2 * self.mueff / n)
+        self.cs = (self.mueff + 2) / (n + self.mueff + 5)
+        self.c1 = 2 / ((n + 1.3) ** 2 + self.mueff)
+        self.cmu = min(1 - self.c1, 2 * (self.mueff - 2 + 1 / self.mueff) / ((n + 2) ** 2 + self.mueff))
+        self.damps = 1 + 2 * max(0.0, math.sqrt((self.mueff - 1) / (n + 1)) - 1) + self.cs
+        self.chi_n = math.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n * n))
+        self.pc, self.ps = np.zeros(n), np.zeros(n)
+        self.C, self.B, self.D = np.eye(n), np.eye(n), np.ones(n)
+        self.generation = 0
+        self.rng = np.random.default_rng(seed)
+
+    def ask(self, n=None):
+        z = self.rng.standard_normal((n or self.popsize, self.dim))
+        return self.mean + self.sigma * (z * self.D) @ self.B.T
+
+    def tell(self, X, f):
+        X, f = np.asarray(X, dtype=float), np.asarray(f, dtype=float)
+        order = np.argsort(f)[:self.mu]
+        old = self.mean
+        self.mean = self.weights @ X[order]
+        y_w = (self.mean - old) / self.sigma
+        inv_sqrt_C = self.B @ np.diag(1 / self.D) @ self.B.T
+        self.ps = (1 - self.cs) * self.ps + math.sqrt(self.cs * (2 - self.cs) * self.mueff) * inv_sqrt_C @ y_w
+        self.generation += 1
+        ps_norm = float(np.linalg.norm(self.ps))
+        hsig = (ps_norm / math.sqrt(1 - (1 - self.cs) ** (2 * self.generation)) / self.chi_n
+                < 1.4 + 2 / (self.dim + 1))
+        self.pc = (1 - self.cc) * self.pc + hsig * math.sqrt(self.cc * (2 - self.cc) * self.mueff) * y_w
+        steps = (X[order] - old) / self.sigma
+        self.C = ((1 - self.c1 - self.cmu) * self.C
+                  + self.c1 * (np.outer(self.pc, self.pc) + (1 - hsig) * self.cc * (2 - self.cc) * self.C)
+                  + self.cmu * (steps.T * self.weights) @ steps)
+        self.sigma *= math.exp((self.cs / self.damps) * (ps_norm / self.chi_n - 1))
+        self.C = np.triu(self.C) + np.triu(self.C, 1).T
+        D2, self.B = np.linalg.eigh(self.C)
+        self.D = np.sqrt(np.maximum(D2, 1e-20))
+
+    @property
+    def spread(self):
+        """Largest standard deviation of the search distribution."""
+        return self.sigma * float(self.D.max())
+
+
+# (5) Driver ------------------------------------------------------------------------------
+@dataclass
+class OptimizationResult:
+    profile: str
+    objective: str
+    best_params: dict
+    best_value: float
+    best_row: dict
+    n_simulations: int       # real simulate_climb_path runs (cache misses)
+    n_candidates: int        # candidates evaluated, cached or not
+    generations: int
+    stop_reason: str
+    history: list = field(default_factory=list, repr=False)  # (generation, params, value)
+
+
+def optimize_climb(profile="linear", objective="fuel", budget=200, bounds=None, fixed=None,
+                   x0=None, sigma0=0.3, popsize=None, prescreen=4, dt=1.0,
+                   initial_mass_kg=None, time_weight=0.0, limit_penalty=LIMIT_PENALTY,
+                   max_workers=None, cache=None, evaluator=None, stub_dir=None,
+                   surrogate_cache_dir=None, tolx=1e-3, seed=0, verbose=True):
+    """
+    Minimize `objective` ('fuel', 'time', 'co2' or 'nox', see objective_value; the
+    emission objectives simulate with emissions=True) of one climb profile
+    over its continuous parameters (altitude fraction, E_DOT_cmd, exponential shape;
+    see search_space) with CMA-ES.
+
+    Every generation samples `prescreen` x popsize candidates from the CMA-ES
+    distribution, ranks them on a quadratic surrogate fitted to the simulations nearest
+    the current mean, and simulates only the best popsize of them, as one parallel
+    batch (`evaluator`, default a BatchEvaluator(max_workers)). Prescreening is skipped
+    until the surrogate has enough points, and whenever it ranked the previous batch
+    poorly (rank correlation below SURROGATE_MIN_RANK_CORR). Simulations go through
+    `cache` (an EvaluationCache), so revisited candidates are free.
+
+    Stops after `budget` real simulations or when the search distribution is narrower
+    than `tolx` (in units of the parameter ranges). `fixed` sets parameters that are not
+    searched; `x0` ({name: value}) is the start (default: the middle of the bounds).
+    """
+    space = search_space(profile, bounds, fixed)
+    names = list(space)
+    lo = np.array([space[k][0] for k in names], dtype=float)
+    hi = np.array([space[k][1] for k in names], dtype=float)
+    base_case = {"profile": profile, "dt": float(dt),
+                 "initial_mass_kg": float(climb.initial_mass_kg if initial_mass_kg is None
+                                          else initial_mass_kg),
+                 "altitude_fraction": None, "E_DOT_cmd": float(climb.E_DOT_CMD), "shape": 1.0}
+    if objective in EMISSION_OBJECTIVES:
+        base_case["emissions"] = True
+    base_case.update(fixed or {})
+    if climb.strategy_for(profile) is None:
+        raise ValueError(f"Unknown climb profile {profile!r}")
+    if not names:
+        raise ValueError(f"Nothing to optimize for {profile!r} (all parameters fixed)")
+
+    def to_case(u):
+        case = dict(base_case)
+        case.update(zip(names, (lo + np.clip(u, 0.0, 1.0) * (hi - lo)).tolist()))
+        return case
+
+    start = np.full(len(names), 0.5) if x0 is None else \
+        np.array([(x0.get(k, 0.5 * (l + h)) - l) / (h - l) for k, l, h in zip(names, lo, hi)])
+    es = CMAES(start, sigma0, popsize, seed)
+    cache = EvaluationCache() if cache is None else cache
+    own_evaluator = evaluator is None
+    evaluator = BatchEvaluator(max_workers, stub_dir, surrogate_cache_dir) if own_evaluator else evaluator
+    surrogate = QuadraticSurrogate()
+    X_seen, f_seen = [], []
+    history, best = [], (math.inf, None, None)
+    n_sims = n_candidates = 0
+    use_surrogate, stop_reason = True, "budget"
+
+    try:
+        while True:
+            if n_sims >= budget:
+                break
+            if es.spread < tolx:
+                stop_reason = "tolx"
+                break
+            if es.generation >= 10 * budget:
+                stop_reason = "generations"
+                break
+
+            # (a) sample, optionally prescreen on the surrogate
+            n_fit = 2 * QuadraticSurrogate.n_terms(len(names))
+            fitted = len(X_seen) >= n_fit
+            if fitted:
+                near = np.argsort(np.linalg.norm(np.array(X_seen) - es.mean, axis=1))[:max(n_fit, 4 * es.popsize)]
+                surrogate.fit(np.array(X_seen)[near], np.array(f_seen)[near])
+            candidates = es.ask(es.popsize * (prescreen if fitted and use_surrogate else 1))
+            if len(candidates) > es.popsize:
+                candidates = candidates[np.argsort(surrogate.predict(np.clip(candidates, 0, 1)))[:es.popsize]]
+
+            # (b) evaluate the batch: cached rows first, the rest as one parallel batch
+            cases = [to_case(u) for u in candidates]
+            rows = [cache.get(case) for case in cases]
+            missing = [i for i, row in enumerate(rows) if row is None]
+            missing = missing[:max(budget - n_sims, 0)]
+            todo = {cache.key(cases[i]): cases[i] for i in missing}  # dedupe within the batch
+            if todo:
+                for case, row in zip(todo.values(), evaluator(list(todo.values()))):
+                    cache.put(case, row)
+                n_sims += len(todo)
+            keep = [i for i, case in enumerate(cases) if cache.get(case) is not None]
+            candidates = candidates[keep]
+            cases = [cases[i] for i in keep]
+            values = np.array([objective_value(cache.get(c), objective, time_weight, limit_penalty)
+                               for c in cases])
+            n_candidates += len(cases)
+            if len(cases) < es.mu:
+                break  # budget exhausted mid-generation
+
+            # (c) surrogate quality on what was just simulated
+            finite = np.isfinite(values)
+            if fitted and finite.sum() >= 3:
+                predicted = surrogate.predict(np.clip(candidates[finite], 0, 1))
+                use_surrogate = _rank_correlation(predicted, values[finite]) >= SURROGATE_MIN_RANK_CORR
+
+            # (d) bookkeeping and CMA-ES update (repaired points + boundary penalty)
+            repaired = np.clip(candidates, 0.0, 1.0)
+            worst = float(values[finite].max()) if finite.any() else 1.0
+            for u, case, value in zip(repaired, cases, values):
+                params = {k: case[k] for k in names}
+                history.append((es.generation, params, float(value)))
+                if np.isfinite(value) and value > 0.0:
+                    X_seen.append(u)
+                    f_seen.append(math.log(value))  # fuel/time span decades: fit the log
+                if value < best[0]:
+                    best = (float(value), params, cache.get(case))
+            fitness = np.where(finite, values, 2.0 * abs(worst) + 1.0)
+            fitness = fitness + BOUNDARY_PENALTY * abs(worst) * ((candidates - repaired) ** 2).sum(axis=1)
+            es.tell(candidates, fitness)
+            if verbose:
+                print(f"[INFO] {profile} gen {es.generation:3d}: sims {n_sims:4d}/{budget}  "
+                      f"best {best[0]:10.2f}  sigma {es.spread:.3g}"
+                      f"{'  (surrogate)' if fitted and use_surrogate else ''}")
+    finally:
+        if own_evaluator:
+            evaluator.close()
+        if cache.path is not None:
+            cache.save()
+
+    return OptimizationResult(profile, objective, best[1], best[0], best[2], n_sims,
+                              n_candidates, es.generation, stop_reason, history)
+
+
+def optimize_profiles(profiles=climb.PROFILES, budget=200, max_workers=None, cache=None,
+                      **kwargs):
+    """
+    optimize_climb for every profile with one shared worker pool and cache; `budget` is
+    per profile. Returns ({profile: OptimizationResult}, best OptimizationResult).
+    """
+    cache = EvaluationCache() if cache is None else cache
+    results = {}
+    with BatchEvaluator(max_workers, kwargs.pop("stub_dir", None),
+                        kwargs.pop("surrogate_cache_dir", None)) as evaluator:
+        for profile in profiles:
+            results[profile] = optimize_climb(profile, budget=budget, cache=cache,
+                                              evaluator=evaluator, **kwargs)
+    return results, min(results.values(), key=lambda r: r.best_value)
+
+
+# (6) Quick self-test when run directly ------------------------------------------------
+if __name__ == "__main__":
+    result = optimize_climb("exponential_increasing_climb", budget=120, max_workers=None)
+    print(f"[INFO] {result.stop_reason} after {result.n_simulations} simulations "
+          f"({result.generations} generations)")
+    print(f"[INFO] Best {result.objective}: {result.best_value:.2f} at {result.best_params}")
+    print(f"[INFO] Fuel {result.best_row['total_fuel_burn_kg']:.1f} kg, "
+          f"time {result.best_row['final_time_s']:.0f} s, "
+          f"thrust-limited steps {result.best_row['thrust_limited_steps']}")
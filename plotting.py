@@ -1,10 +1,12 @@
 # plotting.py
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.widgets import RadioButtons, Button
-import pandas as pd
-from tkinter import Tk, filedialog
 import re
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Trajectory column -> exported column name
+_EXPORT_COLUMNS = {"t": "t_s", "h": "h_m", "V": "V_mps", "x": "x_m", "mass": "mass_kg",
+                   "fuel_flow": "fuel_flow_kg_s", "fuel_burn": "fuel_burn_kg"}
 
 
 def _legend_outside(ax):
@@ -25,10 +27,29 @@ def _safe_sheet_name(name: str) -> str:
     return name[:31] if len(name) > 31 else name
 
 
-def interactive_plot(generate_strategy_func, simulate_func, target_altitude):
+def _af_key(af):
+    return "NA" if af is None else f"{af:.2f}"
+
+
+def _export_parquet(path, scenarios_export):
+    """All scenarios into one results_store dataset (summary + trajectories) at `path`."""
+    from results_store import ResultsStore
+    with ResultsStore(path) as store:
+        for data in scenarios_export.values():
+            store.append(data["final"], trajectory=data["trajectory"])
+
+
+def interactive_plot(generate_strategy_func, simulate_func, target_altitude, executor=None,
+                     max_workers=None, case_func=None, poll_ms=100):
     """
     Interactive plotting UI.
 
+    Simulations run in a background executor: each trajectory is drawn as soon as it
+    finishes (the GUI thread polls finished jobs on a timer), so the window stays
+    responsive. Selecting another profile cancels the jobs of the previous one that have
+    not started yet; finished results are cached per profile, so switching back redraws
+    them without simulating again.
+
     Parameters
     ----------
     generate_strategy_func : callable
@@ -37,7 +58,25 @@ def interactive_plot(generate_strategy_func, simulate_func, target_altitude):
         Function(strategy_function, altitude_fraction) -> (t, h, V, lever_positions, final_results, diagnostics)
     target_altitude : float or None
         Target altitude [m] for a guide line.
+    executor : concurrent.futures.Executor or None
+        Where simulations run. Default: a ThreadPoolExecutor owned by the plot with a
+        single worker, so simulations run one at a time off the GUI thread and never share
+        the engine concurrently. Strategy functions are closures, so a ProcessPoolExecutor
+        also needs `case_func`.
+    max_workers : int or None
+        Worker threads of the default executor (default 1). Concurrent threads share the
+        engine through its one pyengine.as_stateless adapter, which serializes the native
+        engine's stateful calls; with the GIL they rarely run faster than one worker.
+    case_func : callable or None
+        Picklable Function(profile, altitude_fraction) -> same tuple as simulate_func; when
+        given, jobs are submitted as case_func(profile, af) instead of simulate_func(strategy, af).
+    poll_ms : int
+        Interval [ms] at which finished jobs are collected and drawn.
     """
+    # GUI imports live here so importing this module (e.g. for _export_parquet) stays cheap
+    import matplotlib.pyplot as plt
+    from matplotlib.widgets import RadioButtons, Button
+
     profiles = [
         "linear",
         "exponential_increasing_climb",
@@ -64,12 +103,21 @@ def interactive_plot(generate_strategy_func, simulate_func, target_altitude):
     radio = RadioButtons(radio_ax, profiles, active=0)
     radio_ax.set_title("Strategy Profile", fontsize=10)
     btn_clear = Button(btn_ax_clear, "Clear Plots")
-    btn_save = Button(btn_ax_save, "Export Excel")
+    btn_save = Button(btn_ax_save, "Export")
 
     # storage for per-scenario exports
-    # key: (profile, af_str), value: dict with "df" (timeseries) and "final" (dict of finals)
+    # key: (profile, af_str), value: dict with "trajectory" (timeseries) and "final" (dict of finals)
     scenarios_export = {}
 
+    # background simulation state (only touched on the GUI thread)
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=max_workers or 1)
+    results_cache = {}               # profile -> {af_str: (af, simulate_func result)}
+    pending = {}                     # future -> (profile, af)
+    current = {"profile": None}
+    timer = fig.canvas.new_timer(interval=poll_ms)
+
     def _format_axes():
         ax_alt.set_title("Altitude vs Time")
         ax_alt.set_xlabel("Time [s]"); ax_alt.set_ylabel("Altitude [m]")
@@ -89,74 +137,92 @@ def interactive_plot(generate_strategy_func, simulate_func, target_altitude):
         _format_axes()
         _add_target_alt_line()
 
-    _clear_axes()
-
-    def run_profile(profile):
-        nonlocal scenarios_export
-        scenarios_export = {}
+    def _redraw():
+        _legend_outside(ax_alt)
+        _legend_outside(ax_vel)
+        _legend_outside(ax_lev)
+        fig.canvas.draw_idle()
 
-        strategies = generate_strategy_func(profile)
-        if not strategies:
-            for ax in (ax_alt, ax_vel, ax_lev):
-                _legend_outside(ax)
-            fig.canvas.draw_idle()
-            return
+    _clear_axes()
 
-        for af, strat_fn in strategies:
+    def _draw_case(profile, af, result):
+        t, h, V, lever_positions, final_results, diagnostics = result
+        label_suffix = "AF=—" if af is None else f"AF={af:.2f}"
+
+        # --- plotting
+        ax_alt.plot(t, h, label=f"{profile} | {label_suffix} | Alt")
+        ax_vel.plot(t, V, label=f"{profile} | {label_suffix} | V")
+        t_lev = t[:len(lever_positions)]
+        ax_lev.plot(t_lev, lever_positions, label=f"{profile} | {label_suffix} | Lever")
+
+        # store
+        scenarios_export[(profile, _af_key(af))] = {
+            "trajectory": diagnostics["trajectory"],
+            "final": {
+                "profile": profile,
+                "altitude_fraction": (np.nan if af is None else float(af)),
+                "final_time_s": final_results.get("Total Climb Time", np.nan),
+                "final_altitude_m": final_results.get("Final Altitude", np.nan),
+                "final_velocity_mps": final_results.get("Final Velocity", np.nan),
+                "final_mass_kg": final_results.get("Final Mass (kg)", np.nan),
+                "total_fuel_burn_kg": final_results.get("Total Fuel Burned (kg)", np.nan),
+                "engines": final_results.get("Engines", np.nan),
+            }
+        }
+
+    def _poll():
+        """Timer callback: cache every finished job, draw those of the shown profile."""
+        drawn = False
+        for fut in [f for f in pending if f.done()]:
+            profile, af = pending.pop(fut)
+            if fut.cancelled():
+                continue
             try:
-                t, h, V, lever_positions, final_results, diagnostics = simulate_func(strat_fn, af)
-                label_suffix = "AF=—" if af is None else f"AF={af:.2f}"
-
-                # --- plotting
-                ax_alt.plot(t, h, label=f"{profile} | {label_suffix} | Alt")
-                ax_vel.plot(t, V, label=f"{profile} | {label_suffix} | V")
-                t_lev = t[:len(lever_positions)]
-                ax_lev.plot(t_lev, lever_positions, label=f"{profile} | {label_suffix} | Lever")
-
-                # --- build per-scenario timeseries DataFrame (with aligned lengths)
-                n = max(len(t), len(h), len(V), len(lever_positions),
-                        len(diagnostics.get("fuel_flow_kg_s", [])),
-                        len(diagnostics.get("mass_kg", [])))
-
-                def _pad(arr, n):
-                    arr = np.asarray(arr, dtype=float)
-                    out = np.full(n, np.nan)
-                    out[:len(arr)] = arr
-                    return out
-
-                df_ts = pd.DataFrame({
-                    "t_s":     _pad(t, n),
-                    "h_m":     _pad(h, n),
-                    "V_mps":   _pad(V, n),
-                    "lever":   _pad(lever_positions, n),
-                    "fuel_flow_kg_s": _pad(diagnostics.get("fuel_flow_kg_s", []), n),
-                    "mass_kg": _pad(diagnostics.get("mass_kg", []), n),
-                })
-
-                # store
-                af_str = "NA" if af is None else f"{af:.2f}"
-                scenarios_export[(profile, af_str)] = {
-                    "df": df_ts,
-                    "final": {
-                        "profile": profile,
-                        "altitude_fraction": (np.nan if af is None else float(af)),
-                        "final_time_s": final_results.get("Total Climb Time", np.nan),
-                        "final_altitude_m": final_results.get("Final Altitude", np.nan),
-                        "final_velocity_mps": final_results.get("Final Velocity", np.nan),
-                        "final_mass_kg": final_results.get("Final Mass (kg)", np.nan),
-                        "total_fuel_burn_kg": final_results.get("Total Fuel Burned (kg)", np.nan),
-                        "engines": final_results.get("Engines", np.nan),
-                    }
-                }
-
+                result = fut.result()
             except Exception as e:
-                print(f"[ERROR] Skipped strategy {('AF=' + f'{af:.2f}' if af is not None else 'AF=—')} "
+                print(f"[ERROR] Skipped strategy {profile} {('AF=' + f'{af:.2f}' if af is not None else 'AF=—')} "
                       f"due to simulation failure: {e}")
+                continue
+            # jobs of a previous selection that were already running still land in the cache
+            results_cache.setdefault(profile, {})[_af_key(af)] = (af, result)
+            if profile == current["profile"]:
+                _draw_case(profile, af, result)
+                drawn = True
+        if drawn:
+            _redraw()
+        if not pending:
+            timer.stop()
+
+    timer.add_callback(_poll)
+
+    def _cancel_pending():
+        # queued jobs are dropped; running ones cannot be interrupted and finish into the cache
+        for fut in list(pending):
+            if fut.cancel():
+                del pending[fut]
 
-        _legend_outside(ax_alt)
-        _legend_outside(ax_vel)
-        _legend_outside(ax_lev)
-        fig.canvas.draw_idle()
+    def run_profile(profile):
+        nonlocal scenarios_export
+        scenarios_export = {}
+        current["profile"] = profile
+        _cancel_pending()
+
+        cached = results_cache.get(profile, {})
+        in_flight = {_af_key(af) for p, af in pending.values() if p == profile}
+        for af, strat_fn in generate_strategy_func(profile):
+            key = _af_key(af)
+            if key in cached:
+                _draw_case(profile, af, cached[key][1])
+            elif key not in in_flight:
+                if case_func is not None:
+                    fut = executor.submit(case_func, profile, af)
+                else:
+                    fut = executor.submit(simulate_func, strat_fn, af)
+                pending[fut] = (profile, af)
+
+        _redraw()
+        if pending:
+            timer.start()
 
     def on_profile_change(label):
         _clear_axes()
@@ -172,14 +238,20 @@ def interactive_plot(generate_strategy_func, simulate_func, target_altitude):
             print("[INFO] Nothing to export yet.")
             return
         try:
+            import pandas as pd
+            from tkinter import Tk, filedialog
             Tk().withdraw()
             path = filedialog.asksaveasfilename(
                 title="Save simulation data",
-                defaultextension=".xlsx",
-                filetypes=[("Excel workbook", "*.xlsx")]
+                defaultextension=".parquet",
+                filetypes=[("Parquet dataset (directory)", "*.parquet"), ("Excel workbook", "*.xlsx")]
             )
             if not path:
                 return
+            if not path.lower().endswith(".xlsx"):
+                _export_parquet(path, scenarios_export)
+                print(f"[INFO] Exported Parquet dataset: {path}")
+                return
 
             # Build a summary first
             summary_rows = [v["final"] for v in scenarios_export.values()]
@@ -193,16 +265,24 @@ def interactive_plot(generate_strategy_func, simulate_func, target_altitude):
                 # then one sheet per scenario
                 for (profile, af_str), data in scenarios_export.items():
                     sheet = _safe_sheet_name(f"{profile[:20]}_{af_str}")
-                    data["df"].to_excel(writer, sheet_name=sheet, index=False)
+                    df_ts = data["trajectory"].to_frame().rename(columns=_EXPORT_COLUMNS)
+                    df_ts.to_excel(writer, sheet_name=sheet, index=False)
 
             print(f"[INFO] Exported Excel workbook: {path}")
 
         except Exception as e:
             print(f"[ERROR] Failed to export: {e}")
 
+    def on_close(event):
+        timer.stop()
+        _cancel_pending()
+        if own_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
     radio.on_clicked(on_profile_change)
     btn_clear.on_clicked(on_clear_clicked)
     btn_save.on_clicked(on_save_clicked)
+    fig.canvas.mpl_connect("close_event", on_close)
 
     run_profile(profiles[0])
     plt.show()
@@ -0,0 +1,178 @@
+from collections import Counter, defaultdict
+from dataclasses import replace
+from time import perf_counter
+
+
+# (1) Profiler ----------------------------------------------------------------------------
+class Profiler:
+    """
+    Opt-in hot-path profile of a simulation: wall time per integrator phase, engine
+    calls (count, time, calls per step) and lever-solver outcomes.
+
+    Phases are timed as laps: start() marks the beginning of a step, every lap(phase)
+    charges the time since the previous mark to `phase`. Engine time spent inside a
+    phase is charged to '<phase>;engine.<method>' and excluded from the phase's own
+    time, so the flame lines (to_collapsed) nest without double counting.
+
+    The integrators only touch a profiler through `ctx.profiler` / `profiler is not
+    None` checks, so a run without one pays nothing but those checks.
+    """
+
+    def __init__(self, root="climb"):
+        self.root = root
+        self.seconds = defaultdict(float)  # phase -> self time [s]
+        self.calls = Counter()              # phase -> laps
+        self.engine_calls = Counter()       # method -> calls
+        self.engine_points = 0              # points evaluated through evaluate()
+        self.engine_seconds = defaultdict(float)  # (phase, method) -> time [s]
+        self.counters = Counter()           # lever-solver outcomes etc.
+        self.calls_per_step = []            # engine calls of every integration step
+        self._mark = None
+        self._engine_since_mark = defaultdict(float)
+        self._step_calls = 0
+
+    # --- recording --------------------------------------------------------------------
+    def start(self):
+        self._mark = perf_counter()
+        self._engine_since_mark.clear()
+
+    def lap(self, phase):
+        now = perf_counter()
+        if self._mark is not None:
+            engine = 0.0
+            for method, seconds in self._engine_since_mark.items():
+                self.engine_seconds[(phase, method)] += seconds
+                engine += seconds
+            self.seconds[phase] += now - self._mark - engine
+            self.calls[phase] += 1
+        self._engine_since_mark.clear()
+        self._mark = now
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def step(self):
+        """Close one integration step (engine calls per step)."""
+        self.calls_per_step.append(self._step_calls)
+        self._step_calls = 0
+
+    def record_engine_call(self, method, seconds, points=1):
+        self.engine_calls[method] += 1
+        self._engine_since_mark[method] += seconds
+        self._step_calls += 1
+        if method == "evaluate":
+            self.engine_points += points
+
+    # --- wiring -----------------------------------------------------------------------
+    def wrap_engine(self, engine):
+        return engine if isinstance(engine, CountingEngine) else CountingEngine(engine, self)
+
+    def attach(self, ctx):
+        """Copy of a segments.SegmentContext whose engine reports to this profiler."""
+        return replace(ctx, engine=self.wrap_engine(ctx.engine), evaluator=None, profiler=self)
+
+    # --- results ----------------------------------------------------------------------
+    def summary(self):
+        """Aggregates as a plain dict (the diagnostics['profile'] entry)."""
+        engine_total = sum(self.engine_seconds.values())
+        total = sum(self.seconds.values()) + engine_total
+        per_step = self.calls_per_step
+        return {
+            "total_s": total,
+            "steps": len(per_step),
+            "phases": {phase: {"seconds": s, "calls": self.calls[phase],
+                               "share": s / total if total else 0.0}
+                       for phase, s in sorted(self.seconds.items(), key=lambda kv: -kv[1])},
+            "engine_s": engine_total,
+            "engine_calls": dict(self.engine_calls),
+            "engine_points": self.engine_points,
+            "engine_calls_per_step": {
+                "mean": sum(per_step) / len(per_step) if per_step else 0.0,
+                "max": max(per_step, default=0),
+            },
+            "counters": dict(self.counters),
+        }
+
+    def to_collapsed(self):
+        """
+        Flame-graph input in the collapsed-stack format ('root;phase;... microseconds'
+        per line), readable by flamegraph.pl, speedscope or inferno.
+        """
+        lines = [(f"{self.root};{phase}", s) for phase, s in self.seconds.items()]
+        lines += [(f"{self.root};{phase};engine.{method}", s)
+                  for (phase, method), s in self.engine_seconds.items()]
+        return "\n".join(f"{stack} {int(round(s * 1e6))}" for stack, s in sorted(lines)) + "\n"
+
+    def write_collapsed(self, path):
+        with open(path, "w") as f:
+            f.write(self.to_collapsed())
+
+    def report(self):
+        """Human-readable table of summary()."""
+        s = self.summary()
+        rows = [f"{'phase':28s} {'time [ms]':>10s} {'share':>7s} {'calls':>8s}"]
+        for phase, p in s["phases"].items():
+            rows.append(f"{phase:28s} {1e3 * p['seconds']:10.2f} {100 * p['share']:6.1f}% {p['calls']:8d}")
+        rows.append(f"{'engine (all methods)':28s} {1e3 * s['engine_s']:10.2f} "
+                    f"{100 * s['engine_s'] / max(s['total_s'], 1e-12):6.1f}%")
+        rows.append(f"engine calls: {s['engine_calls']}  per step: "
+                    f"mean {s['engine_calls_per_step']['mean']:.1f}, max {s['engine_calls_per_step']['max']}")
+        rows.append(f"counters: {s['counters']}")
+        return "\n".join(rows)
+
+
+# (2) Engine proxy -------------------------------------------------------------------------
+class CountingEngine:
+    """
+    Engine proxy that times and counts get_thrust_with_lever_position, get_tsfc and
+    evaluate for a Profiler; everything else is forwarded. evaluate exists only where
+    the wrapped engine has it, so as_stateless still picks the right adapter.
+    """
+
+    def __init__(self, engine, profiler):
+        self.engine = engine
+        self.profiler = profiler
+        if hasattr(engine, "evaluate"):
+            self.evaluate = self._evaluate
+
+    def __getattr__(self, name):
+        if name in ("engine", "profiler") or name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.engine, name)
+
+    def get_thrust_with_lever_position(self, lever, mach, altitude):
+        t0 = perf_counter()
+        try:
+            return self.engine.get_thrust_with_lever_position(lever, mach, altitude)
+        finally:
+            self.profiler.record_engine_call("thrust", perf_counter() - t0)
+
+    def get_tsfc(self):
+        t0 = perf_counter()
+        try:
+            return self.engine.get_tsfc()
+        finally:
+            self.profiler.record_engine_call("tsfc", perf_counter() - t0)
+
+    def _evaluate(self, lever, mach, altitude):
+        t0 = perf_counter()
+        try:
+            return self.engine.evaluate(lever, mach, altitude)
+        finally:
+            points = max(getattr(lever, "size", 1), getattr(mach, "size", 1),
+                         getattr(altitude, "size", 1))
+            self.profiler.record_engine_call("evaluate", perf_counter() - t0, points)
+
+
+# (3) Quick self-test when run directly ------------------------------------------------
+if __name__ == "__main__":
+    import sys
+    import climb
+
+    profiler = Profiler()
+    *_, diagnostics = climb.simulate_climb_path(climb.strategy_for("linear", 0.5), 0.5, dt=1.0,
+                                                profiler=profiler)
+    print(profiler.report())
+    if len(sys.argv) > 1:
+        profiler.write_collapsed(sys.argv[1])
+        print(f"[INFO] Collapsed stacks written to {sys.argv[1]}")
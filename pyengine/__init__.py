@@ -20,11 +20,57 @@
 
 """Python package of the engine C++ library.
 
-    Imports the pre-build binary and exposes its interface.
+    Exposes the interface of the pre-build binary. Where the binary is not available
+    (e.g. the Windows-only .pyd on Linux), ``Engine`` is the pure-NumPy DeckEngine
+    evaluating the stub decks directly.
+
+    The binary is only loaded when one of its members (or ``Engine`` / ``NATIVE``) is
+    first accessed, so importing the package, or a submodule like ``pyengine.stateless``,
+    stays cheap. ``get_engine`` builds one engine per stub directory and process.
 """
 # Package information
 __version__ = "0.1.0"
 __author__ = "Oliver Schubert, o.schubert@tum.de"
 
-# Import the binary and expose all members
-from .py11engine import *
+from importlib import import_module
+from pathlib import Path
+
+from .deck_engine import DeckEngine
+from .stateless import StatelessEngine, as_stateless, tsfc_to_si
+
+_ENGINES = {}  # resolved stub path -> Engine, per process
+
+
+def _load_native():
+    """Import the binary and expose all its members (once)."""
+    try:
+        py11engine = import_module(".py11engine", __name__)
+    except ImportError:
+        members = {"Engine": DeckEngine, "NATIVE": False}
+    else:
+        members = {k: v for k, v in vars(py11engine).items() if not k.startswith("_")}
+        members["NATIVE"] = True
+    globals().update(members)
+
+
+def _member(name):
+    if "NATIVE" not in globals():
+        _load_native()
+    try:
+        return globals()[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+
+
+def __getattr__(name):
+    if name.startswith("__"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return _member(name)
+
+
+def get_engine(stub_path):
+    """One Engine per stub directory and process, constructed on first request."""
+    key = str(Path(stub_path).resolve())
+    if key not in _ENGINES:
+        _ENGINES[key] = _member("Engine")(key)
+    return _ENGINES[key]
@@ -0,0 +1,258 @@
+"""Pure-Python/NumPy engine deck evaluator.
+
+    Reads the stub decks directly (thrust ``_FN`` and fuel flow ``_WF`` named in
+    ``<engine>.xml``) and mirrors the part of the py11engine interface the mission code
+    uses, so it can stand in where the native binary is unavailable.
+"""
+import xml.etree.ElementTree as ET
+from bisect import bisect_right
+from pathlib import Path
+
+import numpy as np
+
+from .decks import load_decks
+
+# Points within this cell fraction of a deck node sit on the node, as in the native engine,
+# so round-off (0.02 * 35 = 0.7000000000000001) never pulls in an invalid neighbour cell.
+_NODE_TOL = 1e-9
+_CORNERS = np.array([(da, dm) for da in (0, 1) for dm in (0, 1)])
+
+
+class DeckEngine:
+    """
+    Engine model on the stub's N1 decks.
+
+    As in the native binary, the decks are first interpolated bilinearly in (altitude,
+    Mach) at every N1 node, and the lever is mapped linearly onto the N1 axis of that
+    curve: lever 0 is its lowest valid N1 (idle, the highest idle N1 of the surrounding
+    deck cells), lever 1 the deck's top N1. Thrust and fuel flow are then interpolated
+    along N1. Flight conditions outside the deck axes are invalid (NaN), where the
+    native engine raises "out of range".
+
+    Altitude uses the deck's row axis, i.e. the same value the native
+    get_thrust_with_lever_position takes. Thrust is returned in N, TSFC in kg/(N·s).
+    lls/envelope_scan/engine_envelope.csv holds a native scan this class is checked
+    against (tests/test_deck_engine.py).
+    """
+
+    def __init__(self, stub_path, cache_dir=None):
+        self.stub_path = Path(stub_path)
+        self.name = self.stub_path.name
+        self.data = _read_engine_xml(self.stub_path / f"{self.name}.xml")
+        self.decks = load_decks(self.stub_path, cache_dir=cache_dir)
+
+        fn = self.decks[self.deck_key("ThrustDeckName")]
+        wf = self.decks[self.deck_key("FuelDeckName")]
+        self.n1 = np.asarray(fn.n1, dtype=float)
+        self.altitudes = np.asarray(fn.altitude, dtype=float)
+        self.machs = np.asarray(fn.mach, dtype=float)
+
+        # (alt, mach, n1): one contiguous N1 column per flight condition
+        self.fn_table = np.moveaxis(np.asarray(fn.values, dtype=float), 0, -1) * 1000.0  # kN -> N
+        self.wf_table = np.moveaxis(np.asarray(wf.values, dtype=float), 0, -1)           # kg/s
+        self.n1_idle = self._idle_n1()
+
+        # flat views for the array path: one gather per lookup instead of three index arrays.
+        # _brackets[cell, k] = (fn[k], wf[k], fn[k+1], wf[k+1]) at cell = alt_index*n_mach + mach_index
+        n_cells = self.altitudes.size * self.machs.size
+        pairs = np.stack((self.fn_table, self.wf_table), axis=-1).reshape(n_cells, self.n1.size, 2)
+        self._brackets = np.concatenate((pairs[:, :-1], pairs[:, 1:]), axis=-1)
+        self._idle_flat = self.n1_idle.ravel()
+        self._corner_offsets = (_CORNERS[:, 0] * self.machs.size + _CORNERS[:, 1])[:, None]
+        self._alt_axis, self._mach_axis, self._n1_axis = (
+            _Axis(axis) for axis in (self.altitudes, self.machs, self.n1))
+
+        # nested lists for the scalar path (one call per integration step)
+        self._n1_list = self.n1.tolist()
+        self._alts_list = self.altitudes.tolist()
+        self._machs_list = self.machs.tolist()
+        self._fn_nested = self.fn_table.tolist()
+        self._wf_nested = self.wf_table.tolist()
+        self._idle_nested = self.n1_idle.tolist()
+
+        self._last = (np.nan, np.nan, np.nan)  # evaluate() result read by get_tsfc()
+        self._tables = {}                      # deck name -> (alt, mach, n1) table (deck_values)
+
+    # --- idle N1 per deck cell ------------------------------------------------------------
+    def _idle_n1(self):
+        valid = np.isfinite(self.fn_table) & np.isfinite(self.wf_table) & (self.fn_table >= 0.0)
+        # idle: lowest N1 of the valid run that ends at the top of the deck
+        top_run = np.flip(np.logical_and.accumulate(np.flip(valid, axis=-1), axis=-1), axis=-1)
+        return np.where(top_run.any(axis=-1), self.n1[np.argmax(top_run, axis=-1)], np.nan)
+
+    # --- stateless query -----------------------------------------------------------------
+    def evaluate(self, lever, mach, altitude):
+        """
+        (thrust [N], tsfc [kg/(N·s)], fuel_flow [kg/s]) per engine, no hidden state.
+        Scalars in give floats out; arrays are broadcast. NaN where the deck is invalid.
+        """
+        if _is_scalar(lever) and _is_scalar(mach) and _is_scalar(altitude):
+            thrust, fuel_flow = self._interpolate_scalar(float(lever), float(mach), float(altitude))
+            return thrust, (fuel_flow / thrust if thrust > 0.0 else float("nan")), fuel_flow
+        thrust, fuel_flow = self._interpolate(lever, mach, altitude)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            tsfc = np.where(thrust > 0.0, fuel_flow / thrust, np.nan)
+        return thrust, tsfc, fuel_flow
+
+    def thrust(self, lever, mach, altitude):
+        return self.evaluate(lever, mach, altitude)[0]
+
+    def tsfc(self, lever, mach, altitude):
+        return self.evaluate(lever, mach, altitude)[1]
+
+    def thrust_and_tsfc(self, lever, mach, altitude):
+        thrust, tsfc, _ = self.evaluate(lever, mach, altitude)
+        return thrust, tsfc
+
+    # --- stateful interface of the native Engine (wraps evaluate) ------------------------
+    def get_thrust_with_lever_position(self, lever, mach, altitude):
+        """Thrust per engine [N]; also sets the state get_tsfc() reads."""
+        self._last = self.evaluate(float(lever), float(mach), float(altitude))
+        return self._last[0]
+
+    def get_tsfc(self):
+        """TSFC [kg/(N·s)] at the last get_thrust_with_lever_position state."""
+        return self._last[1]
+
+    def deck_key(self, tag, default=None):
+        """
+        Key in `decks` (and for deck_values) of the deck file the engine XML names under
+        `tag`, e.g. 'SNoxDeckName'; `default` is used where the XML has no such entry.
+        """
+        return _deck_key(self.data.get(tag, default), self.name)
+
+    def deck_values(self, deck, lever, mach, altitude):
+        """
+        Any other stub deck (e.g. 'sNOx', 'St3_T') at `lever`, through the same lever→N1
+        mapping and blending as thrust. Arrays are broadcast; NaN where the deck is invalid.
+        """
+        table = self._tables.get(deck)
+        if table is None:
+            table = np.moveaxis(np.asarray(self.decks[deck].values, dtype=float), 0, -1)
+            if table.shape != self.fn_table.shape:
+                raise ValueError(f"Deck {deck!r} has shape {table.shape}, "
+                                 f"expected the thrust deck's {self.fn_table.shape}")
+            table = table.reshape(-1, self.n1.size)
+            self._tables[deck] = table
+        cells, w, k, wk, inside, shape = self._cells(lever, mach, altitude)
+        values = (1.0 - wk) * table[cells, k] + wk * table[cells, k + 1]
+        values = np.where(w > 0.0, w * values, 0.0).sum(axis=0)
+        return np.where(inside, values, np.nan).reshape(shape)
+
+    def _cells(self, lever, mach, altitude):
+        """
+        The four (alt, mach) corner cells (flat indices), their blend weights, the N1
+        bracket of each point and whether it lies inside the deck axes.
+        """
+        lever, mach, altitude = _broadcast(lever, mach, altitude)
+        shape = lever.shape
+        lever, mach, altitude = lever.ravel(), mach.ravel(), altitude.ravel()
+        alts, machs = self.altitudes, self.machs
+        inside = ((altitude >= alts[0]) & (altitude <= alts[-1])
+                  & (mach >= machs[0]) & (mach <= machs[-1]))
+        ia, wa = self._alt_axis.locate(altitude)
+        im, wm = self._mach_axis.locate(mach)
+
+        cells = (ia * machs.size + im) + self._corner_offsets  # (4, N), in _CORNERS order
+        ua, um = 1.0 - wa, 1.0 - wm  # weights in _CORNERS order (direct products, no stacking)
+        w = np.array([ua * um, ua * wm, wa * um, wa * wm])
+        # idle of the blended curve: highest idle of the cells that carry weight (NaN wins)
+        idle = np.where(w > 0.0, self._idle_flat[cells], -np.inf).max(axis=0)
+        lever = np.minimum(np.maximum(lever, 0.0), 1.0)
+        k, wk = self._n1_axis.locate(idle + lever * (self.n1[-1] - idle))
+        return cells, w, k, wk, inside, shape
+
+    def _interpolate(self, lever, mach, altitude):
+        cells, w, k, wk, inside, shape = self._cells(lever, mach, altitude)
+        bracket = self._brackets[cells, k]                              # (4, N, 4)
+        values = (1.0 - wk)[:, None] * bracket[..., :2] + wk[:, None] * bracket[..., 2:]
+        w = w[..., None]
+        values = np.where(w > 0.0, w * values, 0.0).sum(axis=0)         # (N, 2)
+        values[~inside] = np.nan
+        return values[:, 0].reshape(shape), values[:, 1].reshape(shape)
+
+    def _interpolate_scalar(self, lever, mach, altitude):
+        alts, machs = self._alts_list, self._machs_list
+        if not (alts[0] <= altitude <= alts[-1] and machs[0] <= mach <= machs[-1]):
+            return float("nan"), float("nan")
+        lever = min(max(lever, 0.0), 1.0)
+        ia, wa = _locate_scalar(alts, altitude)
+        im, wm = _locate_scalar(machs, mach)
+        corners = [(ia + da, im + dm, fa * fm)
+                   for da, fa in ((0, 1.0 - wa), (1, wa)) if fa > 0.0
+                   for dm, fm in ((0, 1.0 - wm), (1, wm)) if fm > 0.0]
+        idle = max(self._idle_nested[a][m] for a, m, _ in corners)
+        if idle != idle or any(self._idle_nested[a][m] != self._idle_nested[a][m] for a, m, _ in corners):
+            return float("nan"), float("nan")
+        n1_list = self._n1_list
+        k, wk = _locate_scalar(n1_list, idle + lever * (n1_list[-1] - idle))
+        thrust = fuel_flow = 0.0
+        for a, m, w in corners:
+            fn, wf = self._fn_nested[a][m], self._wf_nested[a][m]
+            thrust += w * ((1.0 - wk) * fn[k] + wk * fn[k + 1])
+            fuel_flow += w * ((1.0 - wk) * wf[k] + wk * wf[k + 1])
+        return thrust, fuel_flow
+
+
+# --- helpers ---------------------------------------------------------------------------
+def _read_engine_xml(path):
+    """Numeric and deck-name entries of <EngineDesignCondition> and <Deck>, by tag."""
+    root = ET.parse(path).getroot()
+    data = {}
+    for section in ("EngineDesignCondition", "Deck", "EmissionFactors"):
+        node = root.find(section)
+        if node is None:
+            continue
+        for child in node:
+            text = (child.text or "").strip()
+            try:
+                data[child.tag] = float(text)
+            except ValueError:
+                data[child.tag] = text
+    return data
+
+
+def _deck_key(file_name, engine_name):
+    """'PW1127G-JM_St5_T.csv' -> 'St5_T' (the name pyengine.decks uses)."""
+    stem = Path(file_name).stem
+    prefix = engine_name + "_"
+    return stem[len(prefix):] if stem.startswith(prefix) else stem
+
+
+class _Axis:
+    """An ascending deck axis with its interior nodes and cell widths precomputed."""
+
+    def __init__(self, axis):
+        self.inner = axis[1:-1]
+        self.lower = axis[:-1]
+        self.width = np.diff(axis)
+
+    def locate(self, x):
+        """
+        Cell index and weight of each x, clamped to the edge cells (vectorized twin of
+        _locate_scalar, bit for bit): out-of-axis points get weight 0 or 1 of the edge cell.
+        """
+        i = self.inner.searchsorted(x, side="right")
+        w = (x - self.lower[i]) / self.width[i]
+        w[w < _NODE_TOL] = 0.0
+        w[w > 1.0 - _NODE_TOL] = 1.0
+        return i, w
+
+
+def _broadcast(*xs):
+    """Float arrays of a common shape (skips np.broadcast_arrays when the shapes already agree)."""
+    xs = [np.asarray(x, dtype=float) for x in xs]
+    if all(x.shape == xs[0].shape for x in xs[1:]):
+        return xs
+    return np.broadcast_arrays(*xs)
+
+
+def _is_scalar(x):
+    return isinstance(x, (int, float))
+
+
+def _locate_scalar(axis, x):
+    x = min(max(x, axis[0]), axis[-1])
+    i = min(max(bisect_right(axis, x) - 1, 0), len(axis) - 2)
+    w = (x - axis[i]) / (axis[i + 1] - axis[i])
+    return i, (0.0 if w < _NODE_TOL else 1.0 if w > 1.0 - _NODE_TOL else w)
@@ -0,0 +1,263 @@
+"""Parsed engine decks backed by a memory-mapped binary cache.
+
+    Every ``<engine>_<quantity>.csv`` deck of a stub directory is parsed once into a
+    single binary file (one value block per deck) plus a JSON index holding the axes,
+    offsets and shapes. The cache file name carries a hash of the CSV contents, so an
+    edited deck produces a new cache. Later runs open the file with ``np.memmap``:
+    nothing is parsed, and pool workers mapping the same file share its pages.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+INVALID = -9999.0
+CACHE_DIRNAME = ".deck_cache"
+
+_LOADED = {}  # cache file -> {name: Deck}, per process
+
+
+class Deck:
+    """
+    One engine deck: ``values[i_n1, i_alt, i_mach]`` on ascending axes.
+
+    ``n1`` is the relative low-pressure spool speed of each block, ``altitude`` and
+    ``mach`` the row/column axes as written in the CSV. Invalid points (-9999) are NaN.
+    """
+
+    __slots__ = ("name", "n1", "altitude", "mach", "values")
+
+    def __init__(self, name, n1, altitude, mach, values):
+        self.name = name
+        self.n1 = n1
+        self.altitude = altitude
+        self.mach = mach
+        self.values = values
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def __repr__(self):
+        return f"Deck({self.name!r}, shape={self.values.shape})"
+
+
+# --- CSV parsing -----------------------------------------------------------------------
+def parse_deck_csv(path, name=None):
+    """
+    Parse one semicolon-delimited deck.
+
+    The file is a sequence of blocks: a header row ``N1;mach_0;...;mach_k;`` followed
+    by rows ``altitude;value_0;...;value_k;``. Blocks are re-ordered to ascending N1.
+    """
+    path = Path(path)
+    blocks, n1s, altitude, mach = [], [], None, None
+    rows, row_alts = None, None
+    with open(path, "r") as f:
+        for line in f:
+            cells = [c for c in line.strip().split(";") if c != ""]
+            if not cells:
+                continue
+            if rows is None or len(cells) != len(mach) + 1 or _is_header(cells, mach):
+                if rows:
+                    blocks.append(rows)
+                    altitude = _check_axis(altitude, row_alts, path, "altitude")
+                n1s.append(float(cells[0]))
+                mach = _check_axis(mach, [float(c) for c in cells[1:]], path, "Mach")
+                rows, row_alts = [], []
+                continue
+            row_alts.append(float(cells[0]))
+            rows.append([float(c) for c in cells[1:]])
+    if rows:
+        blocks.append(rows)
+        altitude = _check_axis(altitude, row_alts, path, "altitude")
+    if not blocks:
+        raise ValueError(f"No deck blocks found in {path}")
+
+    values = np.asarray(blocks, dtype=float)
+    values[values == INVALID] = np.nan
+    n1 = np.asarray(n1s, dtype=float)
+    order = np.argsort(n1, kind="stable")
+    return Deck(name or deck_name(path), n1[order], np.asarray(altitude, dtype=float),
+                np.asarray(mach, dtype=float), values[order])
+
+
+def _is_header(cells, mach):
+    # header rows repeat the Mach axis after the N1 value
+    return mach is not None and [float(c) for c in cells[1:]] == list(mach)
+
+
+def _check_axis(current, new, path, label):
+    if current is not None and list(current) != list(new):
+        raise ValueError(f"Inconsistent {label} axis between blocks in {path}")
+    return new
+
+
+def deck_name(path):
+    """'PW1127G-JM_St13_T.csv' -> 'St13_T' (engine prefix = stub directory name)."""
+    path = Path(path)
+    prefix = path.parent.name + "_"
+    stem = path.stem
+    return stem[len(prefix):] if stem.startswith(prefix) else stem
+
+
+def deck_files(stub_dir):
+    return sorted(Path(stub_dir).glob("*.csv"))
+
+
+# --- binary cache ----------------------------------------------------------------------
+def decks_key(files):
+    """Hash over file names and contents of all decks (order independent)."""
+    h = hashlib.sha1()
+    for path in sorted(files, key=lambda p: p.name):
+        h.update(path.name.encode())
+        h.update(hashlib.sha1(path.read_bytes()).digest())
+    return h.hexdigest()[:16]
+
+
+def stub_key(stub_dir):
+    """decks_key over every file of the stub (decks and engine XML), i.e. the engine itself."""
+    return decks_key([p for p in Path(stub_dir).iterdir()
+                      if p.is_file() and not p.name.startswith(".")])
+
+
+def build_cache(stub_dir, cache_path, dtype=np.float64):
+    """
+    Parse every deck of `stub_dir` and write ``cache_path`` (.bin) + index (.json).
+
+    Both go through uniquely named temp files in the cache directory and are renamed
+    into place, so pool workers building the same cache at once never write into each
+    other's files; the last rename wins and all candidates have identical contents.
+    """
+    cache_path = Path(cache_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    dtype = np.dtype(dtype)
+
+    index = {"dtype": dtype.str, "decks": {}}
+    tmp_bin = _temp_path(cache_path)
+    tmp_idx = _temp_path(_index_path(cache_path))
+    try:
+        _write_cache(stub_dir, dtype, index, tmp_bin, tmp_idx)
+        # data first, index last: an index on disk always points at a complete data file
+        os.replace(tmp_bin, cache_path)
+        os.replace(tmp_idx, _index_path(cache_path))
+    finally:
+        for tmp in (tmp_bin, tmp_idx):
+            if tmp.exists():
+                tmp.unlink()
+    return cache_path
+
+
+def _write_cache(stub_dir, dtype, index, tmp_bin, tmp_idx):
+    offset = 0
+    with open(tmp_bin, "wb") as f:
+        for path in deck_files(stub_dir):
+            deck = parse_deck_csv(path)
+            block = np.ascontiguousarray(deck.values, dtype=dtype)
+            f.write(block.tobytes())
+            index["decks"][deck.name] = {
+                "file": path.name,
+                "offset": offset,
+                "shape": list(block.shape),
+                "n1": deck.n1.tolist(),
+                "altitude": deck.altitude.tolist(),
+                "mach": deck.mach.tolist(),
+            }
+            offset += block.nbytes
+    with open(tmp_idx, "w") as f:
+        json.dump(index, f)
+
+
+def cache_is_valid(cache_path):
+    """True where the index reads and its blocks exactly fill the data file."""
+    cache_path = Path(cache_path)
+    try:
+        with open(_index_path(cache_path), "r") as f:
+            index = json.load(f)
+        itemsize = np.dtype(index["dtype"]).itemsize
+        end = 0
+        for entry in index["decks"].values():
+            if entry["offset"] != end:
+                return False
+            end += int(np.prod(entry["shape"])) * itemsize
+        return cache_path.stat().st_size == end
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+
+def open_cache(cache_path):
+    """Map a cache file read-only; each Deck.values is a view into one shared memmap."""
+    cache_path = Path(cache_path)
+    with open(_index_path(cache_path), "r") as f:
+        index = json.load(f)
+    dtype = np.dtype(index["dtype"])
+    decks = {}
+    if cache_path.stat().st_size == 0:
+        return decks
+    data = np.memmap(cache_path, dtype=np.uint8, mode="r")
+    for name, entry in index["decks"].items():
+        shape = tuple(entry["shape"])
+        nbytes = int(np.prod(shape)) * dtype.itemsize
+        values = data[entry["offset"]:entry["offset"] + nbytes].view(dtype).reshape(shape)
+        decks[name] = Deck(name, np.asarray(entry["n1"]), np.asarray(entry["altitude"]),
+                           np.asarray(entry["mach"]), values)
+    return decks
+
+
+def load_decks(stub_dir, cache_dir=None, dtype=np.float64):
+    """
+    All decks of `stub_dir` as ``{name: Deck}`` ('FN', 'WF', 'sNOx', 'St13_T', ...).
+
+    The binary cache lives in `cache_dir` (default ``<stub_dir>/.deck_cache``) and is
+    built on first use. Repeated calls in one process return the same mapping.
+    """
+    stub_dir = Path(stub_dir)
+    files = deck_files(stub_dir)
+    if not files:
+        raise FileNotFoundError(f"No deck CSV files in {stub_dir}")
+    cache_dir = stub_dir / CACHE_DIRNAME if cache_dir is None else Path(cache_dir)
+    dtype = np.dtype(dtype)
+    cache_path = cache_dir / f"{stub_dir.name}_{decks_key(files)}_{dtype.name}.bin"
+
+    key = str(cache_path.resolve())
+    if key in _LOADED:
+        return _LOADED[key]
+    if not cache_is_valid(cache_path):
+        try:
+            build_cache(stub_dir, cache_path, dtype)
+        except OSError as e:
+            # read-only stub location: parse in memory instead of failing
+            print(f"[WARNING] Could not write deck cache {cache_path}: {e}")
+            decks = _parse_all(files, dtype)
+            _LOADED[key] = decks
+            return decks
+        if not cache_is_valid(cache_path):
+            print(f"[WARNING] Deck cache {cache_path} is inconsistent after writing; "
+                  f"parsing the decks in memory")
+            decks = _parse_all(files, dtype)
+            _LOADED[key] = decks
+            return decks
+    decks = open_cache(cache_path)
+    _LOADED[key] = decks
+    return decks
+
+
+def _parse_all(files, dtype):
+    decks = {d.name: d for d in (parse_deck_csv(p) for p in files)}
+    for d in decks.values():
+        d.values = d.values.astype(dtype)
+    return decks
+
+
+def _index_path(cache_path):
+    return Path(cache_path).with_suffix(".json")
+
+
+def _temp_path(path):
+    """Fresh, uniquely named file next to `path` (same directory, so os.replace is atomic)."""
+    fd, name = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".", suffix=".tmp")
+    os.close(fd)
+    return Path(name)
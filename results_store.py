@@ -0,0 +1,252 @@
+import itertools
+import os
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+SUMMARY_DIR = "summary"
+TRAJECTORY_DIR = "trajectories"
+FLUSH_ROWS = 250_000  # buffered rows (summary + trajectory) before files are written
+
+# (1) Results store ---------------------------------------------------------------------
+# final_results key -> summary column
+FINAL_COLUMNS = {
+    "Total Climb Time": "final_time_s",
+    "Final Altitude": "final_altitude_m",
+    "Final Velocity": "final_velocity_mps",
+    "Final Mass (kg)": "final_mass_kg",
+    "Total Fuel Burned (kg)": "total_fuel_burn_kg",
+    "Final Lever Position": "final_lever",
+    "Engines": "engines",
+    "Ground Distance (m)": "ground_distance_m",
+    "Total CO2 (kg)": "total_co2_kg",
+    "Total H2O (kg)": "total_h2o_kg",
+    "Total NOx (kg)": "total_nox_kg",
+}
+
+
+def summary_row(params, final_results=None, trajectory=None):
+    """Flat summary row: scenario parameters + renamed final_results (+ step counts)."""
+    row = dict(params)
+    for key, column in FINAL_COLUMNS.items():
+        if final_results is not None and key in final_results:
+            value = final_results[key]
+            row[column] = np.nan if value is None else value
+    if trajectory is not None:
+        s = trajectory.summary()
+        row.setdefault("n_steps", max(s["n_points"] - 1, 0))
+        row.setdefault("none_lever_steps", s.get("none_lever_steps", 0))
+        row.setdefault("thrust_limited_steps", s.get("thrust_limited_steps", 0))
+    return row
+
+
+class ResultsStore:
+    """
+    Sweep results as two hive-partitioned Parquet datasets under `root`:
+
+      summary/<partition>=<value>/part-*.parquet       one row per run (run_id, scenario
+                                                       parameters, final results)
+      trajectories/<partition>=<value>/part-*.parquet  one row per integration point
+                                                       (run_id, parameters, Trajectory
+                                                       columns)
+
+    Rows are buffered per partition and written as new files every `flush_rows`
+    buffered rows (and on flush/close), so memory stays bounded however many runs
+    are appended. File names are unique per writer, so several processes can append
+    to the same root. Queries go through pyarrow.dataset: partition and row-group
+    statistics prune files before anything is read (predicate pushdown).
+
+    Requires pyarrow.
+    """
+
+    def __init__(self, root, partition_by=("profile",), flush_rows=FLUSH_ROWS):
+        import pyarrow  # fail here with a clear ImportError rather than at the first flush
+        self.root = Path(root)
+        self.partition_by = tuple(partition_by)
+        self.flush_rows = int(flush_rows)
+        self._writer = uuid.uuid4().hex[:12]
+        self._run_ids = itertools.count()
+        self._files = itertools.count()
+        self._summary = {}       # partition -> [row dicts]
+        self._trajectories = {}  # partition -> [(run_id, params, {column: array})]
+        self._buffered = 0
+
+    # --- writing -------------------------------------------------------------------------
+    def append(self, row, trajectory=None, final_results=None):
+        """
+        Add one run. `row` holds the scenario parameters (and any result columns, e.g. a
+        sweep row); `final_results` (a climb final_results dict) is merged in renamed.
+        Returns the run_id.
+        """
+        run_id = f"{self._writer}-{next(self._run_ids)}"
+        row = summary_row(row, final_results, trajectory)
+        row["run_id"] = run_id
+        part = self._partition(row)
+        self._summary.setdefault(part, []).append(row)
+        self._buffered += 1
+        if trajectory is not None and len(trajectory):
+            params = {k: v for k, v in row.items() if _is_parameter(v)}
+            columns = {name: np.array(col) for name, col in trajectory.as_dict().items()}
+            self._trajectories.setdefault(part, []).append((run_id, params, columns))
+            self._buffered += len(trajectory)
+        if self._buffered >= self.flush_rows:
+            self.flush()
+        return run_id
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def flush(self):
+        """Write everything buffered to new Parquet files."""
+        import pyarrow as pa
+        for part, rows in self._summary.items():
+            if rows:
+                self._write(SUMMARY_DIR, part, pa.Table.from_pylist(_uniform(rows)))
+        for part, runs in self._trajectories.items():
+            if runs:
+                self._write(TRAJECTORY_DIR, part, _trajectory_table(runs))
+        self._summary, self._trajectories, self._buffered = {}, {}, 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _partition(self, row):
+        return tuple((key, _partition_value(row.get(key))) for key in self.partition_by)
+
+    def _write(self, kind, part, table):
+        import pyarrow.parquet as pq
+        directory = self.root / kind
+        for key, value in part:
+            directory = directory / f"{key}={value}"
+            table = table.drop_columns([key]) if key in table.column_names else table
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"part-{self._writer}-{next(self._files):05d}.parquet"
+        tmp = path.with_name(path.name + ".tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, path)  # readers never see a partial file
+
+    # --- reading -------------------------------------------------------------------------
+    def dataset(self, kind=SUMMARY_DIR):
+        return open_dataset(self.root, kind)
+
+    def query_summary(self, filters=None, columns=None):
+        """Summary rows matching `filters` as a DataFrame, e.g. [("total_fuel_burn_kg", "<", 1100)]."""
+        return query(self.root, SUMMARY_DIR, filters, columns)
+
+    def query_trajectories(self, filters=None, columns=None, run_ids=None):
+        """Trajectory rows matching `filters` (and `run_ids`) as a DataFrame."""
+        return query(self.root, TRAJECTORY_DIR, filters, columns, run_ids)
+
+
+# (2) Module-level readers (no writer needed) ---------------------------------------------
+def open_dataset(root, kind=SUMMARY_DIR):
+    """
+    pyarrow Dataset over one kind of file. Files written at different times may differ
+    in columns or null-only types; their schemas are unified from the footers.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    base = Path(root) / kind
+    files = [str(p) for p in sorted(base.rglob("*.parquet"))]
+    if not files:
+        raise FileNotFoundError(f"No Parquet files under {base}")
+    dataset = ds.dataset(files, format="parquet", partitioning="hive", partition_base_dir=str(base))
+    schema = pa.unify_schemas([dataset.schema] + [pq.read_schema(f) for f in files],
+                              promote_options="permissive")
+    return ds.dataset(files, schema=schema, format="parquet", partitioning="hive",
+                      partition_base_dir=str(base))
+
+
+def to_expression(filters):
+    """
+    pyarrow.dataset expression from pandas-style filters: [(column, op, value), ...]
+    (AND) or a list of such lists (OR of ANDs). Expressions pass through unchanged.
+    """
+    if filters is None:
+        return None
+    import pyarrow.dataset as ds
+    if isinstance(filters, ds.Expression):
+        return filters
+    import pyarrow.parquet as pq
+    return pq.filters_to_expression(filters)
+
+
+def query(root, kind=SUMMARY_DIR, filters=None, columns=None, run_ids=None):
+    import pyarrow.compute as pc
+    expression = to_expression(filters)
+    if run_ids is not None:
+        ids = pc.field("run_id").isin(list(run_ids))
+        expression = ids if expression is None else expression & ids
+    return open_dataset(root, kind).to_table(filter=expression, columns=columns).to_pandas()
+
+
+def iter_batches(root, kind=TRAJECTORY_DIR, filters=None, columns=None, batch_size=65_536):
+    """Stream matching rows as pyarrow RecordBatches (bounded memory)."""
+    scanner = open_dataset(root, kind).scanner(filter=to_expression(filters), columns=columns,
+                                               batch_size=batch_size)
+    yield from scanner.to_batches()
+
+
+# (3) Helpers ---------------------------------------------------------------------------
+def _is_parameter(value):
+    return value is None or isinstance(value, (str, bool, int, float, np.integer, np.floating))
+
+
+def _partition_value(value):
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return "__NA__"
+    return str(value).replace("/", "_").replace("=", "_")
+
+
+def _uniform(rows):
+    # rows may differ in keys (e.g. error rows): give every row every column
+    keys = list(dict.fromkeys(k for row in rows for k in row))
+    return [{k: row.get(k) for k in keys} for row in rows]
+
+
+def _trajectory_table(runs):
+    import pyarrow as pa
+    lengths = [len(next(iter(columns.values()))) for _, _, columns in runs]
+    table = {"run_id": pa.array(np.repeat([run_id for run_id, _, _ in runs], lengths))}
+    for name in runs[0][2]:
+        table[name] = pa.array(np.concatenate([columns[name] for _, _, columns in runs]))
+    param_keys = list(dict.fromkeys(k for _, params, _ in runs for k in params))
+    for key in param_keys:
+        if key == "run_id":
+            continue
+        values = [params.get(key) for _, params, _ in runs]
+        table[key] = pa.array(np.repeat(np.array(values, dtype=object), lengths).tolist())
+    return pa.table(table)
+
+
+# (4) Quick self-test when run directly ------------------------------------------------
+if __name__ == "__main__":
+    import tempfile
+    import climb
+
+    with tempfile.TemporaryDirectory() as root:
+        with ResultsStore(root) as store:
+            for profile in ("linear", "constant_speed"):
+                for af, strategy in climb.generate_strategy(profile):
+                    t, h, V, lever_positions, final_results, diagnostics = climb.simulate_climb_path(
+                        strategy, af, dt=1.0)
+                    store.append({"profile": profile, "altitude_fraction": af, "dt": 1.0},
+                                 trajectory=diagnostics["trajectory"], final_results=final_results)
+        summary = store.query_summary()
+        print(f"[INFO] {len(summary)} runs stored")
+        cutoff = float(summary["total_fuel_burn_kg"].median())
+        cheap = store.query_summary([("total_fuel_burn_kg", "<", cutoff)],
+                                    columns=["run_id", "profile", "altitude_fraction", "total_fuel_burn_kg"])
+        print(f"[INFO] Runs with fuel burn < {cutoff:.1f} kg:\n{cheap}")
+        points = store.query_trajectories([("profile", "=", "linear"), ("h", ">", 4000.0)],
+                                          columns=["run_id", "t", "h", "V"])
+        print(f"[INFO] {len(points)} linear-profile points above 4000 m")
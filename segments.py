@@ -0,0 +1,387 @@
+import math
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+
+from atmosphere import Atmosphere
+from mission_state import MissionState
+from pyengine.stateless import as_stateless
+from trajectory import Trajectory
+
+atm = Atmosphere()
+GAMMA, R_AIR = 1.4, 287.05  # for a = sqrt(gamma * R * T)
+FT_PER_M = 3.28084
+
+# Engine query envelope (same clipping as the climb integrator)
+MACH_MIN_FOR_ENGINE   = 0.00
+MACH_MAX_FOR_ENGINE   = 0.94
+ALT_MIN_FT_FOR_ENGINE = 0.0
+ALT_MAX_FT_FOR_ENGINE = 14000.0
+
+
+# (1) Segment context -------------------------------------------------------------------
+@dataclass
+class SegmentContext:
+    """
+    Everything a segment needs besides the MissionState: the engine (plus optional lever
+    solver / lever cache) and the aircraft constants used by drag and thrust bookkeeping.
+    An optional profiler.Profiler collects phase timings (see Profiler.attach).
+    `atmosphere` (an atmosphere.Atmosphere, e.g. an OffDesignAtmosphere for hot days
+    or winds) defaults to the ISA model.
+    """
+    engine: object
+    S_ref: float = 122.4
+    CD0: float = 0.02
+    AR: float = 9.5
+    e: float = 0.85
+    n_engines: int = 2
+    lever_solver: object = None
+    lever_cache: object = None
+    profiler: object = None
+    atmosphere: object = None
+    evaluator: object = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self.evaluator is None:
+            self.evaluator = as_stateless(self.engine)
+        if self.atmosphere is None:
+            self.atmosphere = atm
+
+
+def default_context(engine=None, **overrides):
+    """Context from the climb module's constants (and its engine unless one is given)."""
+    import climb
+    values = dict(engine=climb.eng if engine is None else engine, S_ref=climb.S_ref,
+                  CD0=climb.CD0, AR=climb.AR, e=climb.e, n_engines=climb.N_ENGINES)
+    values.update(overrides)
+    return SegmentContext(**values)
+
+
+# (2) Shared physics --------------------------------------------------------------------
+# Scalars (one call per integration step) or arrays (simulate_climb_batch): the same
+# expressions either way, so the batched and scalar integrators agree bit for bit.
+def _floor(x, lower):
+    """max(x, lower) for a scalar, np.maximum for an array (the scalar form is faster)."""
+    return np.maximum(x, lower) if isinstance(x, np.ndarray) else max(x, lower)
+
+
+def flight_condition(altitude, velocity, atmosphere=atm):
+    """
+    Atmosphere and engine query point at (altitude [m], velocity [m/s]).
+
+    Returns (T, P, rho, a, mach, g, alt_ft, mach_eng, alt_ft_eng) in `atmosphere`
+    (default ISA; normally ctx.atmosphere). Array altitudes give arrays throughout.
+    """
+    if isinstance(altitude, np.ndarray):
+        g = atmosphere.get_gravity_array(altitude)
+        T, P, rho = atmosphere.calculate_atmospheric_properties_array_m(altitude)
+    else:
+        g = atmosphere.get_gravity(altitude)
+        T, P, rho = atmosphere.calculate_atmospheric_properties_m(altitude)
+    a    = np.sqrt(GAMMA * R_AIR * T)
+    mach = velocity / _floor(a, 1e-9)
+    alt_ft = altitude * FT_PER_M
+    mach_eng   = np.clip(mach,   MACH_MIN_FOR_ENGINE, MACH_MAX_FOR_ENGINE)
+    alt_ft_eng = np.clip(alt_ft, ALT_MIN_FT_FOR_ENGINE, ALT_MAX_FT_FOR_ENGINE)
+    if not isinstance(altitude, np.ndarray):
+        mach_eng, alt_ft_eng = float(mach_eng), float(alt_ft_eng)
+    return T, P, rho, a, mach, g, alt_ft, mach_eng, alt_ft_eng
+
+
+def compute_CD(CL, AR, e, CD0):
+    """CD = CD0 + CL^2 / (pi * AR * e)"""
+    return CD0 + (CL**2) / (np.pi * AR * e)
+
+
+def compute_drag(rho, V, S, CD):
+    return 0.5 * rho * V**2 * S * CD
+
+
+def drag_force(ctx, rho, velocity, W, CD0=None, e=None):
+    """
+    Quasi-steady lift = weight; parabolic polar. Returns (D, CL, CD).
+    `CD0` / `e` (scalars or per-point arrays) replace the context's polar.
+    """
+    CL = (2 * W) / (_floor(rho, 1e-12) * _floor(velocity, 1e-6)**2 * ctx.S_ref)
+    CD = compute_CD(CL, ctx.AR, ctx.e if e is None else e, ctx.CD0 if CD0 is None else CD0)
+    return compute_drag(rho, velocity, ctx.S_ref, CD), CL, CD
+
+
+def required_thrust(D, W, velocity, g, dh_dt, dv_dt):
+    """Power balance: F_req = D + W * (dh/dt + V/g dV/dt) / V (total, all engines)."""
+    E_DOT = dh_dt + (velocity / g) * dv_dt
+    return D + (E_DOT * W) / _floor(velocity, 1e-9)
+
+
+def solve_lever(required_thrust_per_engine, mach, altitude_ft, engine, lever_grid=None,
+                allow_refine=True, solver=None, cache=None, profiler=None):
+    """
+    FADEC-like lever solver on per-engine thrust (see climb.find_lever_for_thrust).
+    Returns (lever, per_engine_thrust, thrust_limited_flag); (None, None, False) where no
+    valid lever exists. With a `profiler`, the path taken is counted under 'lever.*'.
+    """
+    if cache is None:
+        return _solve_lever(required_thrust_per_engine, mach, altitude_ft, lever_grid,
+                            allow_refine, engine, solver, None, profiler)
+    key = cache.solution_key(required_thrust_per_engine, mach, altitude_ft)
+    result = cache.solutions.get(key)
+    if result is None:
+        result = _solve_lever(required_thrust_per_engine, mach, altitude_ft, lever_grid,
+                              allow_refine, engine, solver, cache, profiler)
+        cache.solutions.put(key, result)
+    elif profiler is not None:
+        profiler.count("lever.cached")
+    return result
+
+
+def _solve_lever(T_req, mach, altitude_ft, lever_grid, allow_refine, engine, solver, cache,
+                 profiler=None):
+    if solver is not None:
+        if profiler is not None:
+            profiler.count("lever.inverse_solver")
+        return solver.solve(T_req, mach, altitude_ft, engine=engine)
+    thrust_limited = False
+
+    curve_key = None
+    if lever_grid is None:
+        lever_grid = np.linspace(0.0, 1.0, 21)
+        if cache is not None:
+            curve_key = cache.curve_key(mach, altitude_ft)
+
+    # stateless queries only: the raw engine's get_thrust/get_tsfc pair is shared state
+    evaluator = as_stateless(engine)
+
+    def safe_thrust(lv):
+        try:
+            Tv = evaluator.evaluate(float(lv), float(mach), float(altitude_ft))[0]
+            if not np.isfinite(Tv) or Tv < 0:
+                return None
+            return float(Tv)
+        except Exception:
+            return None
+
+    thrusts = None if curve_key is None else cache.curves.get(curve_key)
+    if thrusts is None:
+        thrusts = [safe_thrust(lv) for lv in lever_grid]
+        if curve_key is not None:
+            cache.curves.put(curve_key, tuple(thrusts))
+        if profiler is not None:
+            profiler.count("lever.grid_scans")
+    thrusts = list(thrusts)
+    valid_idx = [i for i, Tv in enumerate(thrusts) if Tv is not None]
+
+    if not valid_idx:
+        if profiler is not None:
+            profiler.count("lever.no_valid_point")
+        return None, None, thrust_limited
+
+    for i in range(1, len(lever_grid)):
+        if (thrusts[i] is not None) and (thrusts[i-1] is not None) and (thrusts[i] < thrusts[i-1]):
+            thrusts[i] = thrusts[i-1]
+
+    T0 = thrusts[0]
+    T1 = thrusts[-1]
+
+    # Idle meets demand
+    if (T0 is not None) and (T0 >= T_req):
+        if profiler is not None:
+            profiler.count("lever.idle")
+        return 0.0, T0, thrust_limited
+
+    # Max insufficient -> clamp (thrust-limited)
+    if (T1 is None) or (T1 < T_req):
+        if T1 is None:
+            if profiler is not None:
+                profiler.count("lever.no_max_thrust")
+            return None, None, thrust_limited
+        thrust_limited = True
+        if profiler is not None:
+            profiler.count("lever.thrust_limited")
+        return 1.0, T1, thrust_limited
+
+    # Search for bracket and interpolate
+    for i in range(len(lever_grid) - 1):
+        Ti   = thrusts[i]
+        Tip1 = thrusts[i + 1]
+        if (Ti is None) or (Tip1 is None):
+            continue
+        if (Ti <= T_req) and (T_req <= Tip1) and (Tip1 > Ti):
+            if profiler is not None:
+                profiler.count("lever.bracket_iterations", i + 1)
+            li, lj = lever_grid[i], lever_grid[i + 1]
+            lv = li + (T_req - Ti) * (lj - li) / (Tip1 - Ti)
+            if allow_refine:
+                Tstar = safe_thrust(lv)
+                if Tstar is not None:
+                    if profiler is not None:
+                        profiler.count("lever.refined")
+                    return float(lv), float(Tstar), thrust_limited
+            # fallback to closer endpoint if refine failed
+            if profiler is not None:
+                profiler.count("lever.bracket_endpoint")
+            if (T_req - Ti) <= (Tip1 - T_req):
+                return float(li), float(Ti), thrust_limited
+            else:
+                return float(lj), float(Tip1), thrust_limited
+
+    # Fallback: closest valid grid point
+    if profiler is not None:
+        profiler.count("lever.closest_grid_fallback")
+    diffs = [(abs(thrusts[i] - T_req), lever_grid[i], thrusts[i]) for i in valid_idx]
+    diffs.sort(key=lambda x: x[0])
+    _, lv_best, Tv_best = diffs[0]
+    return float(lv_best), float(Tv_best), thrust_limited
+
+
+def thrust_setting(ctx, F_required_total, mach_eng, alt_ft_eng):
+    """
+    Lever for the required total thrust plus the resulting total fuel flow [kg/s].
+    Returns (lever, thrust_limited, fuel_flow_total); lever None / fuel flow NaN where
+    the solver finds no valid lever.
+    """
+    prof = ctx.profiler
+    lv, real_thrust_per_engine, thrust_limited = solve_lever(
+        float(F_required_total) / float(ctx.n_engines), mach_eng, alt_ft_eng, ctx.engine,
+        solver=ctx.lever_solver, cache=ctx.lever_cache, profiler=prof)
+    if prof is not None:
+        prof.lap("rhs;lever")
+    if lv is None or real_thrust_per_engine is None:
+        return None, False, np.nan
+    ff = fuel_flow_total(ctx, lv, mach_eng, alt_ft_eng)
+    if prof is not None:
+        prof.lap("rhs;fuel_flow")
+    return lv, thrust_limited, ff
+
+
+def fuel_flow_total(ctx, lever, mach_eng, alt_ft_eng):
+    """Total fuel flow [kg/s] of all engines at `lever` (one stateless engine query)."""
+    _, _, fuel_flow_kg_s_per_engine = ctx.evaluator.evaluate(float(lever), mach_eng, alt_ft_eng)
+    return max(fuel_flow_kg_s_per_engine, 0.0) * ctx.n_engines
+
+
+def idle_setting(ctx, mach_eng, alt_ft_eng):
+    """(total idle thrust [N], total idle fuel flow [kg/s]) at lever 0."""
+    thrust, _, fuel_flow = ctx.evaluator.evaluate(0.0, mach_eng, alt_ft_eng)
+    return thrust * ctx.n_engines, max(fuel_flow, 0.0) * ctx.n_engines
+
+
+def breguet_burn(mass_kg, fuel_flow_total, dt):
+    """
+    Fuel burned over dt with TSFC and L/D held constant (Breguet time form):
+    W_f/W_i = exp(-TSFC g D/L dt) = exp(-ff dt / m) in level flight (T = D, L = W).
+    """
+    return mass_kg * -math.expm1(-fuel_flow_total * dt / max(mass_kg, 1e-9))
+
+
+# (3) Fixed-step segment march ----------------------------------------------------------
+def march(state, rhs, dt, stop_index, stop_value, name, breguet=False, max_time=None,
+          trajectory=None, profiler=None):
+    """
+    Explicit-Euler march of (altitude, speed, distance, mass) from `state`.
+
+    `rhs(altitude, speed, mass)` returns (dh_dt, dv_dt, dx_dt, lever, thrust_limited,
+    fuel_flow_total). The segment ends when component `stop_index` (0 altitude,
+    2 distance) reaches `stop_value`, with a partial last step, or after `max_time`
+    seconds. Fuel per step is ff*dt, or the Breguet weight fraction with `breguet=True`
+    (exact for constant TSFC and L/D, so long cruise steps stay accurate).
+
+    Steps are recorded in `trajectory` (a new Trajectory by default). A trajectory
+    that ends at `state` (the end point of a previous march) is continued from there.
+    A `profiler` (normally ctx.profiler) times the steps (see profiler.Profiler).
+
+    Returns (MissionState at the end, trajectory).
+    """
+    traj = start_trajectory(state) if trajectory is None else trajectory
+    traj.drop_last()  # the start point is re-recorded with this march's first step
+    y = [state.altitude, state.speed, state.distance]
+    mass_kg, time_s, fuel_used = state.weight, state.time, state.fuel_used
+    t_end = None if max_time is None else state.time + max_time
+    sign = 1.0 if stop_value >= y[stop_index] else -1.0
+    prof = profiler
+
+    while sign * (stop_value - y[stop_index]) > 0.0:
+        if prof is not None:
+            prof.start()
+        dh_dt, dv_dt, dx_dt, lv, thrust_limited, ff = rhs(y[0], y[1], mass_kg)
+        if prof is not None:
+            prof.lap("rhs;other")
+        rates = (dh_dt, dv_dt, dx_dt)
+
+        step = dt
+        if t_end is not None:
+            step = min(step, t_end - time_s)
+        y_new = [y[k] + rates[k] * step for k in range(3)]
+        finished = sign * (y_new[stop_index] - stop_value) >= 0.0
+        if finished:
+            step = (stop_value - y[stop_index]) / rates[stop_index] if rates[stop_index] else 0.0
+            y_new = [y[k] + rates[k] * step for k in range(3)]
+            y_new[stop_index] = stop_value
+
+        if lv is None:
+            print(f"[WARNING] {name}: no valid lever at h={y[0]:.1f} m, V={y[1]:.1f} m/s")
+            burned_kg = 0.0
+        else:
+            burned_kg = breguet_burn(mass_kg, ff, step) if breguet else ff * step
+        traj.append_step(time_s, y[0], y[1], y[2], mass_kg, lv, thrust_limited, ff, burned_kg)
+        mass_kg = max(mass_kg - burned_kg, 0.0)
+        fuel_used += burned_kg
+        time_s += step
+        y = y_new
+        if prof is not None:
+            prof.lap("integrate")
+            prof.step()
+
+        if finished or (t_end is not None and time_s >= t_end) or step <= 0.0:
+            break
+
+    traj.append_point(time_s, y[0], y[1], y[2], mass_kg)
+    out = replace(state, time=time_s, weight=mass_kg, altitude=y[0], speed=y[1],
+                  distance=y[2], fuel_used=fuel_used, segment_name=name)
+    return out, traj
+
+
+def start_trajectory(state, capacity=1024):
+    """Trajectory holding only the point of `state`."""
+    traj = Trajectory(capacity)
+    traj.append_point(state.time, state.altitude, state.speed, state.distance, state.weight)
+    return traj
+
+
+def ground_speed_component(velocity, dh_dt, wind=0.0):
+    """Ground speed from TAS, climb rate and along-track wind (tailwind positive)."""
+    return math.sqrt(max(velocity * velocity - dh_dt * dh_dt, 0.0)) + wind
+
+
+def ground_distance(traj, x0=0.0, atmosphere=atm):
+    """
+    Fill traj.x with the ground distance from `x0`: the trapezoidal integral of the
+    ground speed sqrt(V^2 - (dh/dt)^2) + wind(h) over the steps. Returns the trajectory.
+    """
+    steps = np.diff(traj.t)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dh_dt = np.where(steps > 0.0, np.diff(traj.h) / steps, 0.0)
+    wind = atmosphere.get_wind_array(traj.h)
+    ground = np.sqrt(np.maximum(traj.V[:-1]**2 - dh_dt**2, 0.0)) + wind[:-1] \
+        + np.sqrt(np.maximum(traj.V[1:]**2 - dh_dt**2, 0.0)) + wind[1:]
+    traj.x[0] = x0
+    traj.x[1:] = x0 + np.cumsum(0.5 * steps * ground)
+    return traj
+
+
+def specific_range(ctx, altitude, velocity, mass_kg):
+    """
+    Level-flight specific range [m/kg] at (altitude, velocity, mass) and whether the
+    required thrust is available (NaN / False where no valid lever exists).
+    """
+    T, P, rho, a, mach, g, alt_ft, mach_eng, alt_ft_eng = flight_condition(
+        altitude, velocity, ctx.atmosphere)
+    D, _, _ = drag_force(ctx, rho, velocity, mass_kg * g)
+    lv, thrust_limited, ff = thrust_setting(ctx, D, mach_eng, alt_ft_eng)
+    if lv is None or not ff > 0.0:
+        return np.nan, False
+    return (velocity + ctx.atmosphere.get_wind(altitude)) / ff, not thrust_limited
+
+
+def as_mission_state(state=None, **overrides):
+    """Copy of `state` (or a fresh MissionState) with fields replaced."""
+    return replace(MissionState() if state is None else state, **overrides)
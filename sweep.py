@@ -0,0 +1,277 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+import climb
+
+
+# (1) Columnar result store -------------------------------------------------------------
+class ColumnStore:
+    """
+    Append-only columnar table: one Python list per column, turned into NumPy arrays
+    (or a DataFrame) on demand. Rows may introduce new columns; earlier rows get NaN.
+    """
+
+    def __init__(self):
+        self.columns = {}
+        self.n_rows = 0
+
+    def append(self, row):
+        for key in row.keys() - self.columns.keys():
+            self.columns[key] = [np.nan] * self.n_rows
+        for key, col in self.columns.items():
+            col.append(row.get(key, np.nan))
+        self.n_rows += 1
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+
+    def __len__(self):
+        return self.n_rows
+
+    def to_arrays(self):
+        return {key: np.asarray(col) for key, col in self.columns.items()}
+
+    def to_frame(self):
+        import pandas as pd
+        return pd.DataFrame(self.columns)
+
+
+# (2) Case grid -------------------------------------------------------------------------
+def build_cases(profiles=climb.PROFILES, altitude_fractions=None, initial_masses=None,
+                E_DOT_cmds=None, dts=None, delta_isas=None):
+    """
+    Full factorial of (profile, altitude_fraction, initial_mass_kg, E_DOT_cmd, dt), and
+    of delta_isa [K] (see case_atmosphere) where `delta_isas` is given.
+    The constant-rate profiles ignore the altitude fraction and get a single None entry.
+    """
+    afs = climb.altitude_fractions if altitude_fractions is None else altitude_fractions
+    masses = [climb.initial_mass_kg] if initial_masses is None else initial_masses
+    edots = [climb.E_DOT_CMD] if E_DOT_cmds is None else E_DOT_cmds
+    steps = [climb.dt] if dts is None else dts
+    offsets = [None] if delta_isas is None else delta_isas
+
+    cases = []
+    for profile in profiles:
+        profile_afs = [None] if profile in ("constant_speed", "constant_mach") else afs
+        for af, m0, edot, step, dT in itertools.product(profile_afs, masses, edots, steps,
+                                                        offsets):
+            case = {
+                "profile": profile,
+                "altitude_fraction": None if af is None else float(af),
+                "initial_mass_kg": float(m0),
+                "E_DOT_cmd": float(edot),
+                "dt": float(step),
+            }
+            if dT is not None:
+                case["delta_isa"] = float(dT)
+            cases.append(case)
+    return cases
+
+
+# (3) Worker side -----------------------------------------------------------------------
+_WORKER = {"engine": None, "solver": None, "lever_cache": None}
+_ATMOSPHERES = {}  # (delta_isa, weather, track_deg) -> OffDesignAtmosphere, per process
+
+
+def case_atmosphere(case):
+    """
+    Atmosphere of a case: its optional 'delta_isa' [K] offset and 'weather' profile file
+    (atmosphere.OffDesignAtmosphere.from_file, winds projected on 'track_deg'). None
+    (ISA) without either; the lookup tables are built once per process and reused.
+    """
+    key = (float(case.get("delta_isa") or 0.0), case.get("weather") or None,
+           float(case.get("track_deg") or 0.0))
+    if key[0] == 0.0 and key[1] is None:
+        return None
+    air = _ATMOSPHERES.get(key)
+    if air is None:
+        from atmosphere import OffDesignAtmosphere
+        dT, weather, track = key
+        air = (OffDesignAtmosphere(delta_isa=dT) if weather is None
+               else OffDesignAtmosphere.from_file(weather, delta_isa=dT, track_deg=track))
+        _ATMOSPHERES[key] = air
+    return air
+
+
+def lever_cache_fingerprint(stub_dir, surrogate=False):
+    """
+    Identity of the engine a sweep's lever solutions come from: the stub's files, and
+    with `surrogate` the default surrogate grid (engine_surrogate.surrogate_key).
+    """
+    if surrogate:
+        from engine_surrogate import surrogate_key
+        return f"surrogate:{surrogate_key(stub_dir)}"
+    from pyengine.decks import stub_key
+    return f"deck:{stub_key(stub_dir)}"
+
+
+def _init_worker(stub_dir, surrogate_cache_dir=None, lever_cache_path=None, lever_cache_options=None):
+    """
+    Process initializer: load one Engine (and optionally its surrogate) per worker.
+    With `lever_cache_path` the worker also gets a LeverCache preloaded from that file
+    (`lever_cache_options`: LeverCache keywords, i.e. tolerances and fingerprint).
+    """
+    from pyengine import get_engine
+    eng = get_engine(stub_dir)
+    _WORKER["engine"], _WORKER["solver"] = eng, None
+    if lever_cache_path is not None:
+        from lever_cache import LeverCache
+        _WORKER["lever_cache"] = LeverCache(path=lever_cache_path, **(lever_cache_options or {}))
+    if surrogate_cache_dir is not None:
+        from engine_surrogate import build_surrogate
+        from lever_solver import InverseLeverSolver
+        sur = build_surrogate(eng, stub_dir, cache_dir=surrogate_cache_dir)
+        _WORKER["engine"], _WORKER["solver"] = sur, InverseLeverSolver.from_surrogate(sur)
+
+
+def run_case(case, engine=None, lever_solver=None, lever_cache=None, keep_trajectory=False):
+    """
+    Simulate one case and flatten it into a result row (case parameters + finals).
+    An optional 'shape' entry is passed to climb.strategy_for; a true 'emissions'
+    entry adds the CO2 / H2O / NOx totals (see emissions.py); 'delta_isa' / 'weather'
+    entries fly the case in an off-design atmosphere (case_atmosphere).
+    With `keep_trajectory` the row also carries the Trajectory under '_trajectory'.
+    """
+    row = dict(case)
+    before = lever_cache.counters() if lever_cache is not None else None
+    strategy = climb.strategy_for(case["profile"], case["altitude_fraction"],
+                                  case.get("shape", 1.0))
+    if strategy is None:
+        row["error"] = f"unknown profile {case['profile']!r}"
+        return row
+    try:
+        t, h, V, lever_positions, final_results, diagnostics = climb.simulate_climb_path(
+            strategy, case["altitude_fraction"], dt=case["dt"],
+            engine=engine, lever_solver=lever_solver,
+            initial_mass=case["initial_mass_kg"], E_DOT_cmd=case["E_DOT_cmd"],
+            lever_cache=lever_cache, emissions=case.get("emissions") or None,
+            atmosphere=case_atmosphere(case),
+        )
+    except Exception as e:
+        row["error"] = str(e)[:200]
+        return row
+
+    final_lever = final_results.get("Final Lever Position")
+    row.update({
+        "final_time_s": final_results["Total Climb Time"],
+        "final_altitude_m": final_results["Final Altitude"],
+        "final_velocity_mps": final_results["Final Velocity"],
+        "final_mass_kg": final_results["Final Mass (kg)"],
+        "total_fuel_burn_kg": final_results["Total Fuel Burned (kg)"],
+        "final_lever": np.nan if final_lever is None else final_lever,
+        "ground_distance_m": final_results["Ground Distance (m)"],
+        "n_steps": len(lever_positions),
+        "none_lever_steps": len(diagnostics["none_lever_times"]),
+        "thrust_limited_steps": len(diagnostics["limit_times"]),
+        "error": "",
+    })
+    for key, column in (("Total CO2 (kg)", "total_co2_kg"), ("Total H2O (kg)", "total_h2o_kg"),
+                        ("Total NOx (kg)", "total_nox_kg")):
+        if key in final_results:
+            row[column] = final_results[key]
+    if keep_trajectory:
+        row["_trajectory"] = diagnostics["trajectory"].trim()
+    if lever_cache is not None:
+        deltas = [b - a for a, b in zip(before, lever_cache.counters())]
+        row.update(zip(("lever_cache_hits", "lever_cache_misses",
+                        "curve_cache_hits", "curve_cache_misses"), deltas))
+    return row
+
+
+def _run_chunk(cases, keep_trajectories=False):
+    rows = [run_case(c, engine=_WORKER["engine"], lever_solver=_WORKER["solver"],
+                     lever_cache=_WORKER["lever_cache"], keep_trajectory=keep_trajectories)
+            for c in cases]
+    if _WORKER["lever_cache"] is not None:
+        # append this chunk's new entries to the worker's shard; run_sweep merges them
+        _WORKER["lever_cache"].save(shard=os.getpid(), new_only=True)
+    return rows
+
+
+# (4) Driver ----------------------------------------------------------------------------
+def run_sweep(cases, stub_dir=None, max_workers=None, chunksize=None,
+              surrogate_cache_dir=None, store=None, progress=True, lever_cache_path=None,
+              trajectories=False, lever_cache_tolerances=None):
+    """
+    Fan `cases` (see build_cases) across a ProcessPoolExecutor.
+
+    Each worker loads its own Engine from `stub_dir` once (initializer), so no engine
+    object crosses process boundaries. With `surrogate_cache_dir`, the surrogate is built
+    once here and every worker loads it from that cache instead of scanning the engine.
+    Rows stream into `store` (a ColumnStore by default, or anything with `.append(row)`)
+    as chunks complete, so completion order, not submission order, fills the table.
+    With `trajectories=True` every row's Trajectory is shipped back too and passed on as
+    store.append(row, trajectory=...), so `store` must accept it, e.g. a
+    results_store.ResultsStore (ValueError for a ColumnStore).
+
+    With `lever_cache_path`, every worker memoizes lever solutions in a LeverCache loaded
+    from that file and appends each chunk's new entries to a per-process shard; the
+    shards are merged back into the file at the end, so the next sweep starts warm.
+    `lever_cache_tolerances` overrides its quantization (a dict with any of mach_tol,
+    alt_tol_ft, thrust_tol). The file is tagged with lever_cache_fingerprint, so entries
+    from another engine, surrogate or tolerance setting are dropped instead of reused.
+    """
+    stub_dir = Path(climb.STUB if stub_dir is None else stub_dir)
+    store = ColumnStore() if store is None else store
+    if trajectories and isinstance(store, ColumnStore):
+        raise ValueError("trajectories=True needs a store that keeps trajectories, "
+                         "e.g. results_store.ResultsStore; ColumnStore holds rows only")
+    max_workers = max_workers or os.cpu_count() or 1
+    if chunksize is None:
+        # a few chunks per worker keeps all cores busy without per-case IPC overhead
+        chunksize = max(1, len(cases) // (max_workers * 4))
+
+    if surrogate_cache_dir is not None:
+        from engine_surrogate import build_surrogate
+        from pyengine import get_engine
+        build_surrogate(get_engine(stub_dir), stub_dir, cache_dir=surrogate_cache_dir)
+
+    lever_cache_options = None
+    if lever_cache_path is not None:
+        lever_cache_options = dict(lever_cache_tolerances or {})
+        lever_cache_options["fingerprint"] = lever_cache_fingerprint(
+            stub_dir, surrogate=surrogate_cache_dir is not None)
+
+    chunks = [cases[i:i + chunksize] for i in range(0, len(cases), chunksize)]
+    done = 0
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(str(stub_dir), surrogate_cache_dir, lever_cache_path,
+                                       lever_cache_options)) as pool:
+        futures = [pool.submit(_run_chunk, chunk, trajectories) for chunk in chunks]
+        for fut in as_completed(futures):
+            rows = fut.result()
+            for row in rows:
+                trajectory = row.pop("_trajectory", None)
+                if trajectory is None:
+                    store.append(row)
+                else:
+                    store.append(row, trajectory=trajectory)
+            done += len(rows)
+            if progress:
+                print(f"[INFO] {done}/{len(cases)} cases done")
+
+    if hasattr(store, "flush"):
+        store.flush()
+    if lever_cache_path is not None:
+        from lever_cache import LeverCache
+        merged = LeverCache(path=lever_cache_path, **lever_cache_options)
+        merged.save()
+        for shard in merged.shards():
+            shard.unlink()
+    return store
+
+
+# (5) Quick self-test when run directly ------------------------------------------------
+if __name__ == "__main__":
+    results = run_sweep(build_cases(), max_workers=None)
+    arrays = results.to_arrays()
+    ok = arrays["error"] == ""
+    print(f"[INFO] {ok.sum()} / {len(results)} cases succeeded")
+    if ok.any():
+        best = int(np.argmin(np.where(ok, arrays["total_fuel_burn_kg"].astype(float), np.inf)))
+        print("[INFO] Lowest fuel burn:", {k: v[best] for k, v in arrays.items()})
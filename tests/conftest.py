@@ -0,0 +1,10 @@
+"""
+Unit tests for the physics and integrators (run with `pytest tests`).
+
+Like the benchmarks, every test runs on pyengine.DeckEngine over the repository's
+engine stub, so the suite is deterministic and needs no native binary.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
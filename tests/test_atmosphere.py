@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from atmosphere import Atmosphere, OffDesignAtmosphere
+from segments import flight_condition
+
+ALTITUDES_M = [0.0, 1234.5, 3000.0, 4267.2, 10500.0, 12000.0]
+
+ATMOSPHERES = {
+    "isa": Atmosphere(),
+    "isa+15": OffDesignAtmosphere(delta_isa=15.0),
+    "profile": OffDesignAtmosphere(temperature=([0.0, 5000.0, 12000.0], [295.0, 262.0, 215.0]),
+                                   wind=([0.0, 12000.0], [-5.0, 40.0])),
+}
+
+
+@pytest.mark.parametrize("name", ATMOSPHERES)
+@pytest.mark.parametrize("altitude", ALTITUDES_M)
+def test_flight_condition_reads_atmosphere_at_true_altitude(name, altitude):
+    air = ATMOSPHERES[name]
+    T, P, rho, a = flight_condition(altitude, 200.0, air)[:4]
+    assert T == pytest.approx(air.get_temperature(altitude), rel=1e-12)
+    assert a == pytest.approx(air.get_speed_of_sound(altitude), rel=1e-12)
+
+
+@pytest.mark.parametrize("name", ATMOSPHERES)
+def test_array_and_scalar_meter_lookups_agree(name):
+    air = ATMOSPHERES[name]
+    arrays = np.column_stack(air.calculate_atmospheric_properties_array_m(np.array(ALTITUDES_M)))
+    scalars = [air.calculate_atmospheric_properties_m(h) for h in ALTITUDES_M]
+    np.testing.assert_allclose(arrays, scalars, rtol=1e-12)
+
+
+def test_isa_density_at_the_cruise_cap():
+    rho = flight_condition(4267.2, 200.0)[2]
+    assert rho == pytest.approx(0.796, abs=1e-3)
+
+
+def test_delta_isa_shifts_temperature_not_pressure():
+    hot = ATMOSPHERES["isa+15"]
+    T, P, _ = hot.calculate_atmospheric_properties_m(3000.0)
+    T_isa, P_isa, _ = Atmosphere().calculate_atmospheric_properties_m(3000.0)
+    assert T == pytest.approx(T_isa + 15.0, abs=1e-6)
+    assert P == pytest.approx(P_isa, rel=1e-6)
+
+
+def test_profile_temperature_and_wind_at_same_altitude():
+    air = ATMOSPHERES["profile"]
+    assert flight_condition(5000.0, 200.0, air)[0] == pytest.approx(262.0, abs=1e-6)
+    assert air.get_wind(6000.0) == pytest.approx(-5.0 + 45.0 * 6000.0 / 12000.0, abs=1e-6)
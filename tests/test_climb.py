@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+import climb
+from lever_solver import InverseLeverSolver
+
+FUEL = "Total Fuel Burned (kg)"
+
+
+@pytest.fixture(scope="module")
+def solver():
+    return InverseLeverSolver.from_engine(climb.eng)
+
+
+def _euler(fn, af, dt, solver):
+    t, _, _, _, final, _ = climb.simulate_climb_path(fn, af, dt=dt, lever_solver=solver)
+    return final[FUEL], len(t) - 1
+
+
+@pytest.mark.parametrize("profile, af", [("constant_speed", None),
+                                         ("exponential_decreasing_speed", 0.3)])
+def test_rk45_needs_far_fewer_rhs_evaluations_than_euler(solver, profile, af):
+    fn = climb.strategy_for(profile, af)
+    # Euler is first order: Richardson-extrapolate two fine runs for the reference fuel
+    fine, _ = _euler(fn, af, 0.0625, solver)
+    finer, _ = _euler(fn, af, 0.03125, solver)
+    reference = 2.0 * finer - fine
+
+    _, _, _, _, final, diagnostics = climb.simulate_climb_adaptive(fn, af, rtol=1e-6,
+                                                                   lever_solver=solver)
+    rk45_error = abs(final[FUEL] - reference)
+
+    # coarsest Euler step that is at least as accurate as RK45
+    for dt in (1.0, 0.5, 0.25, 0.125, 0.0625, 0.03125):
+        fuel, steps = _euler(fn, af, dt, solver)
+        if abs(fuel - reference) <= rk45_error:
+            break
+    else:
+        pytest.fail(f"no Euler step reached the RK45 fuel error {rk45_error:.4f} kg")
+    assert 5 * diagnostics["n_rhs"] <= steps
+
+
+@pytest.mark.parametrize("tail", [climb.BATCH_TAIL, 0])
+def test_batch_matches_scalar(solver, tail):
+    # every profile, minus the slowest climbs of each
+    strategies = [s for profile in climb.PROFILES
+                  for s in climb.generate_strategy(profile) if s[0] is None or 0.25 <= s[0] <= 0.8]
+    assert len(strategies) > climb.BATCH_TAIL
+    batch = climb.simulate_climb_batch(strategies, dt=1.0, lever_solver=solver, tail=tail)
+    assert len(batch) == len(strategies)
+    for (af, fn), (t, h, V, _, final, _) in zip(strategies, batch):
+        st, sh, sV, _, sfinal, _ = climb.simulate_climb_path(fn, af, dt=1.0, lever_solver=solver)
+        assert final[FUEL] == sfinal[FUEL]
+        np.testing.assert_array_equal(t, st)
+        np.testing.assert_array_equal(h, sh)
+        np.testing.assert_array_equal(V, sV)
@@ -0,0 +1,53 @@
+import csv
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import climb
+from pyengine import DeckEngine
+
+NATIVE_SCAN = Path(__file__).resolve().parent.parent / "lls" / "envelope_scan" / "engine_envelope.csv"
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return DeckEngine(climb.STUB)
+
+
+@pytest.fixture(scope="module")
+def native():
+    """The native py11engine envelope scan shipped with the repository, as arrays."""
+    with open(NATIVE_SCAN, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    columns = {key: np.array([float(row[key] or "nan") for row in rows])
+               for key in ("Lever", "Mach", "Altitude_ft", "Thrust_N", "TSFC_kg_per_Ns", "Valid")}
+    columns["Valid"] = columns["Valid"] == 1.0
+    return columns
+
+
+def test_matches_native_scan_where_valid(engine, native):
+    ok = native["Valid"]
+    thrust, tsfc, _ = engine.evaluate(native["Lever"][ok], native["Mach"][ok], native["Altitude_ft"][ok])
+    np.testing.assert_allclose(thrust, native["Thrust_N"][ok], rtol=1e-6)
+    np.testing.assert_allclose(tsfc, native["TSFC_kg_per_Ns"][ok], rtol=1e-6)
+
+
+def test_invalid_where_native_is_out_of_range(engine, native):
+    bad = ~native["Valid"]
+    thrust, tsfc, fuel_flow = engine.evaluate(native["Lever"][bad], native["Mach"][bad],
+                                              native["Altitude_ft"][bad])
+    assert bad.sum() > 0
+    assert np.isnan(thrust).all() and np.isnan(tsfc).all() and np.isnan(fuel_flow).all()
+
+
+def test_scalar_path_matches_array_path(engine, native):
+    idx = np.arange(0, native["Lever"].size, 7)
+    lever, mach, alt = native["Lever"][idx], native["Mach"][idx], native["Altitude_ft"][idx]
+    arrays = engine.evaluate(lever, mach, alt)[0]
+    scalars = [engine.get_thrust_with_lever_position(l, m, a) for l, m, a in zip(lever, mach, alt)]
+    np.testing.assert_allclose(scalars, arrays, rtol=1e-12)
+
+
+def test_sea_level_static_full_lever_is_top_n1(engine):
+    assert engine.get_thrust_with_lever_position(1.0, 0.0, 0.0) == pytest.approx(152510.0, rel=1e-9)
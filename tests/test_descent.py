@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from atmosphere import Atmosphere
+from descent import FL100_M, cas_to_tas, simulate_descent
+from mission_state import MissionState
+
+SCHEDULE = (128.6112, 154.3334)  # (below, above FL100) CAS [m/s]
+
+
+def test_cas_is_tas_at_sea_level_and_below_it_aloft():
+    air = Atmosphere()
+    assert cas_to_tas(150.0, 0.0, air) == pytest.approx(150.0, rel=1e-4)
+    assert cas_to_tas(150.0, 4000.0, air) > 150.0
+
+
+def test_descent_flies_the_speed_schedule():
+    start = MissionState(weight=56000.0, altitude=4267.2, speed=230.0)
+    end, diagnostics = simulate_descent(start, 0.0, speed_schedule=SCHEDULE)
+    traj = diagnostics["trajectory"]
+    air = Atmosphere()
+    above = traj.h > FL100_M
+    expected = np.where(above, [cas_to_tas(SCHEDULE[1], h, air) for h in traj.h],
+                        [cas_to_tas(SCHEDULE[0], h, air) for h in traj.h])
+    np.testing.assert_allclose(traj.V, expected, rtol=5e-3)
+    assert end.speed == pytest.approx(SCHEDULE[0], rel=5e-3)
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+import climb
+import engine_surrogate
+from engine_surrogate import build_surrogate
+
+GRID = dict(levers=np.linspace(0.0, 1.0, 5), machs=np.linspace(0.3, 0.6, 4),
+            altitudes_ft=np.linspace(0.0, 4000.0, 3))
+
+
+def test_missed_error_bound_raises_and_is_not_cached(tmp_path):
+    with pytest.raises(ValueError, match="exceeds bound"):
+        build_surrogate(climb.eng, climb.STUB, cache_dir=tmp_path, max_rel_error=1e-9,
+                        max_refinements=0, n_check=20, **GRID)
+    assert not list(tmp_path.iterdir())
+    key = engine_surrogate.surrogate_key(climb.STUB, max_rel_error=1e-9, max_refinements=0,
+                                         **GRID)
+    assert not any(k[1] == key for k in engine_surrogate._SURROGATES)
+
+
+def test_met_error_bound_is_cached(tmp_path):
+    sur = build_surrogate(climb.eng, climb.STUB, cache_dir=tmp_path, max_rel_error=10.0,
+                          max_refinements=0, n_check=20, **GRID)
+    assert max(sur.errors["thrust_max_rel"], sur.errors["tsfc_max_rel"]) <= 10.0
+    assert len(list(tmp_path.glob("*_surrogate.npz"))) == 1
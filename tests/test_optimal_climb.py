@@ -0,0 +1,18 @@
+import numpy as np
+
+from optimal_climb import edge_costs
+
+
+def test_edges_through_limited_nodes_cost_more_than_any_flown_path():
+    altitudes = np.array([0.0, 100.0, 200.0])
+    speeds = np.array([100.0, 110.0])
+    fuel_flow = np.full((3, 2), 1.0)
+    limited = np.zeros((3, 2), dtype=bool)
+    limited[1, 0] = True
+    climb_cost, level_cost = edge_costs(altitudes, speeds, fuel_flow, limited, E_DOT_cmd=5.0)
+    flown_path = climb_cost[0, 0, 1] + climb_cost[1, 1, 1]
+    assert climb_cost[0, 0, 0] > flown_path
+    assert np.isfinite(climb_cost[0, 0, 0])
+    climb_cost, _ = edge_costs(altitudes, speeds, fuel_flow, limited, E_DOT_cmd=5.0,
+                               limit_penalty=np.inf)
+    assert climb_cost[0, 0, 0] == np.inf and np.isfinite(climb_cost[0, 0, 1])
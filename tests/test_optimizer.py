@@ -0,0 +1,18 @@
+import math
+
+from optimizer import objective_value
+
+
+def _row(fuel, limited=0, failed=0, n_steps=1000):
+    return {"total_fuel_burn_kg": fuel, "final_time_s": 800.0, "thrust_limited_steps": limited,
+            "none_lever_steps": failed, "n_steps": n_steps}
+
+
+def test_limited_climb_never_beats_a_flown_one():
+    flown, limited = objective_value(_row(900.0)), objective_value(_row(400.0, limited=1))
+    assert flown == 900.0
+    assert limited > flown
+    assert objective_value(_row(400.0, failed=1)) > flown
+    # among infeasible climbs, the one with fewer limited steps ranks first
+    assert objective_value(_row(900.0, limited=10)) < objective_value(_row(400.0, limited=50))
+    assert objective_value(_row(400.0, limited=1), limit_penalty=math.inf) == math.inf
@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+import climb
+from pyengine import DeckEngine, as_stateless
+from segments import solve_lever
+
+
+class _ScalarOnly:
+    """Only the stateful pair, like the native binary; checks that the pair never interleaves."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.busy = False
+        self.overlaps = 0
+
+    def get_thrust_with_lever_position(self, lever, mach, altitude):
+        if self.busy:
+            self.overlaps += 1
+        self.busy = True
+        return self.engine.get_thrust_with_lever_position(lever, mach, altitude)
+
+    def get_tsfc(self):
+        tsfc = self.engine.get_tsfc()
+        self.busy = False
+        return tsfc
+
+
+@pytest.fixture
+def scalar_engine():
+    return _ScalarOnly(DeckEngine(climb.STUB))
+
+
+def test_one_adapter_per_engine(scalar_engine):
+    assert as_stateless(scalar_engine) is as_stateless(scalar_engine)
+    assert as_stateless(scalar_engine.engine) is scalar_engine.engine
+
+
+def test_threaded_lever_solves_match_serial(scalar_engine):
+    points = [(20000.0 + 500.0 * i, 0.3 + 0.01 * (i % 20), 1000.0 + 250.0 * (i % 40))
+              for i in range(200)]
+    serial = [solve_lever(*p, scalar_engine) for p in points]
+
+    threaded = [None] * len(points)
+
+    def work(start):
+        for i in range(start, len(points), 4):
+            threaded[i] = solve_lever(*points[i], scalar_engine)
+
+    threads = [threading.Thread(target=work, args=(k,)) for k in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert threaded == serial
+    assert scalar_engine.overlaps == 0
@@ -0,0 +1,146 @@
+import numpy as np
+
+COLUMNS = ("t", "h", "V", "x", "mass", "lever", "thrust_limited", "fuel_flow", "fuel_burn")
+UNITS = {"t": "s", "h": "m", "V": "m/s", "x": "m", "mass": "kg", "lever": "-",
+         "thrust_limited": "-", "fuel_flow": "kg/s", "fuel_burn": "kg"}
+
+
+class Trajectory:
+    """
+    Time history of one simulated segment in a growable columnar float64 buffer.
+
+    One row per integration point. Row i holds the state at t_i (t, h, V, x, mass) and
+    the controls applied from t_i to t_i+1 (lever, thrust_limited, fuel_flow, fuel_burn),
+    so every column has the same length; the step columns of the last row are NaN.
+    A failed lever solve is a NaN lever.
+
+    The buffer is (n_columns, capacity) and doubles when full, so appending never
+    allocates per step and column(name) is a contiguous view. to_frame() / to_arrow()
+    wrap those views without copying.
+    """
+
+    __slots__ = ("columns", "_index", "_buf", "_n")
+
+    def __init__(self, capacity=1024, columns=COLUMNS):
+        self.columns = tuple(columns)
+        self._index = {name: k for k, name in enumerate(self.columns)}
+        self._buf = np.full((len(self.columns), max(int(capacity), 1)), np.nan)
+        self._n = 0
+
+    # --- recording ------------------------------------------------------------------------
+    def append(self, *row):
+        """Append one row, values in column order (missing trailing values stay NaN)."""
+        if self._n == self._buf.shape[1]:
+            self._grow()
+        self._buf[:len(row), self._n] = row
+        self._n += 1
+
+    def append_step(self, t, h, V, x, mass, lever, thrust_limited, fuel_flow, fuel_burn):
+        """Row for one integration step; `lever` None is stored as NaN."""
+        self.append(t, h, V, x, mass, np.nan if lever is None else lever,
+                    1.0 if thrust_limited else 0.0, fuel_flow, fuel_burn)
+
+    def append_point(self, t, h, V, x=np.nan, mass=np.nan):
+        """Final point of a segment (no step follows it)."""
+        self.append(t, h, V, x, mass)
+
+    def _grow(self):
+        buf = np.full((self._buf.shape[0], 2 * self._buf.shape[1]), np.nan)
+        buf[:, :self._n] = self._buf[:, :self._n]
+        self._buf = buf
+
+    def drop_last(self):
+        """Forget the last row (e.g. an end point that the next step re-records)."""
+        self._n = max(self._n - 1, 0)
+
+    def trim(self):
+        """Drop the unused capacity (after recording has finished)."""
+        self._buf = self._buf[:, :self._n].copy()
+        return self
+
+    @classmethod
+    def from_columns(cls, **arrays):
+        """Trajectory from equal-length arrays keyed by column name (others NaN)."""
+        n = len(next(iter(arrays.values())))
+        traj = cls(capacity=n)
+        for name, values in arrays.items():
+            traj._buf[traj._index[name], :n] = values
+        traj._n = n
+        return traj
+
+    # --- access -----------------------------------------------------------------------------
+    def __len__(self):
+        return self._n
+
+    def column(self, name):
+        """Contiguous view of one column (writes go into the trajectory)."""
+        return self._buf[self._index[name], :self._n]
+
+    __getitem__ = column
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self.column(name)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def as_dict(self):
+        return {name: self.column(name) for name in self.columns}
+
+    @property
+    def nbytes(self):
+        return self._buf[:, :self._n].nbytes
+
+    def to_frame(self):
+        """pandas DataFrame sharing this trajectory's memory (no copy)."""
+        import pandas as pd
+        return pd.DataFrame(self._buf[:, :self._n].T, columns=list(self.columns), copy=False)
+
+    def to_arrow(self):
+        """pyarrow Table; the float64 columns are wrapped zero-copy."""
+        import pyarrow as pa
+        return pa.table({name: pa.array(self.column(name)) for name in self.columns})
+
+    # --- summaries ------------------------------------------------------------------------
+    def summary(self):
+        """Compact dict of the end state and step statistics."""
+        if self._n == 0:
+            return {"n_points": 0}
+        t, h, V, mass = self.t, self.h, self.V, self.mass
+        lever = self.lever[:-1]
+        return {
+            "n_points": self._n,
+            "duration_s": float(t[-1] - t[0]),
+            "final_altitude_m": float(h[-1]),
+            "final_velocity_mps": float(V[-1]),
+            "final_mass_kg": float(mass[-1]),
+            "fuel_burned_kg": float(np.nansum(self.fuel_burn[:-1])),
+            "distance_m": float(self.x[-1] - self.x[0]),
+            "none_lever_steps": int(np.isnan(lever).sum()),
+            "thrust_limited_steps": int(np.nansum(self.thrust_limited[:-1])),
+            "max_lever": float(np.nanmax(lever)) if np.isfinite(lever).any() else np.nan,
+        }
+
+    def diagnostics(self):
+        """The per-step lists of the climb integrators' diagnostics dict."""
+        steps = slice(0, max(self._n - 1, 0))
+        t, lever = self.t, self.lever[steps]
+        failed = np.isnan(lever)
+        limited = (self.thrust_limited[steps] > 0.0) & ~failed
+        return {
+            "altitudes": self.h.tolist(),
+            "velocities": self.V.tolist(),
+            "times": t.tolist(),
+            "distances": self.x.tolist(),
+            "lever_positions": [None if f else lv for f, lv in zip(failed.tolist(), lever.tolist())],
+            "none_lever_times": t[steps][failed].tolist(),
+            "limit_times": t[steps][limited].tolist(),
+            "fuel_flow_kg_s": self.fuel_flow[steps].tolist(),    # total (all engines)
+            "fuel_burn_step_kg": self.fuel_burn[steps].tolist(),
+            "mass_kg": self.mass[steps].tolist(),
+        }
+
+    def __repr__(self):
+        return f"Trajectory(n={self._n}, columns={self.columns})"
@@ -0,0 +1,297 @@
+import math
+import os
+import time
+from bisect import bisect_right
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+import climb
+
+# Uncertain inputs, as the keyword arguments of climb.simulate_climb_batch they feed
+PARAMETERS = {
+    "initial_mass_kg": "initial_mass",
+    "CD0": "CD0_values",
+    "e": "e_values",
+    "thrust_factor": "thrust_factor",
+    "tsfc_factor": "tsfc_factor",
+    "E_DOT_cmd": "E_DOT_cmd",  # not sampled by default: it alone sets the climb time
+}
+METRICS = {"fuel_kg": "Total Fuel Burned (kg)", "time_s": "Total Climb Time"}
+PERCENTILES = (5, 25, 50, 75, 95)
+CHUNK_SIZE = 256  # ensemble members integrated together in one simulate_climb_batch call
+
+
+def default_distributions():
+    """
+    parameter -> (numpy Generator method, *arguments), centred on climb.py's constants
+    (read at call time). Deterioration only ever costs: thrust factors <= 1, TSFC
+    factors >= 1, most likely nominal.
+    """
+    return {
+        "initial_mass_kg": ("normal", climb.initial_mass_kg, 0.025 * climb.initial_mass_kg),
+        "CD0": ("normal", climb.CD0, 0.05 * climb.CD0),
+        "e": ("normal", climb.e, 0.02),
+        "thrust_factor": ("triangular", 0.95, 1.0, 1.0),
+        "tsfc_factor": ("triangular", 1.0, 1.0, 1.04),
+    }
+
+
+def sample_parameters(distributions, n, rng):
+    """{parameter: n samples}; parameters not in `distributions` stay nominal."""
+    unknown = set(distributions) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown uncertain parameter(s) {sorted(unknown)} (use {list(PARAMETERS)})")
+    return {name: getattr(rng, method)(*args, size=n)
+            for name, (method, *args) in distributions.items()}
+
+
+# (1) Streaming statistics ----------------------------------------------------------------
+class P2Quantile:
+    """
+    P² estimate of one quantile (Jain & Chlamtac, 1985): five markers, updated per value,
+    so the memory is constant however many values stream through. Exact for <= 5 values.
+    """
+
+    def __init__(self, q):
+        self.q = q
+        self.heights = []
+        self.positions = [0.0, 1.0, 2.0, 3.0, 4.0]
+        self.desired = [0.0, 2.0 * q, 4.0 * q, 2.0 + 2.0 * q, 4.0]
+        self.increments = [0.0, q / 2.0, q, (1.0 + q) / 2.0, 1.0]
+
+    def add(self, x):
+        h, n = self.heights, self.positions
+        if len(h) < 5:
+            h.insert(bisect_right(h, x), x)
+            return
+        if x < h[0]:
+            h[0], k = x, 0
+        elif x >= h[4]:
+            h[4], k = x, 3
+        else:
+            k = bisect_right(h, x) - 1
+        for i in range(k + 1, 5):
+            n[i] += 1.0
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1.0 and n[i + 1] - n[i] > 1.0) or (d <= -1.0 and n[i - 1] - n[i] < -1.0):
+                d = 1.0 if d > 0.0 else -1.0
+                # piecewise-parabolic update, linear where it would break the ordering
+                hp = h[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (h[i + 1] - h[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (h[i] - h[i - 1]) / (n[i] - n[i - 1]))
+                if not h[i - 1] < hp < h[i + 1]:
+                    j = i + int(d)
+                    hp = h[i] + d * (h[j] - h[i]) / (n[j] - n[i])
+                h[i] = hp
+                n[i] += d
+
+    def value(self):
+        if not self.heights:
+            return math.nan
+        if len(self.heights) < 5:
+            return float(np.percentile(self.heights, 100.0 * self.q))
+        return self.heights[2]
+
+
+class RunningStats:
+    """
+    Count, mean, standard deviation, min, max and percentiles of a stream of values fed
+    in chunks: moments merge per chunk (Chan et al.), percentiles are P2Quantile
+    estimates. Non-finite values are counted under 'invalid' and left out.
+    """
+
+    def __init__(self, percentiles=PERCENTILES):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared deviations from the mean
+        self.min = math.inf
+        self.max = -math.inf
+        self.invalid = 0
+        self.quantiles = {p: P2Quantile(p / 100.0) for p in percentiles}
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        ok = np.isfinite(values)
+        self.invalid += int(values.size - ok.sum())
+        values = values[ok]
+        if not values.size:
+            return
+        n, mean = values.size, float(values.mean())
+        m2 = float(((values - mean)**2).sum())
+        total = self.count + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.count * n / total
+        self.count = total
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        for estimator in self.quantiles.values():
+            for x in values.tolist():
+                estimator.add(x)
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else math.nan
+
+    def summary(self):
+        out = {"count": self.count, "invalid": self.invalid, "mean": self.mean if self.count else math.nan,
+               "std": self.std, "min": self.min if self.count else math.nan,
+               "max": self.max if self.count else math.nan}
+        out.update({f"p{p:g}": q.value() for p, q in self.quantiles.items()})
+        return out
+
+
+# (2) Ensemble chunks (worker side) -------------------------------------------------------
+_WORKER = {"engine": None, "solver": None}
+
+
+def _init_worker(stub_dir=None, surrogate_cache_dir=None):
+    """
+    Process initializer: one engine and one InverseLeverSolver per process (the
+    vectorized lever solve of simulate_climb_batch needs the solver).
+    """
+    from lever_solver import InverseLeverSolver
+    from pyengine import get_engine
+    stub_dir = Path(climb.STUB if stub_dir is None else stub_dir)
+    eng = get_engine(stub_dir)
+    if surrogate_cache_dir is not None:
+        from engine_surrogate import build_surrogate
+        sur = build_surrogate(eng, stub_dir, cache_dir=surrogate_cache_dir)
+        _WORKER["engine"], _WORKER["solver"] = sur, InverseLeverSolver.from_surrogate(sur)
+    else:
+        _WORKER["engine"], _WORKER["solver"] = eng, InverseLeverSolver.from_engine(eng)
+
+
+def run_chunk(chunk, size, seed, distributions, profile="linear", altitude_fraction=0.5,
+              shape=1.0, dt=1.0, E_DOT_cmd=None):
+    """
+    Sample and integrate `size` ensemble members together (climb.simulate_climb_batch).
+    The samples come from the chunk's own stream (SeedSequence(seed, spawn_key=(chunk,))),
+    so an ensemble is reproducible whatever the worker count or completion order.
+    Returns {parameter or metric: member array} plus 'none_lever' / 'thrust_limited'
+    (members with at least one such step).
+    """
+    if _WORKER["engine"] is None:
+        _init_worker()
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk,)))
+    samples = sample_parameters(distributions, size, rng)
+    strategy = climb.strategy_for(profile, altitude_fraction, shape)
+    if strategy is None:
+        raise ValueError(f"Unknown climb profile {profile!r}")
+    kwargs = {"E_DOT_cmd": E_DOT_cmd}
+    kwargs.update({PARAMETERS[name]: values for name, values in samples.items()})
+    results = climb.simulate_climb_batch([(altitude_fraction, strategy)] * size, dt=dt,
+                                         engine=_WORKER["engine"],
+                                         lever_solver=_WORKER["solver"], **kwargs)
+    out = dict(samples)
+    for metric, key in METRICS.items():
+        out[metric] = np.array([r[4][key] for r in results])
+    out["none_lever"] = np.array([bool(r[5]["none_lever_times"]) for r in results])
+    out["thrust_limited"] = np.array([bool(r[5]["limit_times"]) for r in results])
+    return out
+
+
+# (3) Ensemble driver ---------------------------------------------------------------------
+@dataclass
+class EnsembleResult:
+    """Streaming statistics of one ensemble: METRICS and the sampled parameters."""
+    n_members: int
+    stats: dict = field(default_factory=dict)     # name -> RunningStats
+    counters: dict = field(default_factory=dict)  # 'none_lever' / 'thrust_limited' members
+    seconds: float = 0.0
+
+    def summary(self):
+        return {name: s.summary() for name, s in self.stats.items()}
+
+    def report(self):
+        keys = ["mean", "std"] + [f"p{p:g}" for p in PERCENTILES]
+        rows = [f"{'':18s}" + "".join(f"{k:>11s}" for k in keys)]
+        for name, s in self.summary().items():
+            rows.append(f"{name:18s}" + "".join(f"{s.get(k, math.nan):11.4g}" for k in keys))
+        rows.append(f"{self.n_members} members in {self.seconds:.1f} s; members with "
+                    + ", ".join(f"{k} steps: {v}" for k, v in self.counters.items()))
+        return "\n".join(rows)
+
+
+def run_ensemble(n_members=2000, profile="linear", altitude_fraction=0.5, shape=1.0,
+                 distributions=None, dt=1.0, E_DOT_cmd=None, seed=0, chunk_size=CHUNK_SIZE,
+                 max_workers=None, stub_dir=None, surrogate_cache_dir=None, store=None,
+                 progress=False):
+    """
+    Monte Carlo climb ensemble of one strategy under uncertain mass, CD0, e and engine
+    deterioration (`distributions`, default default_distributions()).
+
+    Members run in chunks of `chunk_size`, each integrated as one vectorized
+    simulate_climb_batch; chunks spread over a ProcessPoolExecutor (one engine and
+    lever solver per worker) unless max_workers == 1. At most two chunks per worker are
+    in flight and every finished chunk is folded into RunningStats and dropped, so the
+    memory stays flat in the ensemble size. With `store` (anything with
+    `.append(row)`, e.g. a sweep.ColumnStore) every member is also kept as a row.
+    The samples depend only on `seed` and `chunk_size`; the P² percentiles (not the
+    moments) shift slightly with the order in which chunks complete.
+
+    Returns an EnsembleResult.
+    """
+    distributions = default_distributions() if distributions is None else distributions
+    max_workers = max_workers or os.cpu_count() or 1
+    sizes = [min(chunk_size, n_members - start) for start in range(0, n_members, chunk_size)]
+    names = list(METRICS) + list(distributions)
+    # percentiles of the metrics; moments only for the sampled inputs (a sanity check)
+    result = EnsembleResult(n_members, stats={name: RunningStats(PERCENTILES if name in METRICS else ())
+                                              for name in names},
+                            counters={"none_lever": 0, "thrust_limited": 0})
+    case = dict(distributions=distributions, profile=profile, altitude_fraction=altitude_fraction,
+                shape=shape, dt=dt, E_DOT_cmd=E_DOT_cmd)
+    done = 0
+
+    def collect(out):
+        nonlocal done
+        for name in names:
+            result.stats[name].update(out[name])
+        for name in result.counters:
+            result.counters[name] += int(out[name].sum())
+        if store is not None:
+            for j in range(out["fuel_kg"].size):
+                store.append({name: float(out[name][j]) for name in names})
+        done += out["fuel_kg"].size
+        if progress:
+            print(f"[INFO] {done}/{n_members} members done")
+
+    t0 = time.perf_counter()
+    if max_workers == 1:
+        _init_worker(stub_dir, surrogate_cache_dir)
+        for chunk, size in enumerate(sizes):
+            collect(run_chunk(chunk, size, seed, **case))
+    else:
+        if surrogate_cache_dir is not None:
+            from engine_surrogate import build_surrogate
+            from pyengine import get_engine
+            stub = Path(climb.STUB if stub_dir is None else stub_dir)
+            build_surrogate(get_engine(stub), stub, cache_dir=surrogate_cache_dir)
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(stub_dir, surrogate_cache_dir)) as pool:
+            pending, queue = set(), list(enumerate(sizes))[::-1]
+            while queue or pending:
+                while queue and len(pending) < 2 * max_workers:
+                    chunk, size = queue.pop()
+                    pending.add(pool.submit(run_chunk, chunk, size, seed, **case))
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    collect(fut.result())
+    result.seconds = time.perf_counter() - t0
+    return result
+
+
+# (4) Quick self-test when run directly ------------------------------------------------
+if __name__ == "__main__":
+    result = run_ensemble(n_members=512, max_workers=1)
+    print(result.report())
+    nominal = climb.simulate_climb_path(climb.strategy_for("linear", 0.5), 0.5, dt=1.0)[4]
+    print(f"[INFO] Nominal fuel {nominal['Total Fuel Burned (kg)']:.1f} kg, "
+          f"time {nominal['Total Climb Time']:.0f} s")